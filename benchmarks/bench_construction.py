@@ -0,0 +1,50 @@
+"""
+Compare instantiating SingleSubjectDerivatives one by one with the bulk
+*SingleSubjectDerivative.from_labels* constructor.
+
+Usage::
+
+    python -m benchmarks.bench_construction --subjects 5000
+"""
+import argparse
+import tempfile
+import timeit
+from pathlib import Path
+
+from bids_derivatives.derivative import SingleSubjectDerivative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subjects", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    labels = [str(subject) for subject in range(args.subjects)]
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        base_directory = Path(temporary_directory)
+        constructors = {
+            "one by one": lambda: [
+                SingleSubjectDerivative(base_directory, label)
+                for label in labels
+            ],
+            "from_labels": lambda: SingleSubjectDerivative.from_labels(
+                base_directory, labels
+            ),
+            "from_labels (trusted)": lambda: (
+                SingleSubjectDerivative.from_labels(
+                    base_directory, labels, trusted=True
+                )
+            ),
+        }
+        for name, construct in constructors.items():
+            seconds = min(
+                timeit.repeat(construct, number=1, repeat=args.repeat)
+            )
+            print(
+                f"{name:<24}{seconds * 1e6 / args.subjects:>10.2f}"
+                " us/subject"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Measure the cold import time of the package, and guard its fast paths.
+
+Each statement is run in a fresh interpreter with ``-X importtime``,
+reporting the cumulative import time of the package's modules, how many
+other modules they imported, and which of the *DEFERRED_MODULES* were
+imported regardless (e.g. by a job hook that only checks whether a
+subject exists). With ``--check``, statements must also stay within
+*MAX_MODULES* and the import time budget.
+
+Usage::
+
+    python -m benchmarks.bench_import --output imports.json
+    python -m benchmarks.bench_import --check
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.synthetic import generate_derivative
+
+#: Modules that are imported on first use only, by the features needing
+#: them (templates parsing, executors, archives, the persistent index,
+#: compressed headers, hashing, JSON parsing).
+DEFERRED_MODULES = (
+    "parse",
+    "concurrent.futures",
+    "multiprocessing",
+    "tarfile",
+    "zipfile",
+    "sqlite3",
+    "gzip",
+    "hashlib",
+    "mmap",
+    "orjson",
+)
+
+#: The number of modules (other than the package's own) imported on top of
+#: a bare interpreter by ``from bids_derivatives.dataset import
+#: BIDSDerivative`` before any feature was added, which no statement may
+#: exceed.
+MAX_MODULES = 61
+
+#: The default import time budget (in seconds) of each statement, below
+#: the 64 ms the baseline's BIDSDerivative import took.
+IMPORT_BUDGET = 0.05
+
+#: Statements benchmarked, by name (*{base}* is a derivatives directory).
+STATEMENTS = {
+    "import bids_derivatives": "import bids_derivatives",
+    "import BIDSDerivative": (
+        "from bids_derivatives.dataset import BIDSDerivative"
+    ),
+    "import cli": "import bids_derivatives.cli",
+    "subject exists": (
+        "from bids_derivatives import BIDSDerivative; "
+        "'1' in BIDSDerivative({base!r}, use_index=False).subjects"
+    ),
+}
+
+
+def measure_import(statement: str) -> Tuple[float, List[str]]:
+    """
+    Run a statement in a fresh interpreter, measuring the cumulative
+    import time (in seconds) of the package's top-level modules.
+
+    Returns
+    -------
+    Tuple[float, List[str]]
+        The import time, and the names of the imported modules.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    import_time, modules = 0.0, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.append(name.strip())
+        # Top-level imports follow a single space, nested ones are
+        # indented by two more spaces per level.
+        if name.startswith(" bids_derivatives"):
+            import_time += int(cumulative) / 1e6
+    return import_time, modules
+
+
+def run(
+    base_directory: Optional[Path] = None, repeat: int = 5
+) -> Dict[str, dict]:
+    """
+    Measure the fastest import time of each statement (see *STATEMENTS*),
+    the number of modules it imported beyond a bare interpreter's (the
+    package's own aside), and the deferred modules it imported.
+    """
+    _, interpreter_modules = measure_import("pass")
+    interpreter_modules = set(interpreter_modules)
+    results = {}
+    for name, statement in STATEMENTS.items():
+        if "{base" in statement:
+            if base_directory is None:
+                continue
+            statement = statement.format(base=str(base_directory))
+        import_time = float("inf")
+        for _ in range(repeat):
+            seconds, modules = measure_import(statement)
+            import_time = min(import_time, seconds)
+        results[name] = {
+            "import_time": import_time,
+            "num_modules": sum(
+                module not in interpreter_modules
+                and module.partition(".")[0] != "bids_derivatives"
+                for module in modules
+            ),
+            "deferred_imports": [
+                module for module in DEFERRED_MODULES if module in modules
+            ],
+        }
+    return results
+
+
+def check(
+    results: Dict[str, dict], budget: float = IMPORT_BUDGET
+) -> List[str]:
+    """
+    Check the results of :func:`run` against the deferred modules, the
+    modules' baseline (see *MAX_MODULES*) and an import time budget.
+
+    Returns
+    -------
+    List[str]
+        A description of each violation.
+    """
+    violations = []
+    for name, result in results.items():
+        if result["deferred_imports"]:
+            deferred = ", ".join(result["deferred_imports"])
+            violations.append(f"{name} imported {deferred}")
+        if result["num_modules"] > MAX_MODULES:
+            violations.append(
+                f"{name} imported {result['num_modules']} modules "
+                f"(at most {MAX_MODULES})"
+            )
+        if result["import_time"] > budget:
+            violations.append(
+                f"{name} took {result['import_time'] * 1000:.1f} ms "
+                f"(at most {budget * 1000:.1f} ms)"
+            )
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="save results as JSON")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help=(
+            "exit with an error if a deferred module was imported, or a "
+            "statement exceeded the modules' baseline or its budget"
+        ),
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=IMPORT_BUDGET,
+        help="the import time budget of each statement, in seconds",
+    )
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        base_directory = generate_derivative(
+            Path(temporary_directory) / "qsiprep", num_subjects=10
+        )
+        results = run(base_directory, args.repeat)
+    for name, result in results.items():
+        deferred = ", ".join(result["deferred_imports"]) or "-"
+        print(
+            f"{name:<28}{result['import_time'] * 1000:>10.1f} ms"
+            f"{result['num_modules']:>6} modules  {deferred}"
+        )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.check:
+        violations = check(results, args.budget)
+        for violation in violations:
+            print(violation, file=sys.stderr)
+        if violations:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Measure the memory held per file and per subject by the in-memory
+representations of a derivatives tree.
+
+Usage::
+
+    python -m benchmarks.bench_memory --subjects 200 --sessions 2
+"""
+import argparse
+import gc
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.query.query import FileIndex
+from bids_derivatives.utils.records import FileRecord
+
+
+class TupleFile(NamedTuple):
+    """
+    The named tuple files were recorded as before FileRecord.
+    """
+
+    path: str
+    subject: Optional[str]
+    session: Optional[str]
+    datatype: Optional[str]
+    size: Optional[int] = None
+    mtime_ns: Optional[int] = None
+
+
+class DictFile:
+    """
+    A FileRecord without __slots__, whose fields are held in a dict.
+    """
+
+    def __init__(self, *fields):
+        for field, value in zip(FileRecord.__slots__, fields):
+            setattr(self, field, value)
+
+
+def copy_records(scan, record_class) -> list:
+    """
+    Copy the records of a scan into *record_class* instances, with new
+    file names so that each copy is charged for its own strings.
+    """
+    return [
+        record_class(
+            file.directory,
+            file.name.encode().decode(),
+            file.subject,
+            file.session,
+            file.datatype,
+            file.size,
+            file.mtime_ns,
+        )
+        for file in scan.files
+    ]
+
+
+def retained_memory(build):
+    """
+    Measure the memory retained by the object *build* returns.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subjects", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=2)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        base_directory = generate_derivative(
+            Path(temporary_directory) / "qsiprep",
+            num_subjects=args.subjects,
+            num_sessions=args.sessions,
+        )
+        derivative = BIDSDerivative(base_directory, use_index=False)
+        scan, records = retained_memory(derivative.walk)
+        num_files = len(scan.files)
+        _, slotted = retained_memory(lambda: copy_records(scan, FileRecord))
+        _, dicts = retained_memory(lambda: copy_records(scan, DictFile))
+        _, tuples = retained_memory(
+            lambda: [
+                TupleFile(
+                    "/".join([file.directory, file.name]),
+                    file.subject,
+                    file.session,
+                    file.datatype,
+                    file.size,
+                    file.mtime_ns,
+                )
+                for file in scan.files
+            ]
+        )
+        _, index = retained_memory(lambda: FileIndex.from_scan(scan))
+        _, subjects = retained_memory(
+            lambda: [
+                derivative.get_derivative(subject)
+                for subject in derivative.subjects
+            ]
+        )
+    print(f"{num_files} files, {args.subjects} subjects")
+    print(f"{'walk':<28}{records / num_files:>8.0f} B/file")
+    print(f"{'FileRecord':<28}{slotted / num_files:>8.0f} B/file")
+    print(f"{'FileRecord without slots':<28}{dicts / num_files:>8.0f} B/file")
+    print(f"{'named tuples':<28}{tuples / num_files:>8.0f} B/file")
+    print(f"{'FileIndex':<28}{index / num_files:>8.0f} B/file")
+    print(
+        f"{'SingleSubjectDerivative':<28}"
+        f"{subjects / args.subjects:>8.0f} B/subject"
+    )
+
+
+if __name__ == "__main__":
+    main()
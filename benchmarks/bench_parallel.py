@@ -0,0 +1,83 @@
+"""
+Measure how whole-dataset scans scale with the number of workers.
+
+High-latency storage is emulated by delaying every directory listing,
+which is where concurrent scans pay off.
+
+Usage::
+
+    python -m benchmarks.bench_parallel --subjects 200 --latency 2
+"""
+import argparse
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+
+
+@contextmanager
+def listing_latency(milliseconds: float):
+    """
+    Delay every *os.scandir* call by *milliseconds*.
+    """
+    scandir = os.scandir
+
+    def delayed_scandir(*args, **kwargs):
+        time.sleep(milliseconds / 1000)
+        return scandir(*args, **kwargs)
+
+    os.scandir = delayed_scandir
+    try:
+        yield
+    finally:
+        os.scandir = scandir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subjects", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument(
+        "--latency", type=float, default=2, help="milliseconds per listing"
+    )
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16]
+    )
+    parser.add_argument("--backend", default="thread")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        base_directory = Path(temporary_directory) / "qsiprep"
+        generate_derivative(
+            base_directory,
+            num_subjects=args.subjects,
+            num_sessions=args.sessions,
+        )
+        expected = None
+        print(f"{'workers':>8}{'get_sessions (s)':>20}{'walk (s)':>12}")
+        for workers in args.workers:
+            derivative = BIDSDerivative(
+                base_directory,
+                use_index=False,
+                max_workers=workers,
+                backend=args.backend,
+            )
+            derivative.subjects
+            with listing_latency(args.latency):
+                start = time.perf_counter()
+                sessions = derivative.get_sessions()
+                sessions_time = time.perf_counter() - start
+                start = time.perf_counter()
+                scan = derivative.walk()
+                walk_time = time.perf_counter() - start
+            if expected is None:
+                expected = (sessions, scan)
+            assert (sessions, scan) == expected, "results differ"
+            print(f"{workers:>8}{sessions_time:>20.3f}{walk_time:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compare the filesystem calls issued by the legacy *glob*/*iterdir*/*exists*
+queries with those of the single-pass *os.scandir* walker.
+
+With 200 subjects of 2 sessions (Python 3.11), the legacy queries issued 402
+calls (1 scandir, 200 listdir, 201 stat) and *BIDSDerivative.derivatives* 404
+(201 scandir, 203 stat): as many, as each subject's directory is listed once
+and stat-ed once (by the legacy *exists* check, or to stamp the cached
+sessions). It took 16-24 ms against 20-26 ms for the legacy queries.
+*BIDSDerivative.walk* listed every directory, with 1402 calls.
+
+Usage::
+
+    python -m benchmarks.bench_scan --subjects 200 --sessions 2
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from parse import parse
+
+from benchmarks.synthetic import generate_derivative
+from benchmarks.syscalls import count_filesystem_calls
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.utils.templates import SESSION_TEMPLATE, SUBJECT_TEMPLATE
+
+
+def legacy_sessions(base_directory: Path) -> dict:
+    """
+    Query subjects and sessions the way earlier releases did.
+    """
+    subjects = [
+        parse(SUBJECT_TEMPLATE, subject.name).named["subject"]
+        for subject in base_directory.glob(
+            SUBJECT_TEMPLATE.format(subject="*")
+        )
+    ]
+    result = {}
+    for subject in subjects:
+        path = base_directory / SUBJECT_TEMPLATE.format(subject=subject)
+        path.exists()  # SingleSubjectDerivative.path
+        sessions = []
+        for session in path.iterdir():
+            parser = parse(SESSION_TEMPLATE, session.name)
+            if parser:
+                sessions.append(parser.named.get("session"))
+        result[subject] = list(set(sessions))
+    return result
+
+
+def derivative_sessions(base_directory: Path) -> dict:
+    """
+    Query subjects and sessions through BIDSDerivative.
+    """
+    derivative = BIDSDerivative(base_directory, use_index=False)
+    return {
+        subject: single.sessions
+        for subject, single in derivative.derivatives.items()
+    }
+
+
+def walk_sessions(base_directory: Path) -> dict:
+    """
+    Query subjects, sessions and files with a single walk.
+    """
+    return BIDSDerivative(base_directory, use_index=False).walk().subjects
+
+
+QUERIES = {
+    "legacy (glob/exists/iterdir)": legacy_sessions,
+    "BIDSDerivative.derivatives": derivative_sessions,
+    "BIDSDerivative.walk": walk_sessions,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subjects", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=2)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        base_directory = Path(temporary_directory) / "qsiprep"
+        # Earlier releases listed report files (sub-<label>.html) as
+        # subjects and failed on them, so none are generated here.
+        generate_derivative(
+            base_directory,
+            num_subjects=args.subjects,
+            num_sessions=args.sessions,
+            reports=False,
+        )
+        print(f"{'query':<32}{'time (ms)':>12}  filesystem calls")
+        for name, query in QUERIES.items():
+            with count_filesystem_calls() as counts:
+                start = time.perf_counter()
+                query(base_directory)
+                elapsed = (time.perf_counter() - start) * 1000
+            calls = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+            total = sum(counts.values())
+            print(f"{name:<32}{elapsed:>12.2f}  {total} ({calls})")
+
+
+if __name__ == "__main__":
+    main()
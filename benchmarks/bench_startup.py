@@ -0,0 +1,160 @@
+"""
+Measure the cold-start time of the command-line interface.
+
+Every command is run in a fresh interpreter (as from a cron job), and its
+wall time is reported next to the bare interpreter's startup, so that the
+cost of imports and of the query itself can be told apart. With
+``--check``, commands whose cost is mostly startup (see
+*BUDGETED_COMMANDS*) must run within a budget of the bare interpreter's
+startup.
+
+Usage::
+
+    python -m benchmarks.bench_startup --subjects 200 --output startup.json
+    python -m benchmarks.bench_startup --check --budget 0.1
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.synthetic import backdate, generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+
+#: The default budget (in seconds) of each command's wall time on top of
+#: the bare interpreter's startup.
+STARTUP_BUDGET = 0.1
+
+#: Commands checked against the budget (listing files takes time growing
+#: with the number of subjects, so those are only reported).
+BUDGETED_COMMANDS = (
+    "import bids_derivatives.cli",
+    "import bids_derivatives.dataset",
+    "cli --help",
+    "cli subjects",
+    "cli subjects (indexed)",
+)
+
+
+def measure_startup(arguments: List[str], repeat: int = 5) -> float:
+    """
+    Measure the fastest wall time (in seconds) of running the interpreter
+    with *arguments* in a subprocess.
+    """
+    wall_time = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *arguments],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        wall_time = min(wall_time, time.perf_counter() - start)
+    return wall_time
+
+
+def run(base_directory: Path, repeat: int = 5) -> Dict[str, float]:
+    """
+    Measure the startup of the interpreter, of the package's imports and
+    of the CLI's commands on a derivatives directory.
+    """
+    cli = ["-m", "bids_derivatives.cli"]
+    directory = str(base_directory)
+    commands = {
+        "python": ["-c", "pass"],
+        "import bids_derivatives.cli": ["-c", "import bids_derivatives.cli"],
+        "import bids_derivatives.dataset": [
+            "-c",
+            "import bids_derivatives.dataset",
+        ],
+        "cli --help": [*cli, "--help"],
+        "cli subjects": [*cli, "subjects", directory, "--no-index"],
+        "cli files": [*cli, "files", directory, "--no-index"],
+    }
+    results = {
+        name: measure_startup(arguments, repeat)
+        for name, arguments in commands.items()
+    }
+    derivative = BIDSDerivative(base_directory, verbosity="error")
+    # Building the index modifies the base directory; backdating and
+    # refreshing it again leaves every directory fresh.
+    for _ in range(2):
+        backdate(base_directory)
+        derivative.build_index()
+    for name in ("subjects", "files"):
+        results[f"cli {name} (indexed)"] = measure_startup(
+            [*cli, name, directory], repeat
+        )
+    return results
+
+
+def check(
+    results: Dict[str, float], budget: float = STARTUP_BUDGET
+) -> List[str]:
+    """
+    Check the results of :func:`run` against a budget of each command's
+    wall time on top of the bare interpreter's startup (see
+    *BUDGETED_COMMANDS*).
+
+    Returns
+    -------
+    List[str]
+        A description of each command over budget.
+    """
+    violations = []
+    for name in BUDGETED_COMMANDS:
+        overhead = results[name] - results["python"]
+        if overhead > budget:
+            violations.append(
+                f"{name} took {overhead * 1000:.1f} ms on top of the "
+                f"interpreter (at most {budget * 1000:.1f} ms)"
+            )
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subjects", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="save results as JSON")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit with an error if a startup exceeded its budget",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=STARTUP_BUDGET,
+        help=(
+            "the wall time budget of each command on top of the "
+            "interpreter's startup, in seconds"
+        ),
+    )
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        base_directory = generate_derivative(
+            Path(temporary_directory) / "qsiprep",
+            num_subjects=args.subjects,
+            num_sessions=args.sessions,
+        )
+        results = run(base_directory, args.repeat)
+    for name, wall_time in results.items():
+        print(f"{name:<36}{wall_time * 1000:>10.1f} ms")
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.check:
+        violations = check(results, args.budget)
+        for violation in violations:
+            print(violation, file=sys.stderr)
+        if violations:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Benchmark the public queries of BIDSDerivative on a synthetic dataset.
+
+Each query is run on a freshly instantiated BIDSDerivative (i.e. with cold
+caches), reporting its wall time, peak Python memory and filesystem call
+counts. Results may be saved to JSON and compared with an earlier run.
+
+Usage::
+
+    python -m benchmarks.run --subjects 500 --output results.json
+    python -m benchmarks.run --subjects 500 --compare results.json
+"""
+import argparse
+import json
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+import bids_derivatives
+from benchmarks.synthetic import LAYOUTS, backdate, generate_derivative
+from benchmarks.syscalls import count_filesystem_calls
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.index.index import INDEX_DIRECTORY
+
+#: Queries to benchmark, by name. Each is given a fresh BIDSDerivative.
+QUERIES: Dict[str, Callable[[BIDSDerivative], object]] = {
+    "dataset_description": lambda d: d.dataset_description,
+    "validate_dataset_description": lambda d: d.validate_dataset_description(),
+    "subjects": lambda d: d.subjects,
+    "iter_subjects (first)": lambda d: next(d.iter_subjects(), None),
+    "derivatives": lambda d: list(d.derivatives.values()),
+    "derivatives.sessions": lambda d: [
+        derivative.sessions for derivative in d.derivatives.values()
+    ],
+    "get_sessions": lambda d: d.get_sessions(),
+    "walk": lambda d: d.walk(),
+    "walk (stat)": lambda d: d.walk(stat=True),
+    "get_files (broad)": lambda d: d.get_files(extension=".nii.gz"),
+    "get_files (narrow)": lambda d: d.get_files(
+        subject="1", session="1", suffix="mask"
+    ),
+}
+
+#: Queries benchmarked once a persistent index was built.
+INDEXED_QUERIES: Dict[str, Callable[[BIDSDerivative], object]] = {
+    "subjects (indexed)": lambda d: d.subjects,
+    "get_sessions (indexed)": lambda d: d.get_sessions(),
+    "get_files (indexed)": lambda d: d.get_files(extension=".nii.gz"),
+}
+
+
+def measure(
+    query: Callable[[BIDSDerivative], object],
+    factory: Callable[[], BIDSDerivative],
+    repeat: int = 3,
+) -> dict:
+    """
+    Measure a single query.
+
+    Parameters
+    ----------
+    query : Callable[[BIDSDerivative], object]
+        The query to measure.
+    factory : Callable[[], BIDSDerivative]
+        A function instantiating the BIDSDerivative to query.
+    repeat : int, optional
+        The number of timed runs (the fastest is reported), by default 3
+
+    Returns
+    -------
+    dict
+        The query's wall time (seconds), peak memory (bytes) and
+        filesystem calls.
+    """
+    wall_time = float("inf")
+    for _ in range(repeat):
+        derivative = factory()
+        start = time.perf_counter()
+        query(derivative)
+        wall_time = min(wall_time, time.perf_counter() - start)
+    derivative = factory()
+    tracemalloc.start()
+    with count_filesystem_calls() as counts:
+        query(derivative)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_time": wall_time,
+        "peak_memory": peak_memory,
+        "filesystem_calls": dict(counts),
+        "total_filesystem_calls": sum(counts.values()),
+    }
+
+
+def run(base_directory: Path, repeat: int = 3) -> Dict[str, dict]:
+    """
+    Benchmark every query on a derivatives directory.
+    """
+    results = {}
+    backdate(base_directory)
+
+    def factory():
+        return BIDSDerivative(
+            base_directory, verbosity="error", use_index=False
+        )
+
+    for name, query in QUERIES.items():
+        results[name] = measure(query, factory, repeat)
+
+    def build_factory():
+        shutil.rmtree(base_directory / INDEX_DIRECTORY, ignore_errors=True)
+        return factory()
+
+    results["build_index"] = measure(
+        lambda d: d.build_index(), build_factory, repeat
+    )
+    # Directories modified while building are only trusted once rescanned.
+    backdate(base_directory)
+    factory().build_index()
+
+    def indexed_factory():
+        return BIDSDerivative(base_directory, verbosity="error")
+
+    for name, query in INDEXED_QUERIES.items():
+        results[name] = measure(query, indexed_factory, repeat)
+    return results
+
+
+def report(results: Dict[str, dict], baseline: Dict[str, dict] = None):
+    """
+    Print benchmark results, optionally relative to a baseline.
+    """
+    header = (
+        f"{'query':<32}{'time (ms)':>12}{'peak (KiB)':>12}{'fs calls':>10}"
+    )
+    print(header + ("  time vs. baseline" if baseline else ""))
+    for name, result in results.items():
+        line = (
+            f"{name:<32}{result['wall_time'] * 1000:>12.2f}"
+            f"{result['peak_memory'] / 1024:>12.1f}"
+            f"{result['total_filesystem_calls']:>10}"
+        )
+        if baseline and name in baseline:
+            ratio = result["wall_time"] / baseline[name]["wall_time"]
+            line += f"  {ratio:>8.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--app", choices=sorted(LAYOUTS), default="qsiprep")
+    parser.add_argument("--subjects", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument("--files-per-session", type=int, default=None)
+    parser.add_argument(
+        "--file-size",
+        type=int,
+        default=0,
+        help="sparse file size in bytes (0 for empty files)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, help="save results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON results to compare")
+    args = parser.parse_args()
+    parameters = {
+        "app": args.app,
+        "subjects": args.subjects,
+        "sessions": args.sessions,
+        "files_per_session": args.files_per_session,
+        "file_size": args.file_size,
+    }
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        base_directory = generate_derivative(
+            Path(temporary_directory) / args.app,
+            app=args.app,
+            num_subjects=args.subjects,
+            num_sessions=args.sessions,
+            files_per_session=args.files_per_session,
+            file_size=args.file_size,
+        )
+        results = run(base_directory, args.repeat)
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+    report(results, baseline)
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "version": bids_derivatives.__version__,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "parameters": parameters,
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
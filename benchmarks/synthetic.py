@@ -0,0 +1,170 @@
+"""
+Generate synthetic BIDS-App derivatives trees for benchmarking.
+
+Trees follow the layout of qsiprep and fmriprep outputs (see
+*tests/data/derivatives/qsiprep*), with a configurable number of subjects,
+sessions and files per session.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Union
+
+#: Per-app layouts: subject-level files (by directory) and session-level
+#: files (by datatype), as BIDS file name remainders following the
+#: subject/session entities.
+LAYOUTS = {
+    "qsiprep": {
+        "subject": {
+            "anat": [
+                "desc-preproc_T1w.nii.gz",
+                "desc-brain_mask.nii.gz",
+                "dseg.nii.gz",
+                "label-GM_probseg.nii.gz",
+                "label-WM_probseg.nii.gz",
+                "label-CSF_probseg.nii.gz",
+                "space-MNI152NLin2009cAsym_desc-preproc_T1w.nii.gz",
+                "from-T1w_to-MNI152NLin2009cAsym_mode-image_xfm.h5",
+                "from-MNI152NLin2009cAsym_to-T1w_mode-image_xfm.h5",
+            ],
+            "figures": ["t1_2_mni.svg", "seg_brainmask.svg"],
+        },
+        "session": {
+            "dwi": [
+                "dir-FWD_space-T1w_desc-preproc_dwi.nii.gz",
+                "dir-FWD_space-T1w_desc-preproc_dwi.bval",
+                "dir-FWD_space-T1w_desc-preproc_dwi.bvec",
+                "dir-FWD_space-T1w_desc-brain_mask.nii.gz",
+                "dir-FWD_space-T1w_dwiref.nii.gz",
+                "dir-FWD_confounds.tsv",
+                "dir-FWD_dwiqc.json",
+            ],
+        },
+    },
+    "fmriprep": {
+        "subject": {
+            "anat": [
+                "desc-preproc_T1w.nii.gz",
+                "desc-brain_mask.nii.gz",
+                "dseg.nii.gz",
+                "label-GM_probseg.nii.gz",
+                "space-MNI152NLin2009cAsym_desc-preproc_T1w.nii.gz",
+                "from-T1w_to-MNI152NLin2009cAsym_mode-image_xfm.h5",
+            ],
+            "figures": ["t1_2_mni.svg", "seg_brainmask.svg"],
+        },
+        "session": {
+            "func": [
+                "task-rest_space-T1w_desc-preproc_bold.nii.gz",
+                "task-rest_space-T1w_desc-preproc_bold.json",
+                "task-rest_space-T1w_desc-brain_mask.nii.gz",
+                "task-rest_space-T1w_boldref.nii.gz",
+                "task-rest_desc-confounds_timeseries.tsv",
+            ],
+        },
+    },
+}
+
+
+def create_file(path: Path, size: int = 0):
+    """
+    Create a file; when *size* is given, the file is extended to it
+    without writing any data (i.e. sparsely, where supported).
+    """
+    with open(path, "wb") as f:
+        if size:
+            f.truncate(size)
+
+
+def generate_derivative(
+    base_directory: Union[str, Path],
+    app: str = "qsiprep",
+    num_subjects: int = 10,
+    num_sessions: int = 1,
+    files_per_session: int = None,
+    file_size: int = 0,
+    reports: bool = True,
+) -> Path:
+    """
+    Generate a synthetic BIDS-App derivatives tree.
+
+    Parameters
+    ----------
+    base_directory : Union[str, Path]
+        The directory to create the tree at (e.g. *derivatives/qsiprep*).
+    app : str, optional
+        The BIDS-App whose layout to follow (see *LAYOUTS*), by default
+        *qsiprep*.
+    num_subjects : int, optional
+        The number of subjects, by default 10
+    num_sessions : int, optional
+        The number of sessions per subject, by default 1
+    files_per_session : int, optional
+        The number of files per session, by default None (the app's
+        layout, once). Additional files are added as further runs.
+    file_size : int, optional
+        The (sparse) size of every file in bytes, by default 0 (empty
+        files).
+    reports : bool, optional
+        Whether to create the subjects' HTML reports at the base
+        directory, by default True
+
+    Returns
+    -------
+    Path
+        The base directory of the generated tree.
+    """
+    base_directory = Path(base_directory)
+    layout = LAYOUTS[app]
+    base_directory.mkdir(parents=True, exist_ok=True)
+    description = {
+        "Name": f"{app} output",
+        "BIDSVersion": "1.1.1",
+        "DatasetType": "derivative",
+        "GeneratedBy": [{"Name": app}],
+    }
+    with open(base_directory / "dataset_description.json", "w") as f:
+        json.dump(description, f)
+    session_files = [
+        (datatype, name)
+        for datatype, names in layout["session"].items()
+        for name in names
+    ]
+    files_per_session = files_per_session or len(session_files)
+    for subject in range(1, num_subjects + 1):
+        subject_directory = base_directory / f"sub-{subject}"
+        if reports:
+            create_file(base_directory / f"sub-{subject}.html")
+        for directory, names in layout["subject"].items():
+            os.makedirs(subject_directory / directory)
+            for name in names:
+                create_file(
+                    subject_directory / directory / f"sub-{subject}_{name}",
+                    file_size,
+                )
+        for session in range(1, num_sessions + 1):
+            prefix = f"sub-{subject}_ses-{session}"
+            session_directory = subject_directory / f"ses-{session}"
+            for datatype in layout["session"]:
+                os.makedirs(session_directory / datatype)
+            for i in range(files_per_session):
+                datatype, name = session_files[i % len(session_files)]
+                run = i // len(session_files)
+                run = f"run-{run + 1}_" if run else ""
+                create_file(
+                    session_directory / datatype / f"{prefix}_{run}{name}",
+                    file_size,
+                )
+    return base_directory
+
+
+def backdate(base_directory: Union[str, Path], seconds: float = 60):
+    """
+    Move the modification time of every directory of a tree *seconds* into
+    the past, as if it was generated earlier (so that it is not treated as
+    being modified while being indexed or cached).
+    """
+    timestamp = time.time() - seconds
+    for directory, _, _ in os.walk(base_directory):
+        os.utime(directory, (timestamp, timestamp))
@@ -0,0 +1,111 @@
+"""
+Count the filesystem calls issued through the :mod:`os` module, without
+relying on strace.
+
+:mod:`pathlib` and :mod:`bids_derivatives` both reach the filesystem through
+:func:`os.scandir`, :func:`os.listdir` and :func:`os.stat`, so patching these
+(and the *stat* method of the entries yielded by :func:`os.scandir`) accounts
+for every directory listing and stat they issue. Before Python 3.11, pathlib
+calls them through its own accessor, which keeps references to the original
+functions and is patched as well.
+"""
+import os
+import pathlib
+from collections import Counter
+from contextlib import contextmanager
+
+COUNTED_FUNCTIONS = ("scandir", "listdir", "stat", "lstat")
+
+#: pathlib's accessor of the filesystem (Python < 3.11 only), whose
+#: attributes are the :mod:`os` functions it was defined with.
+PATHLIB_ACCESSOR = getattr(pathlib, "_NormalAccessor", None)
+
+
+class CountingEntry:
+    """
+    Proxy an :class:`os.DirEntry`, counting calls to its *stat* method.
+    """
+
+    def __init__(self, entry: os.DirEntry, counts: Counter):
+        self._entry = entry
+        self._counts = counts
+
+    def __getattr__(self, name: str):
+        return getattr(self._entry, name)
+
+    def __fspath__(self) -> str:
+        return self._entry.path
+
+    def stat(self, **kwargs):
+        self._counts["DirEntry.stat"] += 1
+        return self._entry.stat(**kwargs)
+
+
+class CountingScandir:
+    """
+    Proxy an :func:`os.scandir` iterator, wrapping its entries.
+    """
+
+    def __init__(self, iterator, counts: Counter):
+        self._iterator = iterator
+        self._counts = counts
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> CountingEntry:
+        return CountingEntry(next(self._iterator), self._counts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._iterator.close()
+
+
+@contextmanager
+def count_filesystem_calls():
+    """
+    Count filesystem calls issued within the context.
+
+    Yields
+    ------
+    Counter
+        Function names mapped to the number of times they were called.
+    """
+    counts = Counter()
+    originals = {name: getattr(os, name) for name in COUNTED_FUNCTIONS}
+    accessor_names = [
+        name
+        for name in COUNTED_FUNCTIONS
+        if name in vars(PATHLIB_ACCESSOR or object)
+    ]
+    accessor_originals = {
+        name: vars(PATHLIB_ACCESSOR)[name] for name in accessor_names
+    }
+
+    def wrap(name, function):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            result = function(*args, **kwargs)
+            if name == "scandir":
+                return CountingScandir(result, counts)
+            return result
+
+        return wrapper
+
+    for name, function in originals.items():
+        setattr(os, name, wrap(name, function))
+    for name in accessor_names:
+        # Python functions set on a class would be bound as methods.
+        setattr(PATHLIB_ACCESSOR, name, staticmethod(getattr(os, name)))
+    try:
+        yield counts
+    finally:
+        for name, function in originals.items():
+            setattr(os, name, function)
+        for name, function in accessor_originals.items():
+            setattr(PATHLIB_ACCESSOR, name, function)
@@ -1 +1,9 @@
+from bids_derivatives.utils.lazy import lazy_exports
+
 __version__ = "0.0.1"
+
+# Public names are imported on first access only, so that lightweight
+# entry points (e.g. the command-line interface) start quickly.
+__all__, __getattr__, __dir__ = lazy_exports(
+    __name__, {"bids_derivatives.dataset.dataset": ["BIDSDerivative"]}
+)
@@ -0,0 +1,8 @@
+from bids_derivatives.utils.lazy import lazy_exports
+
+__all__, __getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "bids_derivatives.aio.dataset": ["AsyncBIDSDerivative"],
+    },
+)
@@ -0,0 +1,212 @@
+import asyncio
+import contextvars
+import weakref
+from collections import deque
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from typing import AsyncIterator, Callable, List, Tuple, Union
+
+from bids_derivatives.dataset.dataset import BIDSDerivative
+from bids_derivatives.query.query import FileIndex, normalize_value
+from bids_derivatives.utils.scanner import DerivativeScan, walk_subject
+from bids_derivatives.utils.templates.bids import SUBJECT_TEMPLATE
+
+
+class AsyncBIDSDerivative:
+    """
+    An AsyncBIDSDerivative performs a BIDSDerivative's queries from
+    asynchronous code, running every filesystem access in an executor so
+    that the event loop is never blocked.
+    """
+
+    def __init__(
+        self,
+        derivative: BIDSDerivative,
+        max_concurrency: int = 8,
+        executor: Executor = None,
+    ) -> None:
+        """
+        Initialize the AsyncBIDSDerivative class.
+
+        Parameters
+        ----------
+        derivative : BIDSDerivative
+            The derivative to query.
+        max_concurrency : int, optional
+            The maximal number of filesystem queries running at once.
+            The default is 8.
+        executor : Executor, optional
+            The executor queries are run in. The default is None (the
+            event loop's default executor).
+        """
+        self.derivative = derivative
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def __repr__(self) -> str:
+        return f"{self.derivative} (asynchronous)"
+
+    @classmethod
+    async def create(
+        cls,
+        base_directory: Union[str, Path],
+        max_concurrency: int = 8,
+        executor: Executor = None,
+        **kwargs,
+    ) -> "AsyncBIDSDerivative":
+        """
+        Instantiate the BIDSDerivative to query off the event loop.
+
+        Parameters
+        ----------
+        base_directory : Union[str, Path]
+            The base directory of the dataset.
+        max_concurrency : int, optional
+            The maximal number of filesystem queries running at once.
+            The default is 8.
+        executor : Executor, optional
+            The executor queries are run in. The default is None (the
+            event loop's default executor).
+        **kwargs
+            Keyword arguments passed to BIDSDerivative.
+
+        Returns
+        -------
+        AsyncBIDSDerivative
+            The asynchronous derivative.
+        """
+        derivative = await asyncio.get_running_loop().run_in_executor(
+            executor, partial(BIDSDerivative, base_directory, **kwargs)
+        )
+        return cls(derivative, max_concurrency, executor)
+
+    async def run(self, function: Callable, *args, **kwargs):
+        """
+        Run a blocking function in the executor, once one of the
+        *max_concurrency* slots is free.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(
+                self.max_concurrency
+            )
+        # Run in a copy of the caller's context, so that instrumentation
+        # recorders active in the caller also record the function's calls.
+        context = contextvars.copy_context()
+        async with semaphore:
+            return await loop.run_in_executor(
+                self.executor, partial(context.run, function, *args, **kwargs)
+            )
+
+    async def get_dataset_description(self) -> dict:
+        """
+        Get the dataset description.
+        """
+        return await self.run(getattr, self.derivative, "dataset_description")
+
+    async def get_subjects(self) -> List[str]:
+        """
+        Get the available subjects.
+        """
+        return await self.run(getattr, self.derivative, "subjects")
+
+    async def get_sessions(self, subject: str) -> List[str]:
+        """
+        Get the available sessions of a single subject.
+        """
+        return await self.run(
+            lambda: self.derivative.derivatives[subject].sessions
+        )
+
+    async def get_files(self, **entities) -> List[Path]:
+        """
+        Query the subjects' files by their BIDS entities
+        (see :meth:`BIDSDerivative.get_files`).
+        """
+        return await self.run(self.derivative.get_files, **entities)
+
+    def get_subject_files(self, subject: str, **entities) -> List[Path]:
+        """
+        Query a single subject's files by walking only its directory.
+        """
+        base_directory = self.derivative.base_directory
+        sessions, files = walk_subject(
+            base_directory,
+            SUBJECT_TEMPLATE.format(subject=subject),
+            storage=self.derivative.storage,
+        )
+        index = FileIndex.from_scan(DerivativeScan({subject: sessions}, files))
+        return [base_directory / path for path in index.query(**entities)]
+
+    async def iter_subjects(self) -> AsyncIterator[str]:
+        """
+        Iterate over the available subjects.
+        """
+        for subject in await self.get_subjects():
+            yield subject
+
+    async def iter_sessions(self) -> AsyncIterator[Tuple[str, List[str]]]:
+        """
+        Iterate over every subject's sessions, querying up to
+        *max_concurrency* subjects ahead while preserving the subjects'
+        order. Pending queries are cancelled if iteration stops early.
+
+        Yields
+        ------
+        Tuple[str, List[str]]
+            A subject's label and its sessions.
+        """
+        async for subject, sessions in self.gather_ahead(self.get_sessions):
+            yield subject, sessions
+
+    async def iter_files(self, **entities) -> AsyncIterator[Path]:
+        """
+        Iterate over the subjects' files matching the given entities,
+        walking up to *max_concurrency* subjects ahead.
+
+        Yields
+        ------
+        Path
+            The matching files, ordered by subject.
+        """
+        subjects = entities.pop("subject", None)
+        if subjects is not None:
+            if isinstance(subjects, str):
+                subjects = [subjects]
+            subjects = {
+                normalize_value("subject", subject) for subject in subjects
+            }
+        async for _, files in self.gather_ahead(
+            partial(self.run, self.get_subject_files, **entities), subjects
+        ):
+            for file in files:
+                yield file
+
+    async def gather_ahead(
+        self, query: Callable, subjects: set = None
+    ) -> AsyncIterator[tuple]:
+        """
+        Run an asynchronous per-subject query over the subjects, keeping
+        up to *max_concurrency* queries in flight and yielding their
+        results in the subjects' order.
+        """
+        pending = deque()
+        try:
+            async for subject in self.iter_subjects():
+                if subjects is not None and subject not in subjects:
+                    continue
+                pending.append(
+                    (subject, asyncio.ensure_future(query(subject)))
+                )
+                if len(pending) >= self.max_concurrency:
+                    subject, task = pending.popleft()
+                    yield subject, await task
+            while pending:
+                subject, task = pending.popleft()
+                yield subject, await task
+        finally:
+            for _, task in pending:
+                task.cancel()
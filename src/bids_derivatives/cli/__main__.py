@@ -0,0 +1,5 @@
+import sys
+
+from bids_derivatives.cli.cli import main
+
+sys.exit(main())
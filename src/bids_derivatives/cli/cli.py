@@ -0,0 +1,262 @@
+"""
+Query BIDS-App derivatives from the command line.
+
+Results are streamed to the standard output as tab-separated values (with
+a header row) or as JSON lines, one record per line::
+
+    bids-derivatives subjects derivatives/qsiprep
+    bids-derivatives files derivatives/qsiprep --suffix T1w --format json
+    bids-derivatives completeness derivatives/qsiprep || echo incomplete
+
+Heavy modules are only imported once a command runs, so that the
+interpreter's startup dominates the cost of quick queries.
+"""
+import argparse
+import os
+import sys
+from typing import Callable, Dict, Iterable, List, Optional, TextIO
+
+from bids_derivatives.cli.messages import INVALID_ENTITY
+
+#: Placeholder of missing values in TSV output (as in BIDS tabular files).
+MISSING_VALUE = "n/a"
+
+
+def write_tsv(rows: Iterable[dict], columns: List[str], stream: TextIO):
+    """
+    Write rows as tab-separated values, preceded by a header row.
+    """
+    stream.write("\t".join(columns) + "\n")
+    for row in rows:
+        values = (row.get(column) for column in columns)
+        stream.write(
+            "\t".join(
+                MISSING_VALUE if value is None else str(value)
+                for value in values
+            )
+            + "\n"
+        )
+
+
+def write_json(rows: Iterable[dict], columns: List[str], stream: TextIO):
+    """
+    Write rows as JSON lines, one object per row.
+    """
+    import json
+
+    for row in rows:
+        stream.write(
+            json.dumps({column: row.get(column) for column in columns}) + "\n"
+        )
+
+
+#: Output writers, by format.
+FORMATS: Dict[str, Callable] = {"tsv": write_tsv, "json": write_json}
+
+
+def load_derivative(arguments: argparse.Namespace):
+    """
+    Instantiate the BIDSDerivative a command queries.
+    """
+    from bids_derivatives.dataset.dataset import BIDSDerivative
+
+    return BIDSDerivative(
+        arguments.base_directory,
+        verbosity=arguments.verbosity,
+        use_index=arguments.use_index,
+        max_workers=arguments.workers,
+    )
+
+
+def parse_entities(entities: List[str]) -> Dict[str, List[str]]:
+    """
+    Parse repeated *key=value* arguments, collecting repeated keys'
+    values as alternatives.
+    """
+    parsed = {}
+    for entity in entities:
+        key, separator, value = entity.partition("=")
+        if not separator or not key:
+            raise ValueError(INVALID_ENTITY.format(entity=entity))
+        parsed.setdefault(key, []).append(value)
+    return parsed
+
+
+def list_subjects(arguments: argparse.Namespace) -> Iterable[dict]:
+    subjects = sorted(load_derivative(arguments).subjects)
+    return ({"subject": subject} for subject in subjects)
+
+
+def list_sessions(arguments: argparse.Namespace) -> Iterable[dict]:
+    sessions = load_derivative(arguments).get_sessions()
+    return (
+        {"subject": subject, "session": session}
+        for subject, labels in sessions.items()
+        if not arguments.subject or subject in arguments.subject
+        for session in labels or [None]
+    )
+
+
+def list_files(arguments: argparse.Namespace) -> Iterable[dict]:
+    entities = parse_entities(arguments.entity)
+    paths = load_derivative(arguments).get_files(
+        subject=arguments.subject,
+        session=arguments.session,
+        datatype=arguments.datatype,
+        suffix=arguments.suffix,
+        extension=arguments.extension,
+        **entities,
+    )
+    return ({"path": str(path)} for path in paths)
+
+
+def validate(arguments: argparse.Namespace) -> Iterable[dict]:
+    from bids_derivatives.dataset.utils import DATASET_DESCRIPTION_VALIDATOR
+
+    # Missing keys are reported as rows rather than raised (see
+    # *BIDSDerivative.validate_dataset_description*).
+    description = load_derivative(arguments).dataset_description
+    content = DATASET_DESCRIPTION_VALIDATOR.query(description)
+    arguments.failed = not all(content["required"].values())
+    return (
+        {"severity": severity, "key": key, "present": present}
+        for severity, keys in content.items()
+        for key, present in keys.items()
+    )
+
+
+def check_completeness(arguments: argparse.Namespace) -> Iterable[dict]:
+    report = load_derivative(arguments).check_completeness()
+    arguments.failed = bool(report.missing)
+    statuses = {"missing": report.missing}
+    if arguments.extra:
+        statuses["extra"] = report.extra
+    return (
+        {
+            "subject": subject,
+            "session": session,
+            "status": status,
+            "name": name,
+        }
+        for status, rows in statuses.items()
+        for (subject, session), names in sorted(
+            rows.items(), key=lambda item: (item[0][0], item[0][1] or "")
+        )
+        for name in names
+    )
+
+
+#: Commands, by name: their help, output columns and row generators.
+COMMANDS = {
+    "subjects": ("List the subjects.", ["subject"], list_subjects),
+    "sessions": (
+        "List the subjects' sessions.",
+        ["subject", "session"],
+        list_sessions,
+    ),
+    "files": ("Query files by their BIDS entities.", ["path"], list_files),
+    "validate": (
+        "Validate the dataset description (exits with 1 if required keys "
+        "are missing).",
+        ["severity", "key", "present"],
+        validate,
+    ),
+    "completeness": (
+        "Report missing expected outputs (exits with 1 if any is missing).",
+        ["subject", "session", "status", "name"],
+        check_completeness,
+    ),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command-line parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="bids-derivatives", description=__doc__.split("\n\n")[0]
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "base_directory", help="the BIDS-App's derivatives directory"
+    )
+    common.add_argument(
+        "--format", choices=sorted(FORMATS), default="tsv", dest="format"
+    )
+    common.add_argument(
+        "--no-index",
+        action="store_false",
+        dest="use_index",
+        help="ignore the persistent index, even if it is up to date",
+    )
+    common.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of subjects to scan concurrently",
+    )
+    common.add_argument("--verbosity", default="error")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (description, _, _) in COMMANDS.items():
+        command = commands.add_parser(
+            name, parents=[common], help=description, description=description
+        )
+        if name in ("sessions", "files"):
+            command.add_argument(
+                "--subject", action="append", help="(repeatable)"
+            )
+        if name == "files":
+            command.add_argument("--session", action="append")
+            command.add_argument("--datatype", action="append")
+            command.add_argument("--suffix", action="append")
+            command.add_argument("--extension", action="append")
+            command.add_argument(
+                "--entity",
+                action="append",
+                default=[],
+                metavar="KEY=VALUE",
+                help="any other entity (repeatable)",
+            )
+        if name == "completeness":
+            command.add_argument(
+                "--extra",
+                action="store_true",
+                help="also report files no expected output accounts for",
+            )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command-line interface.
+
+    Parameters
+    ----------
+    argv : Optional[List[str]], optional
+        The command-line arguments, by default None (*sys.argv*).
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+    parser = build_parser()
+    arguments = parser.parse_args(argv)
+    arguments.failed = False
+    _, columns, command = COMMANDS[arguments.command]
+    try:
+        # Commands query eagerly and return lazy rows, so that errors are
+        # reported before any output.
+        rows = command(arguments)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        FORMATS[arguments.format](rows, columns, sys.stdout)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader exited early (e.g. piped into *head*); silence the
+        # error raised when flushing at exit.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    return int(arguments.failed)
@@ -0,0 +1,3 @@
+#: Command-line messages
+
+INVALID_ENTITY = "Invalid entity {entity!r}; expected a key=value pair."
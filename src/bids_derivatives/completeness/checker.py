@@ -0,0 +1,169 @@
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from bids_derivatives.completeness.messages import (
+    INVALID_LEVEL,
+    INVALID_OUTPUT,
+)
+from bids_derivatives.query.query import get_file_entities
+from bids_derivatives.utils.scanner import DerivativeScan
+
+#: Levels of expected outputs.
+LEVELS = ("subject", "session")
+
+#: Keys every expected output must specify, by which files are matched
+#: to candidate outputs in a single lookup.
+OUTPUT_KEYS = ("directory", "suffix", "extension")
+
+#: A subject's label and a session's label (None for subject-level).
+Row = Tuple[str, Optional[str]]
+
+
+class CompletenessReport(NamedTuple):
+    """
+    The expected outputs missing from a BIDS-App's derivatives, and the
+    files no expected output accounts for.
+    """
+
+    #: Names of the missing outputs, by (subject, session).
+    missing: Dict[Row, List[str]]
+    #: Relative paths of the unexpected files, by (subject, session).
+    extra: Dict[Row, List[str]]
+
+    @property
+    def incomplete_subjects(self) -> List[str]:
+        """
+        Get the subjects missing any expected output.
+        """
+        return sorted({subject for subject, _ in self.missing})
+
+    def is_complete(self, subject: str, session: str = None) -> bool:
+        """
+        Whether a subject (or one of its sessions) has all expected
+        outputs.
+        """
+        if session is not None:
+            return (subject, session) not in self.missing
+        return subject not in self.incomplete_subjects
+
+
+class CompletenessChecker:
+    """
+    A CompletenessChecker evaluates a specification of expected outputs
+    (see *bids_derivatives.completeness.specs*) against the files of a
+    BIDS-App's derivatives. Outputs are indexed by their directory,
+    suffix and extension, so that each file is matched with a single
+    lookup, in one pass over the files.
+    """
+
+    def __init__(self, spec: dict):
+        """
+        Initialize the CompletenessChecker class.
+
+        Parameters
+        ----------
+        spec : dict
+            The expected outputs, by level and name.
+
+        Raises
+        ------
+        ValueError
+            If the specification has unknown levels or underspecified
+            outputs.
+        """
+        self.spec = spec
+        self.outputs = {level: list(spec.get(level, {})) for level in LEVELS}
+        self._candidates = defaultdict(list)
+        for level, outputs in spec.items():
+            if level not in LEVELS:
+                raise ValueError(
+                    INVALID_LEVEL.format(level=level, levels=LEVELS)
+                )
+            for name, output in outputs.items():
+                if any(key not in output for key in OUTPUT_KEYS):
+                    raise ValueError(
+                        INVALID_OUTPUT.format(name=name, keys=OUTPUT_KEYS)
+                    )
+                key = (level, *(output[key] for key in OUTPUT_KEYS))
+                conditions = tuple(
+                    (entity, value)
+                    for entity, value in output.items()
+                    if entity not in OUTPUT_KEYS
+                )
+                self._candidates[key].append((name, conditions))
+
+    def match(
+        self, directory: str, entities: dict
+    ) -> Tuple[Optional[str], List[str]]:
+        """
+        Match a file to the expected outputs it provides.
+
+        Parameters
+        ----------
+        directory : str
+            The name of the file's directory (e.g. *anat*).
+        entities : dict
+            The file's entities.
+
+        Returns
+        -------
+        Tuple[Optional[str], List[str]]
+            The file's session (None for subject-level files), and the
+            names of the outputs it provides.
+        """
+        session = entities.get("session")
+        key = (
+            "session" if session is not None else "subject",
+            directory,
+            entities.get("suffix"),
+            entities.get("extension"),
+        )
+        return session, [
+            name
+            for name, conditions in self._candidates.get(key, ())
+            if all(
+                entities.get(entity) == value for entity, value in conditions
+            )
+        ]
+
+    def check(self, scan: DerivativeScan) -> CompletenessReport:
+        """
+        Check a single walk of the derivatives for the expected outputs.
+
+        Parameters
+        ----------
+        scan : DerivativeScan
+            The subjects, sessions and files of the derivatives.
+
+        Returns
+        -------
+        CompletenessReport
+            The missing outputs and unexpected files.
+        """
+        found, extra = defaultdict(set), defaultdict(list)
+        for file in scan.files:
+            if file.subject is None:
+                continue
+            entities = get_file_entities(
+                file.name, file.subject, file.session, file.datatype
+            )
+            session, outputs = self.match(
+                file.directory.rpartition("/")[2], entities
+            )
+            if outputs:
+                found[file.subject, session].update(outputs)
+            else:
+                extra[file.subject, session].append(file.path)
+        missing = {}
+        for subject, sessions in scan.subjects.items():
+            rows = [(None, "subject")]
+            rows += [(session, "session") for session in sessions]
+            for session, level in rows:
+                names = [
+                    name
+                    for name in self.outputs[level]
+                    if name not in found.get((subject, session), ())
+                ]
+                if names:
+                    missing[subject, session] = names
+        return CompletenessReport(missing, dict(extra))
@@ -0,0 +1,9 @@
+#: Completeness messages
+
+INVALID_OUTPUT = "Expected output {name} must specify its {keys}."
+
+INVALID_LEVEL = (
+    "Unknown level {level} of expected outputs; expected one of {levels}."
+)
+
+SPEC_MISSING = "No expected outputs are specified for {app}; pass a spec or use one of {apps}."
@@ -0,0 +1,116 @@
+"""
+Declarative specifications of the outputs BIDS-Apps are expected to
+produce for each subject and each session.
+
+A specification maps each level (*subject* or *session*) to named
+outputs, each described by the name of the directory holding it (e.g.
+*anat* or *figures*) and the entities of its file name. An entity given
+as None must be absent from the file's name (e.g. native-space outputs
+have no *space*). Files are matched to session-level outputs when their
+names carry a session.
+"""
+
+#: qsiprep's expected outputs (see *tests/data/derivatives/qsiprep*).
+QSIPREP_SPEC = {
+    "subject": {
+        "T1w": {
+            "directory": "anat",
+            "space": None,
+            "desc": "preproc",
+            "suffix": "T1w",
+            "extension": ".nii.gz",
+        },
+        "brain_mask": {
+            "directory": "anat",
+            "space": None,
+            "desc": "brain",
+            "suffix": "mask",
+            "extension": ".nii.gz",
+        },
+        "dseg": {
+            "directory": "anat",
+            "space": None,
+            "suffix": "dseg",
+            "extension": ".nii.gz",
+        },
+        **{
+            f"{label}_probseg": {
+                "directory": "anat",
+                "space": None,
+                "label": label,
+                "suffix": "probseg",
+                "extension": ".nii.gz",
+            }
+            for label in ("GM", "WM", "CSF")
+        },
+        "MNI_T1w": {
+            "directory": "anat",
+            "space": "MNI152NLin2009cAsym",
+            "desc": "preproc",
+            "suffix": "T1w",
+            "extension": ".nii.gz",
+        },
+        "T1w_to_MNI_xfm": {
+            "directory": "anat",
+            "from": "T1w",
+            "to": "MNI152NLin2009cAsym",
+            "suffix": "xfm",
+            "extension": ".h5",
+        },
+        "MNI_to_T1w_xfm": {
+            "directory": "anat",
+            "from": "MNI152NLin2009cAsym",
+            "to": "T1w",
+            "suffix": "xfm",
+            "extension": ".h5",
+        },
+        "t1_2_mni_figure": {
+            "directory": "figures",
+            "suffix": "mni",
+            "extension": ".svg",
+        },
+        "seg_brainmask_figure": {
+            "directory": "figures",
+            "suffix": "brainmask",
+            "extension": ".svg",
+        },
+    },
+    "session": {
+        **{
+            f"preproc_dwi{extension}": {
+                "directory": "dwi",
+                "space": "T1w",
+                "desc": "preproc",
+                "suffix": "dwi",
+                "extension": extension,
+            }
+            for extension in (".nii.gz", ".bval", ".bvec")
+        },
+        "dwi_brain_mask": {
+            "directory": "dwi",
+            "space": "T1w",
+            "desc": "brain",
+            "suffix": "mask",
+            "extension": ".nii.gz",
+        },
+        "dwiref": {
+            "directory": "dwi",
+            "space": "T1w",
+            "suffix": "dwiref",
+            "extension": ".nii.gz",
+        },
+        "confounds": {
+            "directory": "dwi",
+            "suffix": "confounds",
+            "extension": ".tsv",
+        },
+        "dwiqc": {
+            "directory": "dwi",
+            "suffix": "dwiqc",
+            "extension": ".json",
+        },
+    },
+}
+
+#: Expected outputs by BIDS-App.
+SPECS = {"qsiprep": QSIPREP_SPEC}
@@ -1 +1,8 @@
-from bids_derivatives.dataset.dataset import BIDSDerivative  # noqa: F401
+from bids_derivatives.utils.lazy import lazy_exports
+
+__all__, __getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "bids_derivatives.dataset.dataset": ["BIDSDerivative"],
+    },
+)
@@ -1,27 +1,94 @@
-import json
+import copy
+import fnmatch
+import logging
 from pathlib import Path
-from typing import Union
-
-from parse import parse
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
 
 from bids_derivatives.dataset.messages import (
     BASE_DIRECTORY_MISSING,
     DATASET_DESCRIPTION_MESSAGES,
 )
-from bids_derivatives.dataset.utils import query_dataset_description
+from bids_derivatives.dataset.utils import (
+    DATASET_DESCRIPTION_FILENAME,
+    DATASET_DESCRIPTION_VALIDATOR,
+    DESCRIPTION_LOADER,
+)
+from bids_derivatives.dataset.views import DerivativesView
 from bids_derivatives.derivative.derivative import SingleSubjectDerivative
+from bids_derivatives.index.index import SUBJECTS_DEPTH, DerivativeIndex
+from bids_derivatives.storage.base import Storage
+from bids_derivatives.storage.local import LOCAL_STORAGE
+from bids_derivatives.utils.cache import QueryCache
+from bids_derivatives.utils.instrumentation import (
+    Recorder,
+    instrument,
+    timed,
+)
 from bids_derivatives.utils.logs import set_logger
-from bids_derivatives.utils.templates.bids import SUBJECT_TEMPLATE
+from bids_derivatives.utils.scanner import (
+    DerivativeScan,
+    iter_labels,
+    scan_all_sessions,
+    scan_subjects,
+    walk_derivative,
+)
+from bids_derivatives.utils.templates.bids import (
+    SUBJECT_PATTERN,
+    SUBJECT_TEMPLATE,
+)
+
+# Features are imported by the methods using them, so that instantiating a
+# BIDSDerivative (e.g. to list its subjects) does not import them all.
+if TYPE_CHECKING:
+    from bids_derivatives.completeness.checker import CompletenessReport
+    from bids_derivatives.metadata.metadata import (
+        MetadataView,
+        SidecarResolver,
+    )
+    from bids_derivatives.metrics.metrics import MetricsTable
+    from bids_derivatives.nifti.header import HeaderSummary
+    from bids_derivatives.query.planner import TraversalPlan
+    from bids_derivatives.query.query import FileIndex
+    from bids_derivatives.snapshot.snapshot import Snapshot, SnapshotDiff
+    from bids_derivatives.verify.verify import (
+        HashCache,
+        VerificationReport,
+    )
 
 
 class BIDSDerivative:
     """
     A BIDSDerivative is a class that perform queries on the
     BIDS-App at a multiple-subjects level.
+
+    Query results are cached for as long as the base directory is not
+    modified. Changes deeper in the tree (e.g. a file added to a
+    subject's session) do not modify the base directory, so results
+    gathered from every subject (*file_index*, *derivatives* and the
+    metadata's sidecars) are only recomputed once :meth:`refresh` (or
+    :meth:`invalidate`) is called.
     """
 
     def __init__(
-        self, base_directory: Union[str, Path], verbosity: Union[str, int] = 0
+        self,
+        base_directory: Union[str, Path],
+        verbosity: Union[str, int] = 0,
+        use_index: bool = True,
+        cache_ttl: Optional[float] = None,
+        max_workers: int = 1,
+        backend: str = "thread",
+        logger: Optional[logging.Logger] = None,
+        storage: Optional[Storage] = None,
     ) -> None:
         """
         Initialize the BIDSDerivative class.
@@ -32,9 +99,48 @@ class BIDSDerivative:
             The base directory of the dataset.
         verbosity : Union[str, int], optional
             The verbosity level of the logger. The default is 0.
+        use_index : bool, optional
+            Whether to answer queries from the dataset's persistent index
+            (see :meth:`build_index`) when it exists and is up to date.
+            The default is True.
+        cache_ttl : Optional[float], optional
+            Number of seconds after which cached query results expire.
+            The default is None (results are only recomputed when the
+            base directory is modified or when invalidated; see
+            :meth:`refresh`).
+        max_workers : int, optional
+            The number of subjects to scan concurrently in whole-dataset
+            scans (see :meth:`walk` and :meth:`get_sessions`). The default
+            is 1 (sequential scans); None lets the executor decide.
+        backend : str, optional
+            The concurrent scans' executor, either *thread* or *process*.
+            The default is *thread*.
+        logger : Optional[logging.Logger], optional
+            A logger to share with other derivatives (e.g. those of a
+            *DerivativesWorkspace*), in which case *verbosity* is ignored.
+            The default is None (set up a logger of its own).
+        storage : Optional[Storage], optional
+            Where the derivatives are read from (e.g. a *TarStorage* of an
+            archive, in which *base_directory* is a path). The default is
+            None (the local filesystem). Persistent indexes are only used
+            for local derivatives.
         """
+        self.storage = storage or LOCAL_STORAGE
         self.base_directory = self.validate_base_directory(base_directory)
-        self.logger = set_logger(name=str(self), verbosity=verbosity)
+        self.logger = logger or set_logger(name=str(self), verbosity=verbosity)
+        self.use_index = use_index and self.storage.local
+        self.cache_ttl = cache_ttl
+        self.max_workers = max_workers
+        self.backend = backend
+        self.index = (
+            DerivativeIndex.load(self.base_directory)
+            if self.use_index
+            else None
+        )
+        self._cache = QueryCache(
+            ttl=cache_ttl, get_stamp=self.storage.get_stamp
+        )
+        self._hash_cache = None
 
     def __repr__(self) -> str:
         """
@@ -70,26 +176,31 @@ class BIDSDerivative:
             If the base directory is not a valid path.
         """
         base_directory = Path(base_directory)
-        if not base_directory.exists():
+        with timed("exists"):
+            exists = self.storage.exists(base_directory)
+        if not exists:
             raise ValueError(
                 BASE_DIRECTORY_MISSING.format(base_directory=base_directory)
             )
         return base_directory
 
-    def get_dataset_description(self) -> str:
+    def get_dataset_description(self) -> dict:
         """
-        Get the dataset description.
+        Get the dataset description (local descriptions are parsed at most
+        once per modification of their file; see *DESCRIPTION_LOADER*).
+        Each derivative gets its own copy of the loader's shared content.
         """
-        with open(self.dataset_description_path, "r") as f:
-            dataset_description = json.load(f)
-            f.close()
-        return dataset_description
+        if self.storage.local:
+            return copy.deepcopy(
+                DESCRIPTION_LOADER.load(self.dataset_description_path)
+            )
+        return self.storage.read_json(self.dataset_description_path)
 
     def validate_dataset_description(self):
         """
         Validate the dataset description.
         """
-        content = query_dataset_description(self.dataset_description)
+        content = DATASET_DESCRIPTION_VALIDATOR.query(self.dataset_description)
         for severity, keys in content.items():
             missing = [key for key, value in keys.items() if not value]
             if missing:
@@ -108,12 +219,9 @@ class BIDSDerivative:
         list
             The available subjects.
         """
-        return [
-            parse(SUBJECT_TEMPLATE, subject.name).named["subject"]
-            for subject in self.base_directory.glob(
-                SUBJECT_TEMPLATE.format(subject="*")
-            )
-        ]
+        if self.index is not None and self.index.is_fresh(""):
+            return self.index.get_subjects()
+        return scan_subjects(self.base_directory, self.storage)
 
     def get_derivatives(self) -> dict:
         """
@@ -125,28 +233,816 @@ class BIDSDerivative:
             A dictionary with keys being the subject labels and values
             being the SingleSubjectDerivative instances.
         """
-        derivatives = {}
-        for subject in self.get_available_subjects():
-            derivatives[subject] = SingleSubjectDerivative(
+        subjects = self.get_available_subjects()
+        return dict(zip(subjects, self.build_derivatives(subjects)))
+
+    def get_derivative(self, subject: str) -> SingleSubjectDerivative:
+        """
+        Instantiate a SingleSubjectDerivative for a single subject.
+
+        Parameters
+        ----------
+        subject : str
+            The subject's label, with or without the *sub-* prefix.
+
+        Returns
+        -------
+        SingleSubjectDerivative
+            The subject's derivative.
+        """
+        (derivative,) = SingleSubjectDerivative.from_labels(
+            self.base_directory,
+            [subject],
+            exists=True,
+            index=self.index,
+            cache_ttl=self.cache_ttl,
+            storage=self.storage,
+        )
+        return derivative
+
+    def build_derivatives(
+        self, subjects: List[str]
+    ) -> List[SingleSubjectDerivative]:
+        """
+        Instantiate the SingleSubjectDerivatives of several subjects,
+        skipping the validation of the (already validated) base directory
+        and labels.
+
+        Parameters
+        ----------
+        subjects : List[str]
+            The subjects' labels.
+
+        Returns
+        -------
+        List[SingleSubjectDerivative]
+            The subjects' derivatives.
+        """
+        return SingleSubjectDerivative.from_labels(
+            self.base_directory,
+            subjects,
+            exists=True,
+            index=self.index,
+            cache_ttl=self.cache_ttl,
+            storage=self.storage,
+            trusted=True,
+        )
+
+    def iter_subjects(
+        self, predicate: Callable[[str], bool] = None
+    ) -> Iterator[str]:
+        """
+        Yield the available subjects as the base directory is scanned.
+        Unlike *subjects*, labels are yielded in no particular order and
+        nothing is kept in memory, so iteration may be stopped early at no
+        additional cost.
+
+        Parameters
+        ----------
+        predicate : Callable[[str], bool], optional
+            A function selecting which subjects' labels to yield, by
+            default None (all subjects).
+
+        Yields
+        ------
+        str
+            The available subjects' labels.
+        """
+        if self.index is not None and self.index.is_fresh(""):
+            subjects = iter(self.index.get_subjects())
+        else:
+            subjects = iter_labels(
+                self.base_directory, SUBJECT_PATTERN, self.storage
+            )
+        for subject in subjects:
+            if predicate is None or predicate(subject):
+                yield subject
+
+    def iter_derivatives(
+        self, predicate: Callable[[str], bool] = None
+    ) -> Iterator[SingleSubjectDerivative]:
+        """
+        Yield a SingleSubjectDerivative for each subject as the base
+        directory is scanned.
+
+        Parameters
+        ----------
+        predicate : Callable[[str], bool], optional
+            A function selecting which subjects' labels to yield
+            derivatives for, by default None (all subjects).
+
+        Yields
+        ------
+        SingleSubjectDerivative
+            The available subjects' derivatives.
+        """
+        for subject in self.iter_subjects(predicate):
+            yield self.get_derivative(subject)
+
+    def walk(self, stat: bool = False) -> DerivativeScan:
+        """
+        Walk the dataset once, collecting its subjects, their sessions and
+        their files.
+
+        Parameters
+        ----------
+        stat : bool, optional
+            Whether to stat files for their size and modification time,
+            by default False
+
+        Returns
+        -------
+        DerivativeScan
+            The subjects (mapped to their sessions) and files found.
+        """
+        return walk_derivative(
+            self.base_directory,
+            stat=stat,
+            max_workers=self.max_workers,
+            backend=self.backend,
+            storage=self.storage,
+        )
+
+    def get_sessions(self) -> Dict[str, List[str]]:
+        """
+        Get the available sessions of every subject, scanning subjects
+        concurrently according to *max_workers* and *backend*.
+
+        Returns
+        -------
+        Dict[str, List[str]]
+            The sorted subjects' labels mapped to their sorted sessions.
+        """
+        subjects = sorted(self.subjects)
+        if self.index is not None and self.index.is_fresh(
+            "",
+            *(
+                SUBJECT_TEMPLATE.format(subject=subject)
+                for subject in subjects
+            ),
+        ):
+            sessions = self.index.get_all_sessions()
+            return {subject: sessions[subject] for subject in subjects}
+        return scan_all_sessions(
+            self.base_directory,
+            subjects,
+            max_workers=self.max_workers,
+            backend=self.backend,
+            storage=self.storage,
+        )
+
+    def build_file_index(self) -> "FileIndex":
+        """
+        Build an inverted index of the subjects' files by their entities,
+        from the persistent index when it is up to date (down to the
+        subjects' directories, see *SUBJECTS_DEPTH*), or from a single
+        walk otherwise.
+
+        Returns
+        -------
+        FileIndex
+            The subjects' files indexed by their entities.
+        """
+        from bids_derivatives.query.query import FileIndex
+
+        if self.index is not None and self.index.is_fresh(
+            max_depth=SUBJECTS_DEPTH
+        ):
+            return FileIndex.from_records(
+                record
+                for record in self.index.get_files()
+                if record["subject"] is not None
+            )
+        return FileIndex.from_scan(self.walk())
+
+    def get_files(
+        self,
+        subject: str = None,
+        session: str = None,
+        datatype: str = None,
+        suffix: str = None,
+        extension: str = None,
+        **entities: str,
+    ) -> List[Path]:
+        """
+        Query the subjects' files by their BIDS entities.
+        Each entity may be given a single value or a list of alternative
+        values; entities left as None are not filtered by.
+
+        Parameters
+        ----------
+        subject : str, optional
+            The subject's label, by default None
+        session : str, optional
+            The session's label, by default None
+        datatype : str, optional
+            The datatype (e.g. *anat*, *dwi*), by default None
+        suffix : str, optional
+            The suffix (e.g. *T1w*, *mask*), by default None
+        extension : str, optional
+            The extension (e.g. *.nii.gz*), by default None
+        **entities : str
+            Any other key-value entities (e.g. *space*, *desc*).
+
+        Returns
+        -------
+        List[Path]
+            The sorted paths of the matching files.
+        """
+        paths = self.query_paths(
+            subject=subject,
+            session=session,
+            datatype=datatype,
+            suffix=suffix,
+            extension=extension,
+            **entities,
+        )
+        return [self.base_directory / path for path in paths]
+
+    def plan_query(
+        self,
+        subject: str = None,
+        session: str = None,
+        datatype: str = None,
+        extension: str = None,
+    ) -> Optional["TraversalPlan"]:
+        """
+        Plan the traversal of a query's directories (see
+        :meth:`query_paths`).
+
+        Returns
+        -------
+        Optional[TraversalPlan]
+            The directories the query descends into, or None if it is
+            answered by the whole file index (i.e. it is already built,
+            or the query prunes no directory).
+        """
+        from bids_derivatives.query.planner import plan_traversal
+
+        if "file_index" in self._cache:
+            return None
+        plan = plan_traversal(subject, session, datatype, extension)
+        return plan if plan.is_narrow else None
+
+    def query_paths(
+        self,
+        subject: str = None,
+        session: str = None,
+        datatype: str = None,
+        suffix: str = None,
+        extension: str = None,
+        **entities: str,
+    ) -> List[str]:
+        """
+        Query the relative paths of the subjects' files by their BIDS
+        entities (see :meth:`get_files`). Queries filtering by subject,
+        session or datatype only walk the matching directories (see
+        :meth:`explain`), unless the whole file index is built already.
+
+        Returns
+        -------
+        List[str]
+            The sorted paths of the matching files, relative to the base
+            directory.
+        """
+        from bids_derivatives.query.planner import walk_plan
+        from bids_derivatives.query.query import FileIndex
+
+        plan = self.plan_query(subject, session, datatype, extension)
+        if plan is None:
+            file_index = self.file_index
+        else:
+            file_index = FileIndex.from_scan(
+                walk_plan(
+                    self.base_directory,
+                    plan,
+                    max_workers=self.max_workers,
+                    backend=self.backend,
+                    storage=self.storage,
+                )
+            )
+        return file_index.query(
+            subject=subject,
+            session=session,
+            datatype=datatype,
+            suffix=suffix,
+            extension=extension,
+            **entities,
+        )
+
+    def explain(
+        self,
+        subject: str = None,
+        session: str = None,
+        datatype: str = None,
+        extension: str = None,
+    ) -> str:
+        """
+        Describe how a query's files would be collected (see
+        :meth:`query_paths`); other entities only filter the files found.
+
+        Parameters
+        ----------
+        subject : str, optional
+            The subject's label, by default None
+        session : str, optional
+            The session's label, by default None
+        datatype : str, optional
+            The datatype (e.g. *anat*, *dwi*), by default None
+        extension : str, optional
+            The extension (e.g. *.nii.gz*), by default None
+
+        Returns
+        -------
+        str
+            The traversal plan, or the file index's source.
+        """
+        plan = self.plan_query(subject, session, datatype, extension)
+        if plan is not None:
+            return plan.explain()
+        if "file_index" in self._cache:
+            return "Querying the file index built earlier."
+        if self.index is not None and self.index.is_fresh(
+            max_depth=SUBJECTS_DEPTH
+        ):
+            return "Building the file index from the persistent index."
+        return "Building the file index from a walk of every subject."
+
+    def build_sidecar_resolver(self) -> "SidecarResolver":
+        """
+        Collect the sidecars of the subjects' files and of the base
+        directory, for their metadata to be resolved (see
+        :meth:`get_metadata`).
+        """
+        from bids_derivatives.metadata.metadata import (
+            SidecarResolver,
+            get_root_sidecars,
+        )
+
+        return SidecarResolver(
+            [
+                *get_root_sidecars(self.base_directory, self.storage),
+                *self.file_index.paths,
+            ]
+        )
+
+    def get_metadata(
+        self,
+        subject: str = None,
+        session: str = None,
+        datatype: str = None,
+        suffix: str = None,
+        extension: str = None,
+        prefetch: bool = False,
+        **entities: str,
+    ) -> "MetadataView":
+        """
+        Query the metadata of the subjects' files by their BIDS entities
+        (see :meth:`get_files`), merged from their JSON sidecars following
+        the BIDS inheritance principle. Sidecars are read lazily, as each
+        file's metadata is accessed, unless prefetched.
+
+        Parameters
+        ----------
+        subject : str, optional
+            The subject's label, by default None
+        session : str, optional
+            The session's label, by default None
+        datatype : str, optional
+            The datatype (e.g. *anat*, *dwi*), by default None
+        suffix : str, optional
+            The suffix (e.g. *dwiqc*), by default None
+        extension : str, optional
+            The extension (e.g. *.nii.gz*), by default None
+        prefetch : bool, optional
+            Whether to read every sidecar at once, concurrently according
+            to *max_workers*, by default False
+        **entities : str
+            Any other key-value entities (e.g. *space*, *desc*).
+
+        Returns
+        -------
+        MetadataView
+            The matching files' paths mapped to their metadata.
+        """
+        from bids_derivatives.metadata.metadata import MetadataView
+
+        resolver = self._cache.get(
+            "sidecar_resolver",
+            self.build_sidecar_resolver,
+            self.base_directory,
+        )
+        paths = self.file_index.query(
+            subject=subject,
+            session=session,
+            datatype=datatype,
+            suffix=suffix,
+            extension=extension,
+            **entities,
+        )
+        view = MetadataView(
+            self.base_directory,
+            {path: resolver.resolve(path) for path in paths},
+            storage=self.storage,
+        )
+        return view.prefetch(self.max_workers) if prefetch else view
+
+    def collect_metrics(
+        self,
+        pattern: str,
+        fields: Optional[Sequence[str]] = None,
+        max_workers: Optional[int] = None,
+        backend: Optional[str] = None,
+        **entities: str,
+    ) -> "MetricsTable":
+        """
+        Collect metrics (e.g. QC measures) from the JSON or TSV outputs of
+        every subject and session into a single array (requires numpy).
+
+        Parameters
+        ----------
+        pattern : str
+            A glob the files' names must match (e.g. ``*_dwiqc.json``).
+        fields : Optional[Sequence[str]], optional
+            The metrics to read: (nested, dot-separated) JSON fields or
+            TSV columns (averaged over rows). The default is None (every
+            numeric field of the first matching file).
+        max_workers : Optional[int], optional
+            The number of files to read concurrently. The default is None
+            (the derivative's *max_workers*).
+        backend : Optional[str], optional
+            The readers' executor, either *thread* or *process*. The
+            default is None (the derivative's *backend*).
+        **entities : str
+            Entities the files must match (see :meth:`get_files`).
+
+        Returns
+        -------
+        MetricsTable
+            A row per file, with its subject and session, and a column per
+            metric.
+        """
+        from bids_derivatives.metrics.metrics import collect_metrics
+
+        paths = [
+            path
+            for path in self.query_paths(**entities)
+            if fnmatch.fnmatchcase(path.rpartition("/")[2], pattern)
+        ]
+        return collect_metrics(
+            self.base_directory,
+            paths,
+            fields,
+            max_workers=max_workers or self.max_workers,
+            backend=backend or self.backend,
+            storage=self.storage,
+        )
+
+    def inspect_headers(
+        self,
+        subject: str = None,
+        session: str = None,
+        datatype: str = None,
+        suffix: str = None,
+        extension: str = None,
+        max_workers: Optional[int] = None,
+        **entities: str,
+    ) -> "HeaderSummary":
+        """
+        Read the shapes, voxel sizes and affines of the subjects' NIfTI
+        images from their headers only (decompressing just the start of
+        gzipped images), e.g. to catch resampling errors across subjects
+        (requires numpy). Headers of local images are cached by path,
+        size and modification time.
+
+        Parameters
+        ----------
+        subject : str, optional
+            The subject's label, by default None
+        session : str, optional
+            The session's label, by default None
+        datatype : str, optional
+            The datatype (e.g. *anat*, *dwi*), by default None
+        suffix : str, optional
+            The suffix (e.g. *T1w*, *mask*, *probseg*), by default None
+        extension : str, optional
+            Either *.nii.gz* or *.nii*, by default None (both).
+        max_workers : Optional[int], optional
+            The number of headers to read concurrently (in threads). The
+            default is None (the derivative's *max_workers*).
+        **entities : str
+            Any other key-value entities (e.g. *space*, *desc*).
+
+        Returns
+        -------
+        HeaderSummary
+            A row per image, with its subject and session, and its
+            geometry as arrays.
+        """
+        from bids_derivatives.nifti.header import (
+            NIFTI_EXTENSIONS,
+            inspect_headers,
+        )
+
+        paths = self.query_paths(
+            subject=subject,
+            session=session,
+            datatype=datatype,
+            suffix=suffix,
+            extension=extension,
+            **entities,
+        )
+        return inspect_headers(
+            self.base_directory,
+            [path for path in paths if path.endswith(NIFTI_EXTENSIONS)],
+            max_workers=max_workers or self.max_workers,
+            storage=self.storage,
+        )
+
+    def check_completeness(self, spec: dict = None) -> "CompletenessReport":
+        """
+        Check every subject and session for the outputs the BIDS-App is
+        expected to produce, in a single walk.
+
+        Parameters
+        ----------
+        spec : dict, optional
+            The expected outputs (see
+            *bids_derivatives.completeness.specs*), by default None (the
+            specification of the BIDS-App named after the base
+            directory).
+
+        Returns
+        -------
+        CompletenessReport
+            The missing outputs and unexpected files.
+
+        Raises
+        ------
+        ValueError
+            If no spec is given and none exists for the BIDS-App.
+        """
+        from bids_derivatives.completeness.checker import CompletenessChecker
+        from bids_derivatives.completeness.messages import SPEC_MISSING
+        from bids_derivatives.completeness.specs import SPECS
+
+        if spec is None:
+            spec = SPECS.get(self.base_directory.name.lower())
+            if spec is None:
+                raise ValueError(
+                    SPEC_MISSING.format(
+                        app=self.base_directory.name, apps=sorted(SPECS)
+                    )
+                )
+        return CompletenessChecker(spec).check(self.walk())
+
+    def get_hash_cache(self) -> "HashCache":
+        """
+        Get the instance's in-memory cache of the files' digests, shared
+        by :meth:`snapshot` and :meth:`verify`.
+        """
+        from bids_derivatives.verify.verify import HashCache
+
+        if self._hash_cache is None:
+            self._hash_cache = HashCache()
+        return self._hash_cache
+
+    def snapshot(self, hashes: bool = False) -> "Snapshot":
+        """
+        Take a snapshot of the subjects' files, to be compared with later
+        states of the dataset (see :meth:`diff`).
+
+        Parameters
+        ----------
+        hashes : bool, optional
+            Whether to hash the files' contents, so that modifications are
+            detected by content rather than by modification time, by
+            default False. Files are hashed concurrently and their digests
+            cached, as by :meth:`verify`.
+
+        Returns
+        -------
+        Snapshot
+            The dataset's snapshot.
+        """
+        from bids_derivatives.snapshot.snapshot import Snapshot
+
+        return Snapshot.from_scan(
+            self.walk(stat=True),
+            self.base_directory,
+            hashes=hashes,
+            storage=self.storage,
+            cache=self.get_hash_cache() if hashes else None,
+            max_workers=self.max_workers,
+            backend=self.backend,
+        )
+
+    def diff(self, snapshot: "Snapshot") -> "SnapshotDiff":
+        """
+        Compute the changes made to the dataset since a snapshot was
+        taken (hashing files only if the snapshot has hashes).
+
+        Parameters
+        ----------
+        snapshot : Snapshot
+            The earlier snapshot (e.g. loaded with *Snapshot.load*).
+
+        Returns
+        -------
+        SnapshotDiff
+            The changed files, sessions and subjects.
+        """
+        from bids_derivatives.snapshot.snapshot import diff_snapshots
+
+        return diff_snapshots(
+            snapshot, self.snapshot(hashes=snapshot.hashes is not None)
+        )
+
+    def verify(
+        self,
+        max_workers: Optional[int] = None,
+        backend: Optional[str] = None,
+        cache: Union[bool, str, Path] = True,
+    ) -> "VerificationReport":
+        """
+        Hash the subjects' files and check their integrity (e.g. truncated
+        gzip streams), reporting corrupt and changed files by subject.
+        Digests are cached by path, size and modification time, so that
+        unchanged files are not hashed again. The derivatives are never
+        written to: digests are cached in memory, unless a database is
+        given to persist them in (e.g. in a user cache directory).
+
+        Parameters
+        ----------
+        max_workers : Optional[int], optional
+            The number of files to hash concurrently. The default is None
+            (the derivative's *max_workers*).
+        backend : Optional[str], optional
+            The hashing executor, either *thread* or *process*. The
+            default is None (the derivative's *backend*).
+        cache : Union[bool, str, Path], optional
+            Whether to reuse and update the instance's cached digests, or
+            the path of a database to cache them in. The default is True.
+
+        Returns
+        -------
+        VerificationReport
+            The files' digests, and the corrupt and changed files.
+        """
+        from bids_derivatives.verify.verify import HashCache, verify_scan
+
+        hash_cache = None
+        if isinstance(cache, (str, Path)):
+            hash_cache = HashCache(cache)
+        elif cache:
+            hash_cache = self.get_hash_cache()
+        try:
+            return verify_scan(
+                self.walk(stat=True),
+                self.base_directory,
+                cache=hash_cache,
+                max_workers=max_workers or self.max_workers,
+                backend=backend or self.backend,
+                storage=self.storage,
+            )
+        finally:
+            if hash_cache is not None and hash_cache.path is not None:
+                hash_cache.close()
+
+    def to_table(self, stat: bool = True):
+        """
+        Build a columnar inventory of the subjects' files from a single
+        walk (requires pyarrow).
+
+        Parameters
+        ----------
+        stat : bool, optional
+            Whether to stat files for their size and modification time,
+            by default True
+
+        Returns
+        -------
+        pyarrow.Table
+            A row per file, with its location, entities, size and
+            modification time as (dictionary-encoded) columns.
+        """
+        from bids_derivatives.export.table import scan_to_table
+
+        return scan_to_table(self.walk(stat=stat))
+
+    def to_parquet(self, path: Union[str, Path], stat: bool = True) -> Path:
+        """
+        Write the subjects' files' inventory (see :meth:`to_table`) to a
+        Parquet file, to be reloaded with
+        :func:`bids_derivatives.export.read_table`.
+        """
+        from bids_derivatives.export.table import write_parquet
+
+        return write_parquet(self.to_table(stat=stat), path)
+
+    def instrument(self, label: str = None) -> ContextManager[Recorder]:
+        """
+        Count and time the filesystem calls and parsing steps of the
+        queries made within a block, logging them at DEBUG level on exit.
+
+        Parameters
+        ----------
+        label : str, optional
+            A name for the recorded queries (e.g. a subject's label), by
+            default None
+
+        Returns
+        -------
+        ContextManager[Recorder]
+            A context manager yielding the block's recorder.
+
+        Examples
+        --------
+        >>> with derivative.instrument("subjects") as recorder:
+        ...     derivative.subjects  # doctest: +SKIP
+        >>> recorder.as_dict()  # doctest: +SKIP
+        {'stat': {'count': 1, 'seconds': 1.2e-05}, ...}
+        """
+        return instrument(label or str(self), logger=self.logger)
+
+    def invalidate(self, *names: str):
+        """
+        Drop cached query results, so that they are recomputed on their
+        next access.
+
+        Parameters
+        ----------
+        *names : str
+            The names of the results to drop (*dataset_description*,
+            *subjects*, *derivatives*, *file_index* or *sidecar_resolver*);
+            all results are dropped if none are given.
+        """
+        self._cache.invalidate(*names)
+
+    def refresh(self):
+        """
+        Drop all cached query results and reload the persistent index,
+        picking up any changes made to the dataset. Required once files
+        were added, removed or modified within the subjects' directories,
+        which cached results are not stamped by.
+        """
+        self.invalidate()
+        self.index = (
+            DerivativeIndex.load(self.base_directory)
+            if self.use_index
+            else None
+        )
+
+    def build_index(self) -> DerivativeIndex:
+        """
+        Build a persistent index of the dataset's files, or incrementally
+        refresh the existing one.
+
+        Returns
+        -------
+        DerivativeIndex
+            The dataset's index.
+
+        Raises
+        ------
+        ValueError
+            If the derivatives are not on the local filesystem.
+        """
+        from bids_derivatives.index.messages import (
+            INDEX_REFRESHED,
+            INDEX_UNSUPPORTED,
+        )
+
+        if not self.storage.local:
+            raise ValueError(INDEX_UNSUPPORTED.format(storage=self.storage))
+        index = self.index or DerivativeIndex(self.base_directory)
+        num_directories = index.refresh()
+        self.logger.info(
+            INDEX_REFRESHED.format(
                 base_directory=self.base_directory,
-                participant_label=subject,
-                exists=True,
+                num_directories=num_directories,
             )
-        return derivatives
+        )
+        self.index = index
+        return index
 
     @property
     def dataset_description_path(self) -> Path:
         """
         Get the path to the dataset description file.
         """
-        return self.base_directory / "dataset_description.json"
+        return self.base_directory / DATASET_DESCRIPTION_FILENAME
 
     @property
     def dataset_description(self) -> dict:
         """
         Get the dataset description.
         """
-        return self.get_dataset_description()
+        return self._cache.get(
+            "dataset_description",
+            self.get_dataset_description,
+            self.dataset_description_path,
+        )
 
     @property
     def analysis_title(self) -> str:
@@ -160,11 +1056,28 @@ class BIDSDerivative:
         """
         Get the available subjects.
         """
-        return self.get_available_subjects()
+        return self._cache.get(
+            "subjects", self.get_available_subjects, self.base_directory
+        )
+
+    @property
+    def derivatives(self) -> DerivativesView:
+        """
+        Get the available subjects' SingleSubjectDerivatives, each
+        instantiated on first access.
+        """
+        return self._cache.get(
+            "derivatives",
+            lambda: DerivativesView(self.subjects, self.get_derivative),
+            self.base_directory,
+        )
 
     @property
-    def derivatives(self) -> dict:
+    def file_index(self) -> "FileIndex":
         """
-        Get the available subjects' SingleSubjectDerivatives.
+        Get the subjects' files indexed by their entities (kept until the
+        base directory is modified; see :meth:`refresh`).
         """
-        return self.get_derivatives()
+        return self._cache.get(
+            "file_index", self.build_file_index, self.base_directory
+        )
@@ -1,4 +1,13 @@
 from collections import defaultdict
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+from bids_derivatives.utils.concurrency import map_ordered
+from bids_derivatives.utils.serialization import JSONLoader
+from bids_derivatives.utils.templates.bids import (  # noqa: F401
+    DATASET_DESCRIPTION_FILENAME,
+)
 
 DATASET_DESCRIPTION_KEYS = {
     "required": ["Name", "BIDSVersion"],
@@ -41,8 +50,172 @@ def query_dataset_description(
         Dictionary of keys and values describing
         existence in the dataset description.
     """
+    if dataset_description_keys is DATASET_DESCRIPTION_KEYS:
+        return DATASET_DESCRIPTION_VALIDATOR.query(dataset_description)
     query = defaultdict(dict)
     for requirement, keys in dataset_description_keys.items():
         for key in keys:
             query[requirement][key] = key in dataset_description
     return query
+
+
+class DescriptionValidator:
+    """
+    A DescriptionValidator checks dataset descriptions for a fixed set of
+    keys, flattened once into (severity, key) pairs so that checking a
+    description is a single pass over them.
+    """
+
+    def __init__(
+        self, dataset_description_keys: dict = DATASET_DESCRIPTION_KEYS
+    ):
+        """
+        Initialize the DescriptionValidator class.
+
+        Parameters
+        ----------
+        dataset_description_keys : dict, optional
+            Keys to check, by severity, by default DATASET_DESCRIPTION_KEYS
+        """
+        self.severities = tuple(dataset_description_keys)
+        self.checks = tuple(
+            (severity, key)
+            for severity, keys in dataset_description_keys.items()
+            for key in keys
+        )
+
+    def query(self, dataset_description: dict) -> dict:
+        """
+        Query the existence of the keys in a dataset description.
+
+        Parameters
+        ----------
+        dataset_description : dict
+            The dataset description.
+
+        Returns
+        -------
+        dict
+            Dictionary of keys and values describing existence in the
+            dataset description, by severity.
+        """
+        query = defaultdict(dict)
+        for severity in self.severities:
+            query[severity] = {}
+        for severity, key in self.checks:
+            query[severity][key] = key in dataset_description
+        return query
+
+    def get_missing(self, dataset_description: dict) -> Dict[str, List[str]]:
+        """
+        List the keys missing from a dataset description.
+
+        Parameters
+        ----------
+        dataset_description : dict
+            The dataset description.
+
+        Returns
+        -------
+        Dict[str, List[str]]
+            The missing keys, by severity (severities with no missing keys
+            are omitted).
+        """
+        missing = {}
+        for severity, key in self.checks:
+            if key not in dataset_description:
+                missing.setdefault(severity, []).append(key)
+        return missing
+
+
+#: Shared loader and validator of dataset descriptions.
+DESCRIPTION_LOADER = JSONLoader()
+DATASET_DESCRIPTION_VALIDATOR = DescriptionValidator()
+
+
+class DescriptionReport(NamedTuple):
+    """
+    The result of validating a single derivatives directory's dataset
+    description.
+    """
+
+    base_directory: Path
+    #: The missing keys, by severity.
+    missing: Dict[str, List[str]]
+    #: Why the description could not be read, if it could not.
+    error: Optional[str] = None
+
+    @property
+    def valid(self) -> bool:
+        """
+        Whether the description was read and has all required keys.
+        """
+        return self.error is None and "required" not in self.missing
+
+
+def validate_description(
+    base_directory: Union[str, Path],
+    validator: DescriptionValidator = DATASET_DESCRIPTION_VALIDATOR,
+) -> DescriptionReport:
+    """
+    Validate a single derivatives directory's dataset description.
+    """
+    base_directory = Path(base_directory)
+    try:
+        description = DESCRIPTION_LOADER.load(
+            base_directory / DATASET_DESCRIPTION_FILENAME
+        )
+    except (OSError, ValueError) as e:
+        return DescriptionReport(
+            base_directory, {}, f"{type(e).__name__}: {e}"
+        )
+    return DescriptionReport(
+        base_directory, validator.get_missing(description)
+    )
+
+
+def validate_descriptions(
+    base_directories: Iterable[Union[str, Path]],
+    validator: DescriptionValidator = DATASET_DESCRIPTION_VALIDATOR,
+    max_workers: int = 1,
+) -> Dict[str, object]:
+    """
+    Validate the dataset descriptions of several derivatives directories
+    (e.g. per-app and per-site roots) in a single call.
+
+    Parameters
+    ----------
+    base_directories : Iterable[Union[str, Path]]
+        The derivatives directories.
+    validator : DescriptionValidator, optional
+        The validator to check descriptions with, by default
+        DATASET_DESCRIPTION_VALIDATOR
+    max_workers : int, optional
+        The number of descriptions to read concurrently, by default 1
+
+    Returns
+    -------
+    Dict[str, object]
+        The per-directory *reports*, the *invalid* directories, and the
+        *missing* keys (by severity) mapped to the directories missing
+        them.
+    """
+    reports = map_ordered(
+        partial(validate_description, validator=validator),
+        list(base_directories),
+        max_workers=max_workers,
+    )
+    missing = {severity: {} for severity in validator.severities}
+    for report in reports:
+        for severity, keys in report.missing.items():
+            for key in keys:
+                missing[severity].setdefault(key, []).append(
+                    report.base_directory
+                )
+    return {
+        "reports": reports,
+        "invalid": [
+            report.base_directory for report in reports if not report.valid
+        ],
+        "missing": missing,
+    }
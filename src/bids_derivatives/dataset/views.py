@@ -0,0 +1,51 @@
+from collections.abc import Mapping
+from typing import Callable, Iterator, Sequence
+
+from bids_derivatives.derivative.derivative import SingleSubjectDerivative
+
+
+class DerivativesView(Mapping):
+    """
+    A DerivativesView is a read-only mapping of subject labels to their
+    SingleSubjectDerivative, each instantiated only once it is accessed.
+    """
+
+    def __init__(
+        self,
+        subjects: Sequence[str],
+        factory: Callable[[str], SingleSubjectDerivative],
+    ):
+        """
+        Initialize the DerivativesView class.
+
+        Parameters
+        ----------
+        subjects : Sequence[str]
+            The available subjects' labels.
+        factory : Callable[[str], SingleSubjectDerivative]
+            A function instantiating a single subject's derivative.
+        """
+        self._subjects = subjects
+        self._labels = frozenset(subjects)
+        self._factory = factory
+        self._derivatives = {}
+
+    def __getitem__(self, subject: str) -> SingleSubjectDerivative:
+        if subject not in self._labels:
+            raise KeyError(subject)
+        derivative = self._derivatives.get(subject)
+        if derivative is None:
+            derivative = self._derivatives[subject] = self._factory(subject)
+        return derivative
+
+    def __contains__(self, subject: object) -> bool:
+        return subject in self._labels
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._subjects)
+
+    def __len__(self) -> int:
+        return len(self._subjects)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self._subjects)})"
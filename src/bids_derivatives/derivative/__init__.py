@@ -1,3 +1,8 @@
-from bids_derivatives.derivative.derivative import (  # noqa: F401
-    SingleSubjectDerivative,
+from bids_derivatives.utils.lazy import lazy_exports
+
+__all__, __getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "bids_derivatives.derivative.derivative": ["SingleSubjectDerivative"],
+    },
 )
@@ -1,14 +1,50 @@
 from pathlib import Path
-from typing import Union
-
-from parse import parse
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple, Union
 
 from bids_derivatives.derivative.messages import (
     PARTICIPANT_COULD_NOT_BE_DETERMINED,
     PARTICIPANT_MISMATCH,
     PARTICIPANT_MISSING,
 )
-from bids_derivatives.utils.templates import SESSION_TEMPLATE, SUBJECT_TEMPLATE
+from bids_derivatives.storage.base import Storage
+from bids_derivatives.storage.local import LOCAL_STORAGE
+from bids_derivatives.utils.cache import QueryCache
+from bids_derivatives.utils.instrumentation import timed
+from bids_derivatives.utils.records import intern
+from bids_derivatives.utils.scanner import (
+    DerivativeScan,
+    match_label,
+    scan_sessions,
+    walk_subject,
+)
+from bids_derivatives.utils.templates import SUBJECT_PATTERN, SUBJECT_TEMPLATE
+
+if TYPE_CHECKING:
+    from bids_derivatives.index.index import DerivativeIndex
+    from bids_derivatives.metadata.metadata import (
+        MetadataView,
+        SidecarResolver,
+    )
+    from bids_derivatives.query.query import FileIndex
+
+
+def parse_subject_label(name: str) -> Optional[str]:
+    """
+    Get the label of a subject's name (e.g. *1* for *sub-1*), or None if
+    it is not one.
+
+    Names are matched with the compiled *SUBJECT_PATTERN*. Only names it
+    rejects but which *parse* may accept (i.e. a differently cased
+    prefix) fall back to the *SUBJECT_TEMPLATE*, importing *parse* on
+    first use.
+    """
+    label = match_label(SUBJECT_PATTERN, name)
+    if label is not None or name[:4].lower() != SUBJECT_TEMPLATE[:4]:
+        return label
+    from parse import parse
+
+    parser = parse(SUBJECT_TEMPLATE, name)
+    return parser.named.get("subject") if parser else None
 
 
 class SingleSubjectDerivative:
@@ -22,12 +58,130 @@ class SingleSubjectDerivative:
         base_directory: Union[str, Path],
         participant_label: str = None,
         exists: bool = True,
+        index: "DerivativeIndex" = None,
+        cache_ttl: Optional[float] = None,
+        storage: Optional[Storage] = None,
     ):
         self.participant_label = self.validate_participant_label(
             participant_label
         )
-        self.base_directory = self.validate_base_directory(base_directory)
+        # Validating the base directory may infer the participant's label.
+        base_directory = self.validate_base_directory(base_directory)
+        self.initialize(
+            self.participant_label,
+            base_directory,
+            exists=exists,
+            index=index,
+            cache_ttl=cache_ttl,
+            storage=storage,
+        )
+
+    def initialize(
+        self,
+        participant_label: str,
+        base_directory: Path,
+        exists: bool = True,
+        index: "DerivativeIndex" = None,
+        cache_ttl: Optional[float] = None,
+        storage: Optional[Storage] = None,
+    ):
+        """
+        Set the instance's attributes from a validated participant label
+        and base directory (see :meth:`__init__` and :meth:`from_labels`).
+        """
+        self.participant_label = participant_label
+        self.base_directory = base_directory
         self.exists = exists
+        self.index = index
+        self.storage = storage or LOCAL_STORAGE
+        self._cache = QueryCache(
+            ttl=cache_ttl, get_stamp=self.storage.get_stamp
+        )
+
+    @classmethod
+    def from_labels(
+        cls,
+        base_directory: Union[str, Path],
+        participant_labels: Iterable[str],
+        exists: bool = True,
+        index: "DerivativeIndex" = None,
+        cache_ttl: Optional[float] = None,
+        storage: Optional[Storage] = None,
+        trusted: bool = False,
+    ) -> List["SingleSubjectDerivative"]:
+        """
+        Instantiate the derivatives of several subjects of the same
+        BIDS-App at once. Labels are normalized as by :meth:`__init__`
+        (see :func:`parse_subject_label`) and the base directory is
+        validated once for the whole batch, with the instances sharing it.
+
+        Parameters
+        ----------
+        base_directory : Union[str, Path]
+            The base directory of the BIDS-App.
+        participant_labels : Iterable[str]
+            The participants' labels, with or without the *sub-* prefix.
+        exists : bool, optional
+            Whether the participants must exist, by default True
+        index : DerivativeIndex, optional
+            The BIDS-App's persistent index, by default None
+        cache_ttl : Optional[float], optional
+            Number of seconds after which cached query results expire, by
+            default None
+        storage : Optional[Storage], optional
+            Where the derivatives are read from, by default None (the
+            local filesystem).
+        trusted : bool, optional
+            Whether *base_directory* and *participant_labels* come from a
+            BIDSDerivative (i.e. a validated base directory and labels
+            without prefixes), in which case they are used as is, by
+            default False
+
+        Returns
+        -------
+        List[SingleSubjectDerivative]
+            The participants' derivatives, in the order of their labels.
+
+        Raises
+        ------
+        ValueError
+            If the base directory is a participant's directory that does
+            not match one of the labels.
+        """
+        if trusted:
+            labels = [intern(label) for label in participant_labels]
+        else:
+            base_directory = Path(base_directory)
+            with timed("parse"):
+                labels = [
+                    intern(parse_subject_label(label) or label)
+                    for label in participant_labels
+                ]
+                base_label = parse_subject_label(base_directory.name)
+            if base_label is not None:
+                for label in labels:
+                    if label != base_label:
+                        raise ValueError(
+                            PARTICIPANT_MISMATCH.format(
+                                participant_label=label,
+                                base_dir_name=base_label,
+                            )
+                        )
+                base_directory = base_directory.parent
+        storage = storage or LOCAL_STORAGE
+        derivatives = []
+        for label in labels:
+            derivative = cls.__new__(cls)
+            derivative.initialize(
+                label,
+                base_directory,
+                exists=exists,
+                index=index,
+                cache_ttl=cache_ttl,
+                storage=storage,
+            )
+            derivatives.append(derivative)
+        return derivatives
 
     def get_participant_path(self):
         """
@@ -36,26 +190,35 @@ class SingleSubjectDerivative:
         result = self.base_directory / SUBJECT_TEMPLATE.format(
             subject=self.participant_label
         )
-        if not result.exists() and self.exists:
-            raise ValueError(
-                PARTICIPANT_MISSING.format(
-                    participant_label=self.participant_label,
-                    base_directory=self.base_directory,
-                )
-            )
+        with timed("exists"):
+            exists = self.storage.exists(result)
+        if not exists and self.exists:
+            self.raise_participant_missing()
         return result
 
+    def raise_participant_missing(self):
+        """
+        Raise an error for a participant missing from the base directory.
+        """
+        raise ValueError(
+            PARTICIPANT_MISSING.format(
+                participant_label=self.participant_label,
+                base_directory=self.base_directory,
+            )
+        )
+
     def validate_participant_label(self, participant_label: str):
         """
         Validate the participant label.
         """
         if participant_label is not None:
-            parser = parse(SUBJECT_TEMPLATE, participant_label)
-            if parser:
-                participant_label = parser.named.get("subject")
+            with timed("parse"):
+                label = parse_subject_label(participant_label)
+            if label is not None:
+                participant_label = label
             else:
                 pass  # Keep participant label as is.
-        return participant_label
+        return intern(participant_label)
 
     def validate_base_directory(self, base_dir: Union[Path, str]):
         """
@@ -81,7 +244,9 @@ class SingleSubjectDerivative:
             and participant label inferred by it does not match the one
             given as input.
         """
-        base_dir = Path(base_dir)
+        # Reuse a given Path, so that subjects instantiated by a
+        # BIDSDerivative share its base directory.
+        base_dir = base_dir if isinstance(base_dir, Path) else Path(base_dir)
         base_dir_name = base_dir.name
         root_directory_at_participant = (
             self.validate_base_dir_participant_mismatch(base_dir_name)
@@ -112,10 +277,11 @@ class SingleSubjectDerivative:
         ValueError
             _description_
         """
-        parser = parse(SUBJECT_TEMPLATE, base_dir_name)
+        with timed("parse"):
+            label = parse_subject_label(base_dir_name)
         if self.participant_label is not None:
-            if parser:
-                participant_label = parser.named.get("subject")
+            if label is not None:
+                participant_label = label
                 if self.participant_label != participant_label:
                     raise ValueError(
                         PARTICIPANT_MISMATCH.format(
@@ -124,29 +290,130 @@ class SingleSubjectDerivative:
                         )
                     )
         else:
-            if parser:
-                self.participant_label = parser.named.get("subject")
+            if label is not None:
+                self.participant_label = intern(label)
             else:
                 raise ValueError(PARTICIPANT_COULD_NOT_BE_DETERMINED)
-        return parser
+        return label is not None
 
     def get_available_sessions(self):
         """
         Query the participant's derivatives directory for available sessions.
         """
-        sessions = []
-        for session in self.path.iterdir():
-            parser = parse(SESSION_TEMPLATE, session.name)
-            if parser:
-                sessions.append(parser.named.get("session"))
-        return list(set(sessions))
+        subject_directory = SUBJECT_TEMPLATE.format(
+            subject=self.participant_label
+        )
+        if self.index is not None and self.index.is_fresh(subject_directory):
+            return self.index.get_sessions(self.participant_label)
+        try:
+            return scan_sessions(
+                self.base_directory / subject_directory, self.storage
+            )
+        except FileNotFoundError:
+            if self.exists:
+                self.raise_participant_missing()
+            raise
+
+    def build_file_index(self) -> Tuple["FileIndex", "SidecarResolver"]:
+        """
+        Walk the participant's derivatives directory once, indexing its
+        files by their entities and collecting their sidecars (along with
+        those of the base directory).
+        """
+        from bids_derivatives.metadata.metadata import (
+            SidecarResolver,
+            get_root_sidecars,
+        )
+        from bids_derivatives.query.query import FileIndex
+
+        _, files = walk_subject(
+            self.base_directory,
+            SUBJECT_TEMPLATE.format(subject=self.participant_label),
+            storage=self.storage,
+        )
+        index = FileIndex.from_scan(DerivativeScan({}, files))
+        resolver = SidecarResolver(
+            [
+                *get_root_sidecars(self.base_directory, self.storage),
+                *index.paths,
+            ]
+        )
+        return index, resolver
+
+    def get_metadata(
+        self,
+        session: str = None,
+        datatype: str = None,
+        suffix: str = None,
+        extension: str = None,
+        prefetch: bool = False,
+        **entities: str,
+    ) -> "MetadataView":
+        """
+        Query the metadata of the participant's files by their BIDS
+        entities, merged from their JSON sidecars following the BIDS
+        inheritance principle. Sidecars are read lazily, as each file's
+        metadata is accessed, unless prefetched.
+
+        Parameters
+        ----------
+        session : str, optional
+            The session's label, by default None
+        datatype : str, optional
+            The datatype (e.g. *anat*, *dwi*), by default None
+        suffix : str, optional
+            The suffix (e.g. *dwiqc*), by default None
+        extension : str, optional
+            The extension (e.g. *.json*), by default None
+        prefetch : bool, optional
+            Whether to read every sidecar at once, concurrently, by default
+            False
+        **entities : str
+            Any other key-value entities (e.g. *space*, *desc*).
+
+        Returns
+        -------
+        MetadataView
+            The matching files' paths mapped to their metadata.
+        """
+        from bids_derivatives.metadata.metadata import MetadataView
+
+        index, resolver = self._cache.get(
+            "file_index", self.build_file_index, self.path
+        )
+        paths = index.query(
+            session=session,
+            datatype=datatype,
+            suffix=suffix,
+            extension=extension,
+            **entities,
+        )
+        view = MetadataView(
+            self.base_directory,
+            {path: resolver.resolve(path) for path in paths},
+            storage=self.storage,
+        )
+        return view.prefetch() if prefetch else view
+
+    def invalidate(self, *names: str):
+        """
+        Drop cached query results, so that they are recomputed on their
+        next access.
+
+        Parameters
+        ----------
+        *names : str
+            The names of the results to drop (*path*, *sessions* or
+            *file_index*); all results are dropped if none are given.
+        """
+        self._cache.invalidate(*names)
 
     @property
     def path(self):
         """
         Get the path to the participant's derivatives directory.
         """
-        return self.get_participant_path()
+        return self._cache.get("path", self.get_participant_path)
 
     @property
     def analysis_title(self) -> str:
@@ -160,4 +427,9 @@ class SingleSubjectDerivative:
         """
         Get the available sessions.
         """
-        return self.get_available_sessions()
+        return self._cache.get(
+            "sessions",
+            self.get_available_sessions,
+            self.base_directory
+            / SUBJECT_TEMPLATE.format(subject=self.participant_label),
+        )
@@ -0,0 +1,3 @@
+#: Export messages
+
+PYARROW_MISSING = "Exporting tables requires pyarrow; install it with `pip install bids_derivatives[arrow]`."
@@ -0,0 +1,145 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from bids_derivatives.export.messages import PYARROW_MISSING
+from bids_derivatives.utils.entities import parse_entities
+from bids_derivatives.utils.scanner import DerivativeScan
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow
+
+#: Leading columns of inventory tables; entity columns follow, sorted.
+LOCATION_COLUMNS = (
+    "directory",
+    "name",
+    "subject",
+    "session",
+    "datatype",
+    "suffix",
+    "extension",
+)
+
+#: Columns filled from the files' records; the other location columns
+#: are taken from the files' names when they have these entities.
+RECORD_COLUMNS = ("directory", "name", "subject", "session", "datatype")
+
+#: Trailing columns of inventory tables, filled when files were stat-ed.
+STAT_COLUMNS = ("size", "mtime_ns")
+
+#: Prefix of the columns of entities named like a column that is not an
+#: entity (entity keys never hold underscores, so prefixed names are free).
+ENTITY_PREFIX = "entity_"
+
+#: Columns that entities are kept out of.
+RESERVED_COLUMNS = frozenset(("directory", "name") + STAT_COLUMNS)
+
+
+def require_pyarrow():
+    """
+    Import pyarrow (only once a table is needed, as it is slow to import).
+
+    Raises
+    ------
+    ImportError
+        If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(PYARROW_MISSING) from e
+    return pyarrow
+
+
+def scan_to_table(scan: DerivativeScan) -> "pyarrow.Table":
+    """
+    Build a columnar inventory of the files of a derivatives walk, with a
+    row per file and a column per entity. String columns are dictionary
+    encoded, so that repeated values (subjects, datatypes, suffixes...)
+    are stored once.
+
+    Parameters
+    ----------
+    scan : DerivativeScan
+        The result of walking the derivatives (see
+        :meth:`BIDSDerivative.walk`).
+
+    Returns
+    -------
+    pyarrow.Table
+        The files' inventory; entities a file does not have are null.
+        Subjects, sessions and datatypes are the ones of the files' names,
+        falling back to their directories'. Entities named like another
+        column (e.g. *size*) are prefixed with *ENTITY_PREFIX*.
+    """
+    pyarrow = require_pyarrow()
+    files = scan.files
+    num_files = len(files)
+    columns = {
+        column: [getattr(file, column) for file in files]
+        for column in RECORD_COLUMNS
+    }
+    for row, file in enumerate(files):
+        for entity, value in parse_entities(file.name).items():
+            if entity in RESERVED_COLUMNS:
+                entity = ENTITY_PREFIX + entity
+            column = columns.get(entity)
+            if column is None:
+                column = columns[entity] = [None] * num_files
+            column[row] = value
+    for column in LOCATION_COLUMNS:
+        columns.setdefault(column, [None] * num_files)
+    names = list(LOCATION_COLUMNS) + sorted(
+        set(columns).difference(LOCATION_COLUMNS)
+    )
+    arrays = [
+        pyarrow.array(columns[name], pyarrow.string()).dictionary_encode()
+        for name in names
+    ]
+    for name in STAT_COLUMNS:
+        names.append(name)
+        arrays.append(
+            pyarrow.array(
+                [getattr(file, name) for file in files], pyarrow.int64()
+            )
+        )
+    return pyarrow.table(arrays, names=names)
+
+
+def write_parquet(table: "pyarrow.Table", path: Union[str, Path]) -> Path:
+    """
+    Write an inventory table to a Parquet file.
+    """
+    pyarrow = require_pyarrow()
+    pyarrow.parquet.write_table(table, str(path))
+    return Path(path)
+
+
+def read_table(
+    path: Union[str, Path], columns: Optional[List[str]] = None
+) -> "pyarrow.Table":
+    """
+    Read an inventory table back from a Parquet file.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The Parquet file.
+    columns : Optional[List[str]], optional
+        The columns to read, by default None (all).
+
+    Returns
+    -------
+    pyarrow.Table
+        The inventory, with its string columns dictionary encoded.
+    """
+    pyarrow = require_pyarrow()
+    schema = pyarrow.parquet.read_schema(str(path))
+    dictionaries = [
+        field.name
+        for field in schema
+        if pyarrow.types.is_dictionary(field.type)
+    ]
+    return pyarrow.parquet.read_table(
+        str(path), columns=columns, read_dictionary=dictionaries
+    )
@@ -0,0 +1,501 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from bids_derivatives.index.messages import INDEX_MISSING
+from bids_derivatives.utils.cache import RACY_WINDOW
+from bids_derivatives.utils.entities import parse_entities
+from bids_derivatives.utils.instrumentation import timed
+from bids_derivatives.utils.scanner import match_label, scan_directory
+from bids_derivatives.utils.templates.bids import (
+    DATATYPES,
+    SESSION_PATTERN,
+    SUBJECT_PATTERN,
+    SUBJECT_TEMPLATE,
+)
+
+if TYPE_CHECKING:
+    import sqlite3
+
+#: Name of the directory (under the derivatives' root) holding the index.
+INDEX_DIRECTORY = ".bids_derivatives"
+INDEX_FILENAME = "index.sqlite3"
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    subject TEXT,
+    session TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    subject TEXT,
+    session TEXT,
+    datatype TEXT,
+    entities TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+CREATE INDEX IF NOT EXISTS files_directory ON files (directory);
+CREATE INDEX IF NOT EXISTS files_subject ON files (subject, session);
+"""
+#: The depth down to which whole-dataset queries check the index's
+#: directories: the base directory's and the subjects'. Deeper changes
+#: (e.g. a file added to a session's datatype directory) are picked up by
+#: :meth:`DerivativeIndex.refresh`.
+SUBJECTS_DEPTH = 1
+
+#: The maximal number of directories selected by a single statement (older
+#: SQLite versions bind at most 999 parameters).
+MAX_PARAMETERS = 500
+
+FILE_COLUMNS = (
+    "path",
+    "subject",
+    "session",
+    "datatype",
+    "entities",
+    "size",
+    "mtime_ns",
+)
+
+
+class DerivativeIndex:
+    """
+    A DerivativeIndex is a persistent, on-disk record of every file
+    within a BIDS-App's derivatives directory, along with its parsed
+    entities, size and modification time.
+    """
+
+    def __init__(self, base_directory: Union[str, Path]):
+        """
+        Initialize the DerivativeIndex class.
+
+        Parameters
+        ----------
+        base_directory : Union[str, Path]
+            The base directory of the BIDS-App's derivatives.
+        """
+        self.base_directory = Path(base_directory)
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.base_directory.name} derivatives index"
+
+    def __getstate__(self) -> dict:
+        # Connections and locks are per process (see *connect*).
+        return {"base_directory": self.base_directory}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state["base_directory"])
+
+    @classmethod
+    def load(
+        cls, base_directory: Union[str, Path]
+    ) -> Optional["DerivativeIndex"]:
+        """
+        Load an existing index of a BIDS-App's derivatives.
+
+        Parameters
+        ----------
+        base_directory : Union[str, Path]
+            The base directory of the BIDS-App's derivatives.
+
+        Returns
+        -------
+        Optional[DerivativeIndex]
+            The index, or None if no index was built for *base_directory*.
+        """
+        index = cls(base_directory)
+        return index if index.exists else None
+
+    @contextmanager
+    def connect(self):
+        """
+        Open a connection to the index, committing on successful exit.
+        The connection is opened once per instance, then reused by later
+        calls, one thread at a time.
+        """
+        with self._lock, timed("sqlite"):
+            if self._connection is None:
+                # Only queries answered by the index import sqlite3.
+                import sqlite3
+
+                self._connection = sqlite3.connect(
+                    str(self.path), check_same_thread=False
+                )
+            with self._connection:
+                yield self._connection
+
+    def close(self):
+        """
+        Close the index's connection, if it was opened.
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def refresh(self) -> int:
+        """
+        Build the index, or incrementally update an existing one.
+        Only directories whose modification time changed since the last
+        refresh are rescanned; the rest are checked with a single stat.
+
+        Returns
+        -------
+        int
+            The number of directories that were rescanned.
+        """
+        self.path.parent.mkdir(exist_ok=True)
+        with self.connect() as connection:
+            # Queries only ever read indexes built here.
+            connection.executescript(INDEX_SCHEMA)
+            known = dict(
+                connection.execute("SELECT path, mtime_ns FROM directories")
+            )
+            children = defaultdict(list)
+            for parent, path in connection.execute(
+                "SELECT parent, path FROM directories WHERE parent NOT NULL"
+            ):
+                children[parent].append(path)
+            seen, rescanned, stack = set(), 0, [""]
+            while stack:
+                directory = stack.pop()
+                try:
+                    mtime_ns = os.stat(self.get_path(directory)).st_mtime_ns
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+                seen.add(directory)
+                if known.get(directory) == mtime_ns:
+                    stack.extend(children[directory])
+                    continue
+                stack.extend(
+                    self.scan_directory(connection, directory, mtime_ns)
+                )
+                rescanned += 1
+            for directory in set(known) - seen:
+                connection.execute(
+                    "DELETE FROM directories WHERE path = ?", (directory,)
+                )
+                connection.execute(
+                    "DELETE FROM files WHERE directory = ?", (directory,)
+                )
+        return rescanned
+
+    def scan_directory(
+        self, connection: "sqlite3.Connection", directory: str, mtime_ns: int
+    ) -> List[str]:
+        """
+        Replace the index's records of a single directory's files.
+
+        Parameters
+        ----------
+        connection : sqlite3.Connection
+            An open connection to the index.
+        directory : str
+            The directory's path, relative to the base directory.
+        mtime_ns : int
+            The directory's modification time, as stat-ed before scanning.
+
+        Returns
+        -------
+        List[str]
+            The relative paths of the directory's sub-directories.
+        """
+        subject, session = self.locate(directory)
+        parts = directory.split("/")
+        datatype = parts[-1] if parts[-1] in DATATYPES else None
+        names, entries = scan_directory(self.get_path(directory), stat=True)
+        prefix = f"{directory}/" if directory else ""
+        subdirectories = [
+            prefix + name for name in names if prefix + name != INDEX_DIRECTORY
+        ]
+        files = [
+            (
+                prefix + name,
+                directory,
+                subject,
+                session,
+                datatype,
+                json.dumps(parse_entities(name)),
+                stat.st_size,
+                stat.st_mtime_ns,
+            )
+            for name, stat in entries
+        ]
+        if time.time_ns() - mtime_ns < RACY_WINDOW:
+            mtime_ns = 0
+        parent = directory.rpartition("/")[0] if directory else None
+        connection.execute(
+            "DELETE FROM files WHERE directory = ?", (directory,)
+        )
+        connection.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", files
+        )
+        connection.execute(
+            "INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?)",
+            (directory, parent, subject, session, mtime_ns),
+        )
+        return subdirectories
+
+    def locate(self, directory: str) -> tuple:
+        """
+        Infer the subject and session a directory belongs to.
+
+        Parameters
+        ----------
+        directory : str
+            The directory's path, relative to the base directory.
+
+        Returns
+        -------
+        tuple
+            The subject and session labels (None where not applicable).
+        """
+        parts = directory.split("/")
+        subject = match_label(SUBJECT_PATTERN, parts[0])
+        if subject is None or len(parts) == 1:
+            return subject, None
+        return subject, match_label(SESSION_PATTERN, parts[1])
+
+    def is_fresh(
+        self, *directories: str, max_depth: Optional[int] = None
+    ) -> bool:
+        """
+        Check whether the index is up to date with the filesystem, with a
+        single stat per checked directory.
+
+        Parameters
+        ----------
+        *directories : str
+            The directories (relative to the base directory) to check; all
+            indexed directories are checked if none are given.
+        max_depth : Optional[int], optional
+            The depth down to which indexed directories are checked when
+            none are given (0 for the base directory, 1 for the subjects',
+            see *SUBJECTS_DEPTH*), by default None (every directory).
+
+        Returns
+        -------
+        bool
+            True if the index exists and none of the checked directories
+            were modified since they were last scanned.
+        """
+        if not self.exists:
+            return False
+        with self.connect() as connection:
+            records = self.get_directory_stamps(
+                connection, directories, max_depth
+            )
+        if directories and len(records) < len(set(directories)):
+            return False
+        if not records:
+            return False
+        # Plain strings are joined much faster than paths are built.
+        base_directory = str(self.base_directory)
+        for path, mtime_ns in records.items():
+            try:
+                stat = os.stat(os.path.join(base_directory, path))
+                if stat.st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def get_directory_stamps(
+        self,
+        connection: "sqlite3.Connection",
+        directories: tuple,
+        max_depth: Optional[int] = None,
+    ) -> dict:
+        """
+        Get the recorded modification times of some (or all) directories.
+
+        Parameters
+        ----------
+        connection : sqlite3.Connection
+            An open connection to the index.
+        directories : tuple
+            The directories' relative paths; all directories' (down to
+            *max_depth*) are selected if empty.
+        max_depth : Optional[int], optional
+            The depth of the deepest directories selected when none are
+            given, by default None (any depth).
+
+        Returns
+        -------
+        dict
+            The indexed directories among them, mapped to their
+            modification times.
+        """
+        statement = "SELECT path, mtime_ns FROM directories"
+        if not directories and max_depth is None:
+            return dict(connection.execute(statement))
+        if not directories:
+            # A directory's depth is its number of separators, plus one
+            # (but for the base directory).
+            return dict(
+                connection.execute(
+                    f"{statement} WHERE path = '' OR "
+                    "length(path) - length(replace(path, '/', '')) < ?",
+                    (max_depth,),
+                )
+            )
+        directories = sorted(set(directories))
+        records = {}
+        for start in range(0, len(directories), MAX_PARAMETERS):
+            end = start + MAX_PARAMETERS
+            chunk = directories[start:end]
+            placeholders = ", ".join("?" * len(chunk))
+            records.update(
+                connection.execute(
+                    f"{statement} WHERE path IN ({placeholders})", chunk
+                )
+            )
+        return records
+
+    def get_subjects(self) -> list:
+        """
+        Get the indexed subjects.
+
+        Returns
+        -------
+        list
+            The labels of the subjects' directories.
+        """
+        return self.query(
+            "SELECT subject FROM directories "
+            "WHERE parent = '' AND subject NOT NULL ORDER BY subject"
+        )
+
+    def get_sessions(self, subject: str) -> list:
+        """
+        Get the indexed sessions of a single subject.
+
+        Parameters
+        ----------
+        subject : str
+            The subject's label.
+
+        Returns
+        -------
+        list
+            The labels of the subject's sessions' directories.
+        """
+        return self.query(
+            "SELECT session FROM directories "
+            "WHERE parent = ? AND session NOT NULL ORDER BY session",
+            (SUBJECT_TEMPLATE.format(subject=subject),),
+        )
+
+    def get_all_sessions(self) -> dict:
+        """
+        Get the indexed sessions of every subject.
+
+        Returns
+        -------
+        dict
+            The subjects' labels mapped to the labels of their sessions'
+            directories.
+        """
+        self.assert_exists()
+        sessions = {}
+        with self.connect() as connection:
+            # Subjects' directories are selected along with their sessions'.
+            for subject, session in connection.execute(
+                "SELECT subject, session FROM directories "
+                "WHERE subject NOT NULL AND (parent = '' OR "
+                "(session NOT NULL AND instr(parent, '/') = 0)) "
+                "ORDER BY subject, session"
+            ):
+                subject_sessions = sessions.setdefault(subject, [])
+                if session is not None:
+                    subject_sessions.append(session)
+        return sessions
+
+    def get_files(self, subject: str = None, session: str = None) -> list:
+        """
+        Get the indexed files, optionally of a single subject or session.
+
+        Parameters
+        ----------
+        subject : str, optional
+            A subject's label, by default None
+        session : str, optional
+            A session's label, by default None
+
+        Returns
+        -------
+        list
+            Dictionaries describing each file's relative path, subject,
+            session, datatype, entities, size and modification time.
+        """
+        conditions, parameters = [], []
+        for column, value in (("subject", subject), ("session", session)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        self.assert_exists()
+        with self.connect() as connection:
+            records = connection.execute(
+                f"SELECT {', '.join(FILE_COLUMNS)} FROM files{where} "
+                "ORDER BY path",
+                parameters,
+            ).fetchall()
+        files = []
+        for record in records:
+            file = dict(zip(FILE_COLUMNS, record))
+            file["entities"] = json.loads(file["entities"])
+            files.append(file)
+        return files
+
+    def query(self, statement: str, parameters: tuple = ()) -> list:
+        """
+        Query a single column from the index.
+        """
+        self.assert_exists()
+        with self.connect() as connection:
+            return [
+                value for value, in connection.execute(statement, parameters)
+            ]
+
+    def assert_exists(self):
+        """
+        Raise an error if the index was not built yet.
+        """
+        if not self.exists:
+            raise ValueError(
+                INDEX_MISSING.format(base_directory=self.base_directory)
+            )
+
+    def get_path(self, directory: str) -> Path:
+        """
+        Get the absolute path of an indexed directory.
+        """
+        return self.base_directory / directory
+
+    @property
+    def path(self) -> Path:
+        """
+        Get the path to the index file.
+        """
+        return self.base_directory / INDEX_DIRECTORY / INDEX_FILENAME
+
+    @property
+    def exists(self) -> bool:
+        """
+        Check whether the index was built.
+        """
+        return self.path.exists()
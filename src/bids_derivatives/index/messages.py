@@ -0,0 +1,7 @@
+#: DerivativeIndex messages
+
+INDEX_MISSING = "No index exists for {base_directory}. Build one with DerivativeIndex.refresh()."
+
+INDEX_REFRESHED = "Refreshed index of {base_directory}: rescanned {num_directories} directories."
+
+INDEX_UNSUPPORTED = "Persistent indexes are only supported for local derivatives, not {storage}."
@@ -0,0 +1,289 @@
+from collections import defaultdict
+from collections.abc import Mapping
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from bids_derivatives.utils.concurrency import map_ordered
+from bids_derivatives.utils.entities import parse_entities
+from bids_derivatives.utils.scanner import get_scanner
+from bids_derivatives.utils.serialization import JSONLoader
+from bids_derivatives.utils.templates.bids import DATASET_DESCRIPTION_FILENAME
+
+if TYPE_CHECKING:
+    from bids_derivatives.storage.base import Storage
+
+#: Extension of metadata sidecars.
+SIDECAR_EXTENSION = ".json"
+
+#: Shared loader of local sidecars, bounded by count and by total size.
+SIDECAR_LOADER = JSONLoader(maxsize=8192, maxbytes=64 * 2**20)
+
+#: A sidecar's suffix and (key, value) entities.
+SidecarKey = Tuple[Optional[str], FrozenSet[Tuple[str, str]]]
+
+
+def is_sidecar(name: str) -> bool:
+    """
+    Whether a file is a JSON sidecar (i.e. not a dataset description).
+    """
+    return (
+        name.endswith(SIDECAR_EXTENSION)
+        and name != DATASET_DESCRIPTION_FILENAME
+    )
+
+
+def get_root_sidecars(
+    base_directory: Union[str, Path], storage: "Storage" = None
+) -> List[str]:
+    """
+    List the sidecars directly under the derivatives' base directory,
+    which apply to every subject.
+    """
+    _, files = get_scanner(storage)(base_directory)
+    return [name for name, _ in files if is_sidecar(name)]
+
+
+def get_sidecar_key(name: str) -> SidecarKey:
+    """
+    Get the suffix and the key-value entities of a file name, by which
+    sidecars are matched to the files they apply to.
+    """
+    entities = parse_entities(name)
+    suffix = entities.pop("suffix", None)
+    entities.pop("extension", None)
+    return suffix, frozenset(entities.items())
+
+
+class SidecarResolver:
+    """
+    A SidecarResolver applies the BIDS inheritance principle: a file's
+    metadata is read from every sidecar with its suffix and a subset of
+    its entities, in its directory or any parent directory, the nearest
+    and most specific sidecars taking precedence.
+
+    The sidecars applicable within each directory are collected once, from
+    its parent's, so that resolving a file only filters its directory's.
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        """
+        Initialize the SidecarResolver class.
+
+        Parameters
+        ----------
+        paths : Iterable[str]
+            The relative paths of the derivatives' files (sidecars among
+            them).
+        """
+        self._sidecars = defaultdict(list)
+        for path in paths:
+            directory, _, name = path.rpartition("/")
+            if is_sidecar(name):
+                self._sidecars[directory].append(
+                    (*get_sidecar_key(name), path)
+                )
+        self._chains = {}
+
+    def get_chain(self, directory: str) -> List[Tuple]:
+        """
+        Get the sidecars applicable within a directory, from the lowest
+        precedence to the highest.
+
+        Parameters
+        ----------
+        directory : str
+            The directory, relative to the derivatives' base directory
+            (empty for the base directory itself).
+
+        Returns
+        -------
+        List[Tuple]
+            The sidecars' suffixes, entities and relative paths.
+        """
+        chain = self._chains.get(directory)
+        if chain is None:
+            inherited = (
+                self.get_chain(directory.rpartition("/")[0])
+                if directory
+                else []
+            )
+            own = sorted(
+                self._sidecars.get(directory, ()),
+                key=lambda sidecar: (len(sidecar[1]), sidecar[2]),
+            )
+            chain = self._chains[directory] = inherited + own
+        return chain
+
+    def resolve(self, path: str) -> List[str]:
+        """
+        Get the sidecars of a file, from the lowest precedence to the
+        highest.
+
+        Parameters
+        ----------
+        path : str
+            The file's path, relative to the derivatives' base directory.
+
+        Returns
+        -------
+        List[str]
+            The relative paths of the file's sidecars.
+        """
+        directory, _, name = path.rpartition("/")
+        chain = self.get_chain(directory)
+        if not chain:
+            return []
+        suffix, entities = get_sidecar_key(name)
+        return [
+            sidecar
+            for sidecar_suffix, sidecar_entities, sidecar in chain
+            if sidecar_suffix == suffix and sidecar_entities <= entities
+        ]
+
+
+def read_sidecar(
+    path: Path, storage: "Storage" = None
+) -> Tuple[dict, Optional[str]]:
+    """
+    Read a sidecar, through *SIDECAR_LOADER* for local files.
+
+    Returns
+    -------
+    Tuple[dict, Optional[str]]
+        The sidecar's content (empty if it could not be read), and why it
+        could not be read, if it could not.
+    """
+    try:
+        if storage is None or storage.local:
+            content = SIDECAR_LOADER.load(path)
+        else:
+            content = storage.read_json(path)
+    except (OSError, ValueError) as e:
+        return {}, f"{type(e).__name__}: {e}"
+    if not isinstance(content, dict):
+        return {}, f"Expected a JSON object, got {type(content).__name__}."
+    return content, None
+
+
+class MetadataView(Mapping):
+    """
+    A MetadataView is a read-only mapping of files to their metadata,
+    merged from their sidecars (see *SidecarResolver*). Sidecars are only
+    read once a file's metadata is accessed, or in bulk (and concurrently)
+    by :meth:`prefetch`, and each is read at most once per view.
+    """
+
+    def __init__(
+        self,
+        base_directory: Union[str, Path],
+        sidecars: Dict[str, List[str]],
+        storage: "Storage" = None,
+    ):
+        """
+        Initialize the MetadataView class.
+
+        Parameters
+        ----------
+        base_directory : Union[str, Path]
+            The derivatives' base directory.
+        sidecars : Dict[str, List[str]]
+            The files' relative paths mapped to their sidecars' (see
+            :meth:`SidecarResolver.resolve`).
+        storage : Storage, optional
+            The storage to read sidecars from, by default None (the local
+            filesystem).
+        """
+        self.base_directory = Path(base_directory)
+        self.storage = storage
+        self._sidecars = sidecars
+        self._paths = {self.base_directory / path: path for path in sidecars}
+        self._contents = {}
+        #: Why sidecars could not be read, by relative path.
+        self.errors = {}
+
+    def __getitem__(self, path: Union[str, Path]) -> dict:
+        relative = self._paths.get(Path(path))
+        if relative is None:
+            raise KeyError(path)
+        metadata = {}
+        for sidecar in self._sidecars[relative]:
+            if sidecar not in self._contents:
+                self.store(
+                    sidecar,
+                    read_sidecar(self.base_directory / sidecar, self.storage),
+                )
+            metadata.update(self._contents[sidecar])
+        return metadata
+
+    def __iter__(self) -> Iterator[Path]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} files)"
+
+    def store(self, sidecar: str, result: Tuple[dict, Optional[str]]):
+        """
+        Keep a sidecar's content (see :func:`read_sidecar`).
+        """
+        content, error = result
+        self._contents[sidecar] = content
+        if error is not None:
+            self.errors[sidecar] = error
+
+    def prefetch(self, max_workers: Optional[int] = None) -> "MetadataView":
+        """
+        Read every sidecar not read yet, concurrently.
+
+        Parameters
+        ----------
+        max_workers : Optional[int], optional
+            The number of sidecars to read concurrently, by default None
+            (let the executor decide).
+
+        Returns
+        -------
+        MetadataView
+            The view itself.
+        """
+        pending = sorted(
+            {
+                sidecar
+                for sidecars in self._sidecars.values()
+                for sidecar in sidecars
+            }.difference(self._contents)
+        )
+        results = map_ordered(
+            partial(read_sidecar, storage=self.storage),
+            [self.base_directory / sidecar for sidecar in pending],
+            max_workers=max_workers,
+        )
+        for sidecar, result in zip(pending, results):
+            self.store(sidecar, result)
+        return self
+
+    def get_sidecars(self, path: Union[str, Path]) -> List[Path]:
+        """
+        Get the sidecars a file's metadata is merged from, from the lowest
+        precedence to the highest.
+        """
+        relative = self._paths.get(Path(path))
+        if relative is None:
+            raise KeyError(path)
+        return [
+            self.base_directory / sidecar
+            for sidecar in self._sidecars[relative]
+        ]
@@ -0,0 +1,3 @@
+#: Metrics messages
+
+DUPLICATE_ROWS = "Several files hold the metrics of subject {subject} (session {session}); narrow the pattern or entities to one file per session."
@@ -0,0 +1,359 @@
+import io
+import math
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from bids_derivatives.metrics.messages import DUPLICATE_ROWS
+from bids_derivatives.utils.arrays import require_numpy
+from bids_derivatives.utils.concurrency import map_ordered
+from bids_derivatives.utils.scanner import locate
+from bids_derivatives.utils.serialization import read_json
+
+if TYPE_CHECKING:
+    import numpy
+
+    from bids_derivatives.storage.base import Storage
+
+#: Separator of the keys (or list indices) of nested JSON fields.
+FIELD_SEPARATOR = "."
+
+#: Values parsed as missing in TSV files (as in BIDS tabular files).
+MISSING_VALUES = frozenset({"", "n/a", "N/A", "nan", "NaN"})
+
+
+def to_float(value) -> float:
+    """
+    Convert a metric's value to a float (NaN if it is not numeric).
+    """
+    if isinstance(value, str) and value in MISSING_VALUES:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def get_field(content, field: str):
+    """
+    Get a (possibly nested) field of a JSON document, e.g.
+    *subjects.0.fd_mean* (None if it is missing).
+    """
+    value = content
+    for key in field.split(FIELD_SEPARATOR):
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif (
+            isinstance(value, list) and key.isdigit() and int(key) < len(value)
+        ):
+            value = value[int(key)]
+        else:
+            return None
+    return value
+
+
+def iter_json_fields(content, prefix: str = "") -> Iterator[str]:
+    """
+    Yield the (nested) fields of a JSON document holding numeric values.
+    """
+    if isinstance(content, dict):
+        items = content.items()
+    elif isinstance(content, list):
+        items = ((str(index), value) for index, value in enumerate(content))
+    else:
+        if isinstance(content, (int, float)):
+            yield prefix
+        return
+    for key, value in items:
+        field = f"{prefix}{FIELD_SEPARATOR}{key}" if prefix else key
+        yield from iter_json_fields(value, field)
+
+
+def load_json(path: Union[str, Path], storage: "Storage" = None):
+    """
+    Read a JSON file, from the local filesystem or from a storage.
+    """
+    if storage is None or storage.local:
+        return read_json(path)
+    return storage.read_json(path)
+
+
+def open_text(path: Union[str, Path], storage: "Storage" = None) -> TextIO:
+    """
+    Open a text file, from the local filesystem or from a storage.
+    """
+    if storage is None or storage.local:
+        return open(path, "r")
+    return io.TextIOWrapper(storage.open(path))
+
+
+def read_json_metrics(
+    path: Union[str, Path], fields: Sequence[str], storage: "Storage" = None
+) -> Tuple[float, ...]:
+    """
+    Read the selected fields of a JSON file.
+    """
+    content = load_json(path, storage)
+    return tuple(to_float(get_field(content, field)) for field in fields)
+
+
+def discover_json_fields(
+    path: Union[str, Path], storage: "Storage" = None
+) -> List[str]:
+    """
+    List the (nested) fields of a JSON file holding numeric values.
+    """
+    return list(iter_json_fields(load_json(path, storage)))
+
+
+def read_tsv_metrics(
+    path: Union[str, Path], fields: Sequence[str], storage: "Storage" = None
+) -> Tuple[float, ...]:
+    """
+    Read the selected columns of a TSV file, averaged over its rows
+    (ignoring missing values), one line at a time.
+    """
+    with open_text(path, storage) as f:
+        header = f.readline().rstrip("\n").split("\t")
+        columns = [
+            (i, header.index(field))
+            for i, field in enumerate(fields)
+            if field in header
+        ]
+        sums, counts = [0.0] * len(fields), [0] * len(fields)
+        for line in f:
+            values = line.rstrip("\n").split("\t")
+            for i, column in columns:
+                value = (
+                    to_float(values[column])
+                    if column < len(values)
+                    else math.nan
+                )
+                if not math.isnan(value):
+                    sums[i] += value
+                    counts[i] += 1
+    return tuple(
+        total / count if count else math.nan
+        for total, count in zip(sums, counts)
+    )
+
+
+def discover_tsv_fields(
+    path: Union[str, Path], storage: "Storage" = None
+) -> List[str]:
+    """
+    List the columns of a TSV file whose first row is numeric.
+    """
+    with open_text(path, storage) as f:
+        header = f.readline().rstrip("\n").split("\t")
+        row = f.readline().rstrip("\n").split("\t")
+    return [
+        field
+        for field, value in zip(header, row)
+        if value in MISSING_VALUES or not math.isnan(to_float(value))
+    ]
+
+
+#: Metric readers and field discovery, by file extension.
+READERS: Dict[str, Tuple[Callable, Callable]] = {
+    ".json": (read_json_metrics, discover_json_fields),
+    ".tsv": (read_tsv_metrics, discover_tsv_fields),
+}
+
+
+def get_extension(path: str) -> str:
+    """
+    Get the extension metrics are read by (e.g. *.json*).
+    """
+    return Path(path).suffix
+
+
+def read_metrics(
+    path: Union[str, Path], fields: Sequence[str], storage: "Storage" = None
+) -> Tuple[Tuple[float, ...], Optional[str]]:
+    """
+    Read the selected metrics of a single file.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The JSON or TSV file.
+    fields : Sequence[str]
+        The metrics to read: (nested) JSON fields, or TSV columns.
+    storage : Storage, optional
+        The storage to read the file from, by default None (the local
+        filesystem).
+
+    Returns
+    -------
+    Tuple[Tuple[float, ...], Optional[str]]
+        The metrics' values (NaN for missing or non-numeric ones), and why
+        the file could not be read, if it could not.
+    """
+    read, _ = READERS[get_extension(str(path))]
+    try:
+        return read(path, fields, storage), None
+    except (OSError, ValueError) as e:
+        return (math.nan,) * len(fields), f"{type(e).__name__}: {e}"
+
+
+class MetricsTable(NamedTuple):
+    """
+    Metrics collected across subjects and sessions, as a row per file and
+    a column per metric.
+    """
+
+    #: The files' paths, relative to the derivatives' base directory.
+    paths: List[str]
+    #: The rows' subject labels.
+    subjects: "numpy.ndarray"
+    #: The rows' session labels (empty for subject-level files).
+    sessions: "numpy.ndarray"
+    #: The metrics' names.
+    fields: List[str]
+    #: A (file, metric) array of values (NaN where missing).
+    values: "numpy.ndarray"
+    #: Why files could not be read, by relative path.
+    errors: Dict[str, str]
+
+    def get(self, field: str) -> "numpy.ndarray":
+        """
+        Get a single metric's column.
+        """
+        return self.values[:, self.fields.index(field)]
+
+    def to_cube(
+        self,
+    ) -> Tuple["numpy.ndarray", "numpy.ndarray", "numpy.ndarray"]:
+        """
+        Arrange the metrics as a (subject, session, metric) array.
+
+        Returns
+        -------
+        Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+            The sorted subjects and sessions, and the array (NaN for
+            missing sessions).
+
+        Raises
+        ------
+        ValueError
+            If a subject's session has several rows.
+        """
+        numpy = require_numpy("Collecting metrics")
+        subjects, subject_rows = numpy.unique(
+            self.subjects, return_inverse=True
+        )
+        sessions, session_rows = numpy.unique(
+            self.sessions, return_inverse=True
+        )
+        cells = subject_rows * len(sessions) + session_rows
+        unique, counts = numpy.unique(cells, return_counts=True)
+        if len(unique) < len(cells):
+            cell = unique[counts > 1][0]
+            raise ValueError(
+                DUPLICATE_ROWS.format(
+                    subject=subjects[cell // len(sessions)],
+                    session=sessions[cell % len(sessions)] or None,
+                )
+            )
+        cube = numpy.full(
+            (len(subjects), len(sessions), len(self.fields)), numpy.nan
+        )
+        cube[subject_rows, session_rows] = self.values
+        return subjects, sessions, cube
+
+
+def discover_fields(
+    base_directory: Path, paths: Sequence[str], storage: "Storage" = None
+) -> List[str]:
+    """
+    List the numeric fields of the first readable file.
+    """
+    for path in paths:
+        _, discover = READERS[get_extension(path)]
+        try:
+            return discover(base_directory / path, storage)
+        except (OSError, ValueError):
+            continue
+    return []
+
+
+def collect_metrics(
+    base_directory: Union[str, Path],
+    paths: Sequence[str],
+    fields: Optional[Sequence[str]] = None,
+    max_workers: int = 1,
+    backend: str = "thread",
+    storage: "Storage" = None,
+) -> MetricsTable:
+    """
+    Read metrics from JSON or TSV files concurrently, assembling them
+    into a single array. Workers return only the selected fields' values,
+    so that memory is proportional to the number of fields.
+
+    Parameters
+    ----------
+    base_directory : Union[str, Path]
+        The derivatives' base directory.
+    paths : Sequence[str]
+        The files' paths, relative to the base directory (files of other
+        formats are skipped).
+    fields : Optional[Sequence[str]], optional
+        The metrics to read: (nested, dot-separated) JSON fields or TSV
+        columns, by default None (every numeric field of the first
+        readable file).
+    max_workers : int, optional
+        The number of files to read concurrently, by default 1
+    backend : str, optional
+        Either *thread* or *process*, by default *thread*.
+    storage : Storage, optional
+        The storage to read files from, by default None (the local
+        filesystem). Its files are opened from several threads when
+        *max_workers* is greater than 1.
+
+    Returns
+    -------
+    MetricsTable
+        The metrics, by file.
+    """
+    numpy = require_numpy("Collecting metrics")
+    base_directory = Path(base_directory)
+    if storage is not None and storage.local:
+        storage = None
+    paths = [path for path in paths if get_extension(path) in READERS]
+    if fields is None:
+        fields = discover_fields(base_directory, paths, storage)
+    fields = list(fields)
+    results = map_ordered(
+        partial(read_metrics, fields=fields, storage=storage),
+        [base_directory / path for path in paths],
+        max_workers=max_workers,
+        backend=backend,
+    )
+    values = numpy.full((len(paths), len(fields)), numpy.nan)
+    errors = {}
+    for row, (path, (metrics, error)) in enumerate(zip(paths, results)):
+        values[row] = metrics
+        if error is not None:
+            errors[path] = error
+    subjects, sessions = zip(*map(locate, paths)) if paths else ((), ())
+    return MetricsTable(
+        paths,
+        numpy.array(subjects, dtype=str),
+        numpy.array(sessions, dtype=str),
+        fields,
+        values,
+        errors,
+    )
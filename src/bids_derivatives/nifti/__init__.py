@@ -0,0 +1,15 @@
+from bids_derivatives.utils.lazy import lazy_exports
+
+__all__, __getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "bids_derivatives.nifti.header": [
+            "HEADER_LOADER",
+            "HeaderSummary",
+            "NiftiHeader",
+            "inspect_headers",
+            "parse_header",
+            "read_header",
+        ],
+    },
+)
@@ -0,0 +1,472 @@
+import math
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from bids_derivatives.nifti.messages import (
+    INVALID_DIMENSIONS,
+    TRUNCATED_HEADER,
+    UNKNOWN_HEADER,
+)
+from bids_derivatives.utils.arrays import require_numpy
+from bids_derivatives.utils.concurrency import map_ordered
+from bids_derivatives.utils.instrumentation import instrumented
+from bids_derivatives.utils.scanner import locate
+from bids_derivatives.utils.serialization import JSONLoader
+
+if TYPE_CHECKING:
+    import numpy
+
+    from bids_derivatives.storage.base import Storage
+
+#: Extensions of NIfTI images.
+NIFTI_EXTENSIONS = (".nii.gz", ".nii")
+
+#: Sizes of NIfTI-1 and NIfTI-2 headers (their first field).
+NIFTI1_SIZE = 348
+NIFTI2_SIZE = 540
+
+#: The maximal number of dimensions of NIfTI images.
+MAX_DIMENSIONS = 7
+
+#: Window bits of zlib streams with a gzip wrapper.
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+#: The number of compressed bytes read at a time from gzipped images.
+CHUNK_SIZE = 4096
+
+#: A 4x4 affine, as rows.
+Affine = Tuple[Tuple[float, ...], ...]
+
+
+class NiftiHeader(NamedTuple):
+    """
+    The geometry of a NIfTI image, as read from its header.
+    """
+
+    #: Either 1 or 2.
+    version: int
+    #: The NIfTI code of the voxels' data type (e.g. 16 for float32).
+    datatype: int
+    #: The number of bits per voxel.
+    bitpix: int
+    #: The image's shape.
+    shape: Tuple[int, ...]
+    #: The voxels' sizes, along each dimension.
+    zooms: Tuple[float, ...]
+    #: The voxel-to-world affine (from the sform, qform or voxel sizes).
+    affine: Affine
+    qform_code: int
+    sform_code: int
+
+    @property
+    def ndim(self) -> int:
+        """
+        Get the image's number of dimensions.
+        """
+        return len(self.shape)
+
+
+def read_prefix(f: BinaryIO, path: str, size: int) -> bytes:
+    """
+    Read the first *size* bytes of an open image, decompressing only as
+    much of gzipped images as needed.
+    """
+    if not path.endswith(".gz"):
+        return f.read(size)
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    data = b""
+    while len(data) < size and not decompressor.eof:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        # Bound the output, as volumes of zeros compress a thousandfold.
+        data += decompressor.decompress(chunk, size - len(data))
+    return data
+
+
+@instrumented("nifti")
+def read_header_bytes(
+    path: Union[str, Path], storage: "Storage" = None
+) -> bytes:
+    """
+    Read the bytes of a NIfTI image's header, without reading its data.
+    Local uncompressed images are memory-mapped, gzipped images are
+    decompressed from their first chunks.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The *.nii* or *.nii.gz* image.
+    storage : Storage, optional
+        The storage to read the image from, by default None (the local
+        filesystem).
+
+    Returns
+    -------
+    bytes
+        At most *NIFTI2_SIZE* bytes (fewer for NIfTI-1 images without
+        data, or truncated ones).
+    """
+    path = str(path)
+    if storage is not None and not storage.local:
+        with storage.open(path) as f:
+            return read_prefix(f, path, NIFTI2_SIZE)
+    with open(path, "rb") as f:
+        if path.endswith(".gz"):
+            return read_prefix(f, path, NIFTI2_SIZE)
+        size = min(os.fstat(f.fileno()).st_size, NIFTI2_SIZE)
+        if not size:
+            return b""
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as m:
+            return bytes(m)
+
+
+def get_quaternion_affine(
+    pixdim: Sequence[float], quatern: Sequence[float]
+) -> Affine:
+    """
+    Get the affine of a header's qform (NIfTI's method 2).
+    """
+    b, c, d, x, y, z = quatern
+    a = math.sqrt(max(1.0 - (b * b + c * c + d * d), 0.0))
+    qfac = -1.0 if pixdim[0] < 0 else 1.0
+    i, j, k = pixdim[1], pixdim[2], pixdim[3] * qfac
+    return (
+        (
+            (a * a + b * b - c * c - d * d) * i,
+            (2 * b * c - 2 * a * d) * j,
+            (2 * b * d + 2 * a * c) * k,
+            x,
+        ),
+        (
+            (2 * b * c + 2 * a * d) * i,
+            (a * a + c * c - b * b - d * d) * j,
+            (2 * c * d - 2 * a * b) * k,
+            y,
+        ),
+        (
+            (2 * b * d - 2 * a * c) * i,
+            (2 * c * d + 2 * a * b) * j,
+            (a * a + d * d - c * c - b * b) * k,
+            z,
+        ),
+        (0.0, 0.0, 0.0, 1.0),
+    )
+
+
+def get_affine(
+    pixdim: Sequence[float],
+    qform_code: int,
+    sform_code: int,
+    quatern: Sequence[float],
+    srows: Sequence[float],
+) -> Affine:
+    """
+    Get a header's affine, preferring the sform to the qform (as nibabel
+    does), and scaling by the voxel sizes if neither is set.
+    """
+    if sform_code > 0:
+        return (
+            tuple(srows[:4]),
+            tuple(srows[4:8]),
+            tuple(srows[8:]),
+            (0.0, 0.0, 0.0, 1.0),
+        )
+    if qform_code > 0:
+        return get_quaternion_affine(pixdim, quatern)
+    return tuple(
+        tuple(pixdim[row + 1] if row == column else 0.0 for column in range(4))
+        if row < 3
+        else (0.0, 0.0, 0.0, 1.0)
+        for row in range(4)
+    )
+
+
+def unpack_nifti1(data: bytes, endian: str) -> tuple:
+    """
+    Unpack the geometry fields of a NIfTI-1 header.
+    """
+    dim = struct.unpack_from(f"{endian}8h", data, 40)
+    datatype, bitpix = struct.unpack_from(f"{endian}2h", data, 70)
+    pixdim = struct.unpack_from(f"{endian}8f", data, 76)
+    qform_code, sform_code = struct.unpack_from(f"{endian}2h", data, 252)
+    quatern = struct.unpack_from(f"{endian}6f", data, 256)
+    srows = struct.unpack_from(f"{endian}12f", data, 280)
+    return (
+        dim,
+        datatype,
+        bitpix,
+        pixdim,
+        qform_code,
+        sform_code,
+        quatern,
+        srows,
+    )
+
+
+def unpack_nifti2(data: bytes, endian: str) -> tuple:
+    """
+    Unpack the geometry fields of a NIfTI-2 header.
+    """
+    datatype, bitpix = struct.unpack_from(f"{endian}2h", data, 12)
+    dim = struct.unpack_from(f"{endian}8q", data, 16)
+    pixdim = struct.unpack_from(f"{endian}8d", data, 104)
+    qform_code, sform_code = struct.unpack_from(f"{endian}2i", data, 344)
+    quatern = struct.unpack_from(f"{endian}6d", data, 352)
+    srows = struct.unpack_from(f"{endian}12d", data, 400)
+    return (
+        dim,
+        datatype,
+        bitpix,
+        pixdim,
+        qform_code,
+        sform_code,
+        quatern,
+        srows,
+    )
+
+
+#: Header unpackers, by header size.
+UNPACKERS = {NIFTI1_SIZE: (1, unpack_nifti1), NIFTI2_SIZE: (2, unpack_nifti2)}
+
+
+def parse_header(data: bytes) -> NiftiHeader:
+    """
+    Parse a NIfTI-1 or NIfTI-2 header, of either byte order.
+
+    Parameters
+    ----------
+    data : bytes
+        The header's bytes (see :func:`read_header_bytes`).
+
+    Returns
+    -------
+    NiftiHeader
+        The image's geometry.
+
+    Raises
+    ------
+    ValueError
+        If *data* is not a (complete) NIfTI header.
+    """
+    if len(data) < 4:
+        raise ValueError(TRUNCATED_HEADER.format(size=len(data)))
+    for endian in "<>":
+        (size,) = struct.unpack_from(f"{endian}i", data)
+        if size in UNPACKERS:
+            break
+    else:
+        size = int.from_bytes(data[:4], "little")
+        raise ValueError(UNKNOWN_HEADER.format(size=size))
+    if len(data) < size:
+        raise ValueError(TRUNCATED_HEADER.format(size=len(data)))
+    version, unpack = UNPACKERS[size]
+    (
+        dim,
+        datatype,
+        bitpix,
+        pixdim,
+        qform_code,
+        sform_code,
+        quatern,
+        srows,
+    ) = unpack(data, endian)
+    ndim = dim[0]
+    if not 1 <= ndim <= MAX_DIMENSIONS:
+        raise ValueError(INVALID_DIMENSIONS.format(ndim=ndim))
+    return NiftiHeader(
+        version,
+        datatype,
+        bitpix,
+        tuple(dim[1:][:ndim]),
+        tuple(pixdim[1:][:ndim]),
+        get_affine(pixdim, qform_code, sform_code, quatern, srows),
+        qform_code,
+        sform_code,
+    )
+
+
+class HeaderLoader(JSONLoader):
+    """
+    A HeaderLoader parses NIfTI headers, keeping them for as long as
+    their images' modification time and size are unchanged.
+    """
+
+    def read(self, path: str) -> NiftiHeader:
+        return parse_header(read_header_bytes(path))
+
+
+#: Shared loader of local images' headers (bounded by count only, as
+#: images' sizes say nothing of their headers').
+HEADER_LOADER = HeaderLoader(maxsize=65536)
+
+
+def read_header(
+    path: Union[str, Path], storage: "Storage" = None
+) -> Tuple[Optional[NiftiHeader], Optional[str]]:
+    """
+    Read a NIfTI image's header, through *HEADER_LOADER* for local files.
+
+    Returns
+    -------
+    Tuple[Optional[NiftiHeader], Optional[str]]
+        The header (None if it could not be read), and why it could not
+        be read, if it could not.
+    """
+    try:
+        if storage is None or storage.local:
+            return HEADER_LOADER.load(path), None
+        return parse_header(read_header_bytes(path, storage)), None
+    except (OSError, ValueError, EOFError, zlib.error) as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+class HeaderSummary(NamedTuple):
+    """
+    The geometry of NIfTI images across subjects and sessions, as a row
+    per image. Rows of unreadable images hold zeros and NaNs.
+    """
+
+    #: The images' paths, relative to the derivatives' base directory.
+    paths: List[str]
+    #: The rows' subject labels.
+    subjects: "numpy.ndarray"
+    #: The rows' session labels (empty for subject-level images).
+    sessions: "numpy.ndarray"
+    #: The NIfTI versions (1 or 2).
+    versions: "numpy.ndarray"
+    #: The NIfTI codes of the voxels' data types.
+    datatypes: "numpy.ndarray"
+    #: The numbers of dimensions.
+    ndims: "numpy.ndarray"
+    #: An (image, 7) array of shapes, padded with ones.
+    shapes: "numpy.ndarray"
+    #: An (image, 7) array of voxel sizes, padded with NaNs.
+    zooms: "numpy.ndarray"
+    #: An (image, 4, 4) array of affines.
+    affines: "numpy.ndarray"
+    #: Why headers could not be read, by relative path.
+    errors: Dict[str, str]
+
+    def find_mismatches(self, atol: float = 1e-4) -> List[str]:
+        """
+        Find the images whose spatial grid differs from the most common
+        one among the rows (e.g. images missed by a resampling step).
+        Summaries should thus be of images expected to share a grid,
+        such as a single space's.
+
+        Parameters
+        ----------
+        atol : float, optional
+            The tolerance on the affines' elements, by default 1e-4
+
+        Returns
+        -------
+        List[str]
+            The relative paths of the mismatching images (unreadable ones
+            excluded).
+        """
+        numpy = require_numpy("Inspecting headers")
+        valid = self.ndims > 0
+        if not valid.any():
+            return []
+        grids, counts = numpy.unique(
+            self.shapes[valid, :3], axis=0, return_counts=True
+        )
+        grid = grids[counts.argmax()]
+        reference = self.affines[valid][
+            (self.shapes[valid, :3] == grid).all(axis=1)
+        ][0]
+        matching = (self.shapes[:, :3] == grid).all(axis=1) & numpy.all(
+            numpy.abs(self.affines - reference) <= atol, axis=(1, 2)
+        )
+        return [
+            path
+            for path, is_valid, is_matching in zip(self.paths, valid, matching)
+            if is_valid and not is_matching
+        ]
+
+
+def inspect_headers(
+    base_directory: Union[str, Path],
+    paths: Sequence[str],
+    max_workers: int = 1,
+    storage: "Storage" = None,
+) -> HeaderSummary:
+    """
+    Read the headers of NIfTI images concurrently (in threads, sharing
+    *HEADER_LOADER*), assembling their geometry into arrays.
+
+    Parameters
+    ----------
+    base_directory : Union[str, Path]
+        The derivatives' base directory.
+    paths : Sequence[str]
+        The images' paths, relative to the base directory (files of other
+        formats are skipped).
+    max_workers : int, optional
+        The number of headers to read concurrently, by default 1
+    storage : Storage, optional
+        The storage to read images from, by default None (the local
+        filesystem). Its files are opened from several threads when
+        *max_workers* is greater than 1.
+
+    Returns
+    -------
+    HeaderSummary
+        The images' geometry.
+    """
+    numpy = require_numpy("Inspecting headers")
+    base_directory = Path(base_directory)
+    paths = [path for path in paths if path.endswith(NIFTI_EXTENSIONS)]
+    results = map_ordered(
+        lambda path: read_header(base_directory / path, storage),
+        paths,
+        max_workers=max_workers,
+    )
+    num_images = len(paths)
+    versions = numpy.zeros(num_images, dtype=numpy.int8)
+    datatypes = numpy.zeros(num_images, dtype=numpy.int16)
+    ndims = numpy.zeros(num_images, dtype=numpy.int8)
+    shapes = numpy.ones((num_images, MAX_DIMENSIONS), dtype=numpy.int64)
+    zooms = numpy.full((num_images, MAX_DIMENSIONS), numpy.nan)
+    affines = numpy.full((num_images, 4, 4), numpy.nan)
+    errors = {}
+    for row, (path, (header, error)) in enumerate(zip(paths, results)):
+        if header is None:
+            shapes[row] = 0
+            errors[path] = error
+            continue
+        versions[row] = header.version
+        datatypes[row] = header.datatype
+        ndims[row] = ndim = header.ndim
+        shapes[row, :ndim] = header.shape
+        zooms[row, :ndim] = header.zooms
+        affines[row] = header.affine
+    subjects, sessions = zip(*map(locate, paths)) if paths else ((), ())
+    return HeaderSummary(
+        paths,
+        numpy.array(subjects, dtype=str),
+        numpy.array(sessions, dtype=str),
+        versions,
+        datatypes,
+        ndims,
+        shapes,
+        zooms,
+        affines,
+        errors,
+    )
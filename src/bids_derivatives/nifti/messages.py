@@ -0,0 +1,5 @@
+#: NIfTI messages
+
+TRUNCATED_HEADER = "The header is truncated ({size} bytes)."
+UNKNOWN_HEADER = "Not a NIfTI-1 or NIfTI-2 header (sizeof_hdr is {size})."
+INVALID_DIMENSIONS = "The header's number of dimensions is {ndim}."
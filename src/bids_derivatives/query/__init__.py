@@ -0,0 +1,13 @@
+from bids_derivatives.utils.lazy import lazy_exports
+
+__all__, __getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "bids_derivatives.query.planner": [
+            "TraversalPlan",
+            "plan_traversal",
+            "walk_plan",
+        ],
+        "bids_derivatives.query.query": ["FileIndex"],
+    },
+)
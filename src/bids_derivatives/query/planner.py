@@ -0,0 +1,402 @@
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from bids_derivatives.query.query import normalize_value
+from bids_derivatives.utils.concurrency import map_ordered
+from bids_derivatives.utils.records import FileRecord
+from bids_derivatives.utils.scanner import (
+    DerivativeScan,
+    get_scanner,
+    match_label,
+    to_records,
+    walk_subject,
+)
+from bids_derivatives.utils.templates.bids import (
+    DATATYPES,
+    SESSION_PATTERN,
+    SESSION_TEMPLATE,
+    SUBJECT_PATTERN,
+    SUBJECT_TEMPLATE,
+)
+
+if TYPE_CHECKING:
+    from bids_derivatives.storage.base import Storage
+
+#: Errors of planned directories that do not exist.
+MISSING_DIRECTORY_ERRORS = (FileNotFoundError, NotADirectoryError)
+
+#: Marks the subjects' directories walked but for their sessions'.
+OUTSIDE = "(outside ses-*)"
+
+#: A queried entity's values, or None for any value.
+Values = Optional[Tuple[str, ...]]
+
+
+class TraversalPlan(NamedTuple):
+    """
+    The directories a query descends into, from its subject, session and
+    datatype filters, and the extensions its files are filtered by.
+    Filters left as None are not pruned by.
+
+    Plans assume files lie in the directories of their subject and
+    datatype, as BIDS lays them out. Files outside their session's
+    directory (e.g. a subject's *figures*) may still carry its entity in
+    their names, so session filters also walk the subject's directories
+    that are not sessions'.
+    """
+
+    subjects: Values
+    sessions: Values
+    datatypes: Values
+    extensions: Values
+
+    @property
+    def is_narrow(self) -> bool:
+        """
+        Whether the plan prunes any directory.
+        """
+        return any(
+            values is not None
+            for values in (self.subjects, self.sessions, self.datatypes)
+        )
+
+    def get_patterns(self) -> List[str]:
+        """
+        Get the (glob) patterns of the directories whose files are
+        listed, relative to the derivatives' base directory. Subjects'
+        directories walked but for their sessions' are marked so.
+        """
+        subjects = [
+            SUBJECT_TEMPLATE.format(subject=subject)
+            for subject in self.subjects or ("*",)
+        ]
+        sessions = (
+            ["ses-*"]
+            if self.sessions is None
+            else [
+                SESSION_TEMPLATE.format(session=session)
+                for session in self.sessions
+            ]
+        )
+        if self.datatypes is not None:
+            return [
+                f"{parent}/{datatype}"
+                for subject in subjects
+                for parent in (
+                    subject,
+                    *(f"{subject}/{session}" for session in sessions),
+                )
+                for datatype in self.datatypes
+            ]
+        if self.sessions is None:
+            return [f"{subject}/**" for subject in subjects]
+        return [
+            pattern
+            for subject in subjects
+            for pattern in (
+                f"{subject}/** {OUTSIDE}",
+                *(f"{subject}/{session}/**" for session in sessions),
+            )
+        ]
+
+    def explain(self) -> str:
+        """
+        Describe the plan, one line per level of the traversal.
+        """
+        subjects = (
+            "all (listing the base directory)"
+            if self.subjects is None
+            else ", ".join(self.subjects)
+        )
+        if self.sessions is not None:
+            sessions = (
+                f"{', '.join(self.sessions)} (and files outside sessions' "
+                "directories)"
+            )
+        elif self.datatypes is not None:
+            sessions = "all (listing each subject's directory)"
+        else:
+            sessions = "all"
+        datatypes = (
+            "all (walking recursively)"
+            if self.datatypes is None
+            else ", ".join(self.datatypes) or "none (no BIDS datatype)"
+        )
+        extensions = (
+            "any" if self.extensions is None else ", ".join(self.extensions)
+        )
+        lines = [
+            "Traversal plan:",
+            f"  subjects: {subjects}",
+            f"  sessions: {sessions}",
+            f"  datatypes: {datatypes}",
+            f"  extensions: {extensions}",
+            "  directories:",
+            *(f"    {pattern}" for pattern in self.get_patterns()),
+        ]
+        return "\n".join(lines)
+
+
+def to_values(entity: str, values: Union[str, Iterable[str], None]) -> Values:
+    """
+    Normalize a filter's values (see :meth:`FileIndex.query`).
+    """
+    if values is None:
+        return None
+    if isinstance(values, str):
+        values = [values]
+    return tuple(sorted({normalize_value(entity, value) for value in values}))
+
+
+def plan_traversal(
+    subject: Union[str, Iterable[str], None] = None,
+    session: Union[str, Iterable[str], None] = None,
+    datatype: Union[str, Iterable[str], None] = None,
+    extension: Union[str, Iterable[str], None] = None,
+) -> TraversalPlan:
+    """
+    Translate a query's filters into the directories it descends into.
+
+    Parameters
+    ----------
+    subject : Union[str, Iterable[str], None], optional
+        The subjects' labels, by default None
+    session : Union[str, Iterable[str], None], optional
+        The sessions' labels, by default None
+    datatype : Union[str, Iterable[str], None], optional
+        The datatypes (only BIDS datatypes may match), by default None
+    extension : Union[str, Iterable[str], None], optional
+        The extensions, by default None
+
+    Returns
+    -------
+    TraversalPlan
+        The plan.
+    """
+    datatypes = to_values("datatype", datatype)
+    if datatypes is not None:
+        # Other directories are not given a datatype (see *to_records*).
+        datatypes = tuple(value for value in datatypes if value in DATATYPES)
+    return TraversalPlan(
+        to_values("subject", subject),
+        to_values("session", session),
+        datatypes,
+        to_values("extension", extension),
+    )
+
+
+def scan_planned_directories(
+    base_directory: Path,
+    roots: Iterable[Tuple[str, Optional[str]]],
+    subject: str,
+    stat: bool = False,
+    recursive: bool = True,
+    storage: "Storage" = None,
+) -> Tuple[List[str], List[FileRecord]]:
+    """
+    List the files of planned directories (skipping missing ones).
+
+    Parameters
+    ----------
+    base_directory : Path
+        The base directory of the BIDS-App's derivatives.
+    roots : Iterable[Tuple[str, Optional[str]]]
+        The directories' relative paths, and their sessions.
+    subject : str
+        The directories' subject.
+    stat : bool, optional
+        Whether to stat files, by default False
+    recursive : bool, optional
+        Whether to list the directories' sub-directories too, by default
+        True
+    storage : Storage, optional
+        The storage to list the directories from, by default None (the
+        local filesystem).
+
+    Returns
+    -------
+    Tuple[List[str], List[FileRecord]]
+        The sessions of the existing roots, and the files found.
+    """
+    scan = get_scanner(storage)
+    sessions, files = set(), []
+    for root, session in roots:
+        stack = [root]
+        while stack:
+            relative = stack.pop()
+            try:
+                directories, entries = scan(
+                    base_directory / relative, stat=stat
+                )
+            except MISSING_DIRECTORY_ERRORS:
+                if relative == root:
+                    break
+                raise
+            if session is not None:
+                sessions.add(session)
+            files.extend(to_records(relative, entries, subject, session))
+            if recursive:
+                stack.extend(
+                    f"{relative}/{directory}" for directory in directories
+                )
+    return sorted(sessions), files
+
+
+def walk_planned_subject(
+    base_directory: Union[str, Path],
+    name: str,
+    plan: TraversalPlan,
+    stat: bool = False,
+    storage: "Storage" = None,
+) -> Optional[Tuple[List[str], List[FileRecord]]]:
+    """
+    Walk the planned directories of a single subject.
+
+    Returns
+    -------
+    Optional[Tuple[List[str], List[FileRecord]]]
+        The subject's sessions found, and the files found, or None if the
+        subject's directory does not exist.
+    """
+    base_directory = Path(base_directory)
+    subject = match_label(SUBJECT_PATTERN, name)
+    files = []
+    try:
+        if plan.sessions is None and plan.datatypes is None:
+            return walk_subject(base_directory, name, stat, storage)
+        if plan.datatypes is None:
+            # Files outside their session's directory (e.g. figures) are
+            # matched by the session entity of their names.
+            directories, entries = get_scanner(storage)(
+                base_directory / name, stat=stat
+            )
+            files.extend(to_records(name, entries, subject, None))
+            roots = [
+                (f"{name}/{directory}", session)
+                for directory, session in iter_sessions(directories)
+                if session is None or session in plan.sessions
+            ]
+        elif plan.sessions is None:
+            directories, _ = get_scanner(storage)(base_directory / name)
+            roots = [(name, None)] + [
+                (f"{name}/{directory}", session)
+                for directory, session in iter_sessions(directories)
+                if session is not None
+            ]
+        else:
+            roots = [(name, None)] + [
+                (f"{name}/{SESSION_TEMPLATE.format(session=session)}", session)
+                for session in plan.sessions
+            ]
+    except MISSING_DIRECTORY_ERRORS:
+        return None
+    if plan.datatypes is not None:
+        roots = [
+            (f"{root}/{datatype}", session)
+            for root, session in roots
+            for datatype in plan.datatypes
+        ]
+    sessions, planned_files = scan_planned_directories(
+        base_directory,
+        roots,
+        subject,
+        stat=stat,
+        recursive=plan.datatypes is None,
+        storage=storage,
+    )
+    return sessions, files + planned_files
+
+
+def iter_sessions(
+    directories: Iterable[str],
+) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Pair a subject's sub-directories with their sessions' labels (None
+    for directories that are not sessions').
+    """
+    for directory in directories:
+        yield directory, match_label(SESSION_PATTERN, directory)
+
+
+def walk_plan(
+    base_directory: Union[str, Path],
+    plan: TraversalPlan,
+    stat: bool = False,
+    max_workers: int = 1,
+    backend: str = "thread",
+    storage: "Storage" = None,
+) -> DerivativeScan:
+    """
+    Walk only the directories of a traversal plan (see
+    :func:`bids_derivatives.utils.scanner.walk_derivative`).
+
+    Parameters
+    ----------
+    base_directory : Union[str, Path]
+        The base directory of the BIDS-App's derivatives.
+    plan : TraversalPlan
+        The directories to walk (see :func:`plan_traversal`).
+    stat : bool, optional
+        Whether to stat files for their size and modification time,
+        by default False
+    max_workers : int, optional
+        The number of subjects to walk concurrently, by default 1
+    backend : str, optional
+        Either *thread* or *process*, by default *thread*.
+    storage : Storage, optional
+        The storage to walk the directories from, by default None (the
+        local filesystem).
+
+    Returns
+    -------
+    DerivativeScan
+        The subjects walked (with the sessions found), and their files
+        of the planned extensions.
+    """
+    if plan.subjects is None:
+        directories, _ = get_scanner(storage)(base_directory)
+        names = sorted(
+            name
+            for name in directories
+            if match_label(SUBJECT_PATTERN, name) is not None
+        )
+    else:
+        names = [
+            SUBJECT_TEMPLATE.format(subject=subject)
+            for subject in plan.subjects
+        ]
+    results = map_ordered(
+        partial(
+            walk_planned_subject,
+            base_directory,
+            plan=plan,
+            stat=stat,
+            storage=storage,
+        ),
+        names,
+        max_workers=max_workers,
+        backend=backend,
+    )
+    subjects, files = {}, []
+    for name, result in zip(names, results):
+        if result is None:
+            continue
+        sessions, subject_files = result
+        subjects[match_label(SUBJECT_PATTERN, name)] = sessions
+        files.extend(
+            file
+            for file in subject_files
+            if plan.extensions is None or file.name.endswith(plan.extensions)
+        )
+    files.sort()
+    return DerivativeScan(subjects, files)
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from functools import reduce
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from bids_derivatives.utils.entities import parse_entities
+from bids_derivatives.utils.records import intern
+from bids_derivatives.utils.scanner import DerivativeScan
+from bids_derivatives.utils.templates.bids import (
+    SESSION_PATTERN,
+    SUBJECT_PATTERN,
+)
+
+#: Patterns stripping BIDS prefixes from queried labels (e.g. *sub-1*).
+LABEL_PATTERNS = {"subject": SUBJECT_PATTERN, "session": SESSION_PATTERN}
+
+
+def get_file_entities(
+    path: str,
+    subject: Optional[str] = None,
+    session: Optional[str] = None,
+    datatype: Optional[str] = None,
+) -> dict:
+    """
+    Get the entities of a file, completing those missing from its name
+    with the ones inferred from its location.
+
+    Parameters
+    ----------
+    path : str
+        The file's path, relative to the derivatives' base directory.
+    subject : Optional[str], optional
+        The subject whose directory contains the file, by default None
+    session : Optional[str], optional
+        The session whose directory contains the file, by default None
+    datatype : Optional[str], optional
+        The datatype of the file's directory, by default None
+
+    Returns
+    -------
+    dict
+        The file's entities.
+    """
+    entities = parse_entities(path.rpartition("/")[2])
+    for entity, value in (
+        ("subject", subject),
+        ("session", session),
+        ("datatype", datatype),
+    ):
+        if value is not None:
+            entities.setdefault(entity, value)
+    return entities
+
+
+def normalize_value(entity: str, value: str) -> str:
+    """
+    Normalize a queried entity value to the form it is indexed by.
+    """
+    if entity == "extension" and not value.startswith("."):
+        return f".{value}"
+    if entity in LABEL_PATTERNS:
+        match = LABEL_PATTERNS[entity].fullmatch(value)
+        return match.group(1) if match else value
+    return value
+
+
+class FileIndex:
+    """
+    A FileIndex is an in-memory inverted index of a BIDS-App's files,
+    mapping every value of every entity to the files carrying it.
+    """
+
+    def __init__(self):
+        # Paths are stored as (interned) directories and names, so that
+        # files of the same directory share its string.
+        self.directories: List[str] = []
+        self.names: List[str] = []
+        self.postings: Dict[str, Dict[str, Set[int]]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_scan(cls, scan: DerivativeScan) -> "FileIndex":
+        """
+        Index the files collected by a single walk of the derivatives.
+        """
+        index = cls()
+        for file in scan.files:
+            index.add(
+                file.path,
+                get_file_entities(
+                    file.name, file.subject, file.session, file.datatype
+                ),
+            )
+        return index
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "FileIndex":
+        """
+        Index the file records of a persistent *DerivativeIndex*.
+        """
+        index = cls()
+        for record in records:
+            entities = dict(record["entities"])
+            for entity in ("subject", "session", "datatype"):
+                if record[entity] is not None:
+                    entities.setdefault(entity, record[entity])
+            index.add(record["path"], entities)
+        return index
+
+    def add(self, path: str, entities: dict) -> int:
+        """
+        Add a file to the index.
+
+        Parameters
+        ----------
+        path : str
+            The file's path, relative to the derivatives' base directory.
+        entities : dict
+            The file's entities.
+
+        Returns
+        -------
+        int
+            The file's identifier within the index.
+        """
+        identifier = len(self.names)
+        directory, _, name = path.rpartition("/")
+        self.directories.append(intern(directory))
+        self.names.append(name)
+        for entity, value in entities.items():
+            self.postings[entity][value].add(identifier)
+        return identifier
+
+    def query(self, **filters: Union[str, Iterable[str], None]) -> List[str]:
+        """
+        Query the index for files matching all of the given entities.
+        Each entity may be given a single value or several alternative
+        values; entities given as None are ignored.
+
+        Returns
+        -------
+        List[str]
+            The sorted relative paths of the matching files.
+        """
+        matches = []
+        for entity, values in filters.items():
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            postings = self.postings.get(entity, {})
+            matches.append(
+                set().union(
+                    *(
+                        postings.get(normalize_value(entity, value), ())
+                        for value in values
+                    )
+                )
+            )
+        if not matches:
+            return sorted(self.paths)
+        matches.sort(key=len)
+        identifiers = reduce(set.intersection, matches[1:], matches[0])
+        return sorted(self.get_path(identifier) for identifier in identifiers)
+
+    def get_path(self, identifier: int) -> str:
+        """
+        Get the relative path of an indexed file.
+        """
+        directory = self.directories[identifier]
+        name = self.names[identifier]
+        return f"{directory}/{name}" if directory else name
+
+    @property
+    def paths(self) -> List[str]:
+        """
+        Get the relative paths of all indexed files.
+        """
+        return [self.get_path(identifier) for identifier in range(len(self))]
+
+    @property
+    def entities(self) -> Dict[str, List[str]]:
+        """
+        Get the indexed entities and their sorted values.
+        """
+        return {
+            entity: sorted(values) for entity, values in self.postings.items()
+        }
@@ -0,0 +1,9 @@
+#: Snapshot messages
+
+UNSUPPORTED_SNAPSHOT = (
+    "Unsupported snapshot version {version} in {path}; expected {expected}."
+)
+
+UNSORTED_SNAPSHOT = (
+    "Corrupt snapshot {path}: its paths are not sorted (or are repeated)."
+)
@@ -0,0 +1,305 @@
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Union
+
+from bids_derivatives.query.query import get_file_entities
+from bids_derivatives.snapshot.messages import (
+    UNSORTED_SNAPSHOT,
+    UNSUPPORTED_SNAPSHOT,
+)
+from bids_derivatives.utils.hashing import HASH_ALGORITHM
+from bids_derivatives.utils.scanner import DerivativeScan, match_label
+from bids_derivatives.utils.serialization import loads_json
+from bids_derivatives.utils.templates.bids import SUBJECT_PATTERN
+
+if TYPE_CHECKING:
+    from bids_derivatives.storage.base import Storage
+    from bids_derivatives.verify.verify import HashCache
+
+#: The version of the snapshot file format.
+SNAPSHOT_VERSION = 1
+
+
+class Snapshot:
+    """
+    A Snapshot is a compact inventory of a BIDS-App's derivatives at a
+    point in time: its subjects' sessions, and its files' relative paths
+    (sorted, from which their entities are parsed), sizes, modification
+    times and, optionally, content hashes, stored as parallel lists.
+    """
+
+    __slots__ = (
+        "subjects",
+        "paths",
+        "sizes",
+        "mtimes",
+        "hashes",
+        "created",
+    )
+
+    def __init__(
+        self,
+        subjects: Dict[str, List[str]],
+        paths: List[str],
+        sizes: List[Optional[int]],
+        mtimes: List[Optional[int]],
+        hashes: Optional[List[Optional[str]]] = None,
+        created: Optional[float] = None,
+    ):
+        """
+        Initialize the Snapshot class.
+
+        Parameters
+        ----------
+        subjects : Dict[str, List[str]]
+            The subjects' labels mapped to their sessions' labels.
+        paths : List[str]
+            The files' sorted relative paths.
+        sizes : List[Optional[int]]
+            The files' sizes, in bytes.
+        mtimes : List[Optional[int]]
+            The files' modification times, in nanoseconds.
+        hashes : Optional[List[Optional[str]]], optional
+            The files' content hashes (see *HASH_ALGORITHM*; None for
+            unreadable files), by default None
+        created : Optional[float], optional
+            When the snapshot was taken, by default None (now).
+        """
+        self.subjects = subjects
+        self.paths = paths
+        self.sizes = sizes
+        self.mtimes = mtimes
+        self.hashes = hashes
+        self.created = time.time() if created is None else created
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}({len(self.subjects)} subjects, "
+            f"{len(self)} files)"
+        )
+
+    @classmethod
+    def from_scan(
+        cls,
+        scan: DerivativeScan,
+        base_directory: Union[str, Path] = None,
+        hashes: bool = False,
+        storage: "Storage" = None,
+        cache: Optional["HashCache"] = None,
+        max_workers: int = 1,
+        backend: str = "thread",
+    ) -> "Snapshot":
+        """
+        Take a snapshot of a walk of the derivatives (stat-ed for the
+        files' sizes and modification times). Files are hashed as by
+        :func:`bids_derivatives.verify.verify_scan`.
+
+        Parameters
+        ----------
+        scan : DerivativeScan
+            The walk of the derivatives.
+        base_directory : Union[str, Path], optional
+            The derivatives' base directory, required to hash files, by
+            default None
+        hashes : bool, optional
+            Whether to hash the files' contents, by default False
+        storage : Storage, optional
+            The storage to read files from for hashing, by default None
+            (the local filesystem).
+        cache : Optional[HashCache], optional
+            The files' cached digests, updated in place, by default None
+            (hash every file).
+        max_workers : int, optional
+            The number of files to hash concurrently, by default 1
+        backend : str, optional
+            Either *thread* or *process*, by default *thread*.
+
+        Returns
+        -------
+        Snapshot
+            The derivatives' snapshot.
+        """
+        files = sorted(scan.files, key=lambda file: file.path)
+        digests = None
+        if hashes:
+            from bids_derivatives.verify.verify import verify_scan
+
+            report = verify_scan(
+                scan,
+                base_directory,
+                cache=cache,
+                max_workers=max_workers,
+                backend=backend,
+                storage=storage,
+            )
+            digests = [report.hashes[file.path] for file in files]
+        return cls(
+            subjects=dict(scan.subjects),
+            paths=[file.path for file in files],
+            sizes=[file.size for file in files],
+            mtimes=[file.mtime_ns for file in files],
+            hashes=digests,
+        )
+
+    def get_entities(self, position: int) -> dict:
+        """
+        Get the entities of a file of the snapshot, by its position.
+        """
+        path = self.paths[position]
+        subject = match_label(SUBJECT_PATTERN, path.partition("/")[0])
+        return get_file_entities(path, subject)
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Save the snapshot as gzip-compressed JSON, with a list per column.
+        """
+        content = {
+            "version": SNAPSHOT_VERSION,
+            "created": self.created,
+            "hash_algorithm": HASH_ALGORITHM if self.hashes else None,
+            "subjects": self.subjects,
+            "paths": self.paths,
+            "sizes": self.sizes,
+            "mtimes": self.mtimes,
+            "hashes": self.hashes,
+        }
+        with gzip.open(path, "wt") as f:
+            json.dump(content, f, separators=(",", ":"))
+        return Path(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Snapshot":
+        """
+        Load a snapshot saved with :meth:`save`.
+
+        Raises
+        ------
+        ValueError
+            If the snapshot was saved in an unsupported format, or its
+            paths are not sorted (which diffs rely on).
+        """
+        with gzip.open(path, "rb") as f:
+            content = loads_json(f.read())
+        if content.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(
+                UNSUPPORTED_SNAPSHOT.format(
+                    version=content.get("version"),
+                    path=path,
+                    expected=SNAPSHOT_VERSION,
+                )
+            )
+        paths = content["paths"]
+        if any(left >= right for left, right in zip(paths, paths[1:])):
+            raise ValueError(UNSORTED_SNAPSHOT.format(path=path))
+        return cls(
+            subjects=content["subjects"],
+            paths=paths,
+            sizes=content["sizes"],
+            mtimes=content["mtimes"],
+            hashes=content["hashes"],
+            created=content["created"],
+        )
+
+
+class SnapshotDiff(NamedTuple):
+    """
+    The changes between two snapshots of a BIDS-App's derivatives.
+    """
+
+    added: List[str]
+    removed: List[str]
+    modified: List[str]
+    #: Subjects mapped to their added sessions (all of them for new
+    #: subjects).
+    sessions_added: Dict[str, List[str]]
+    #: Subjects mapped to their removed sessions.
+    sessions_removed: Dict[str, List[str]]
+    subjects_added: List[str]
+    subjects_removed: List[str]
+
+    def __bool__(self) -> bool:
+        return any(self)
+
+    @property
+    def changed_subjects(self) -> List[str]:
+        """
+        Get the subjects with any added, removed or modified file.
+        """
+        labels = {
+            match_label(SUBJECT_PATTERN, path.partition("/")[0])
+            for paths in self[:3]
+            for path in paths
+        }
+        labels.discard(None)
+        return sorted(labels)
+
+
+def is_modified(old: Snapshot, i: int, new: Snapshot, j: int) -> bool:
+    """
+    Whether a file present in two snapshots was modified: its size
+    changed, or its hash did (when both snapshots have hashes), or its
+    modification time did (otherwise).
+    """
+    if old.sizes[i] != new.sizes[j]:
+        return True
+    if old.hashes is not None and new.hashes is not None:
+        return old.hashes[i] != new.hashes[j]
+    return old.mtimes[i] != new.mtimes[j]
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> SnapshotDiff:
+    """
+    Compute the changes between two snapshots in a single merge of their
+    sorted paths (i.e. in time linear in their number of files).
+
+    Parameters
+    ----------
+    old : Snapshot
+        The earlier snapshot.
+    new : Snapshot
+        The later snapshot.
+
+    Returns
+    -------
+    SnapshotDiff
+        The changed files, sessions and subjects.
+    """
+    added, removed, modified = [], [], []
+    i, j = 0, 0
+    while i < len(old) and j < len(new):
+        old_path, new_path = old.paths[i], new.paths[j]
+        if old_path == new_path:
+            if is_modified(old, i, new, j):
+                modified.append(new_path)
+            i += 1
+            j += 1
+        elif old_path < new_path:
+            removed.append(old_path)
+            i += 1
+        else:
+            added.append(new_path)
+            j += 1
+    removed.extend(old.paths[i:])
+    added.extend(new.paths[j:])
+    sessions_added, sessions_removed = {}, {}
+    for subject in sorted(set(old.subjects) | set(new.subjects)):
+        old_sessions = set(old.subjects.get(subject, ()))
+        new_sessions = set(new.subjects.get(subject, ()))
+        if new_sessions - old_sessions:
+            sessions_added[subject] = sorted(new_sessions - old_sessions)
+        if old_sessions - new_sessions:
+            sessions_removed[subject] = sorted(old_sessions - new_sessions)
+    return SnapshotDiff(
+        added=added,
+        removed=removed,
+        modified=modified,
+        sessions_added=sessions_added,
+        sessions_removed=sessions_removed,
+        subjects_added=sorted(set(new.subjects) - set(old.subjects)),
+        subjects_removed=sorted(set(old.subjects) - set(new.subjects)),
+    )
@@ -0,0 +1,18 @@
+from bids_derivatives.utils.lazy import lazy_exports
+
+__all__, __getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "bids_derivatives.storage.archive": [
+            "TarStorage",
+            "ZipStorage",
+            "open_archive",
+        ],
+        "bids_derivatives.storage.base": ["Storage"],
+        "bids_derivatives.storage.local": [
+            "LOCAL_STORAGE",
+            "LocalStorage",
+        ],
+        "bids_derivatives.storage.remote": ["FsspecStorage"],
+    },
+)
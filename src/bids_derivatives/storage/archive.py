@@ -0,0 +1,265 @@
+import io
+import os
+import tarfile
+import threading
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Set, Tuple, Union
+
+from bids_derivatives.storage.base import EntryStat, Storage, normalize_path
+from bids_derivatives.storage.messages import (
+    NOT_A_DIRECTORY,
+    PATH_MISSING,
+    UNKNOWN_ARCHIVE,
+)
+
+
+class LockedReader(io.RawIOBase):
+    """
+    A LockedReader reads a file of an archive under the archive's lock,
+    so that files sharing the archive's file object (each seeking to its
+    own position before reading) may be read from several threads.
+    """
+
+    def __init__(self, raw: BinaryIO, lock: threading.RLock):
+        """
+        Initialize the LockedReader class.
+
+        Parameters
+        ----------
+        raw : BinaryIO
+            The archive's file, as opened by the archive's module.
+        lock : threading.RLock
+            The archive's lock.
+        """
+        super().__init__()
+        self.raw = raw
+        self.lock = lock
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self.raw.seekable()
+
+    def readinto(self, buffer) -> int:
+        with self.lock:
+            return self.raw.readinto(buffer)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        with self.lock:
+            return self.raw.seek(offset, whence)
+
+    def tell(self) -> int:
+        with self.lock:
+            return self.raw.tell()
+
+    def close(self):
+        if not self.closed:
+            with self.lock:
+                self.raw.close()
+        super().close()
+
+
+class ArchiveStorage(Storage):
+    """
+    An ArchiveStorage reads derivatives from within an archive, without
+    extracting it. The archive's member index is read once, into an
+    in-memory tree that answers every listing; files are only read from
+    the archive when opened.
+    """
+
+    def __init__(self, archive: Union[str, Path]):
+        """
+        Initialize the ArchiveStorage class, reading the archive's index.
+
+        Parameters
+        ----------
+        archive : Union[str, Path]
+            The archive's path.
+        """
+        self.archive = Path(archive)
+        stat = os.stat(self.archive)
+        self._stat = EntryStat(stat.st_size, stat.st_mtime_ns)
+        #: Directories mapped to their sub-directories and files.
+        self._directories: Dict[str, Tuple[Set[str], Dict[str, EntryStat]]]
+        self._directories = {"": (set(), {})}
+        #: File paths mapped to their members.
+        self._members = {}
+        # Members share the archive's file object, so are read one at a
+        # time (reentrantly, by the readers :meth:`open` returns).
+        self._lock = threading.RLock()
+        self.read_index()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({str(self.archive)!r})"
+
+    def read_index(self):
+        """
+        Read the archive's member index, adding members with
+        :meth:`add_member`.
+        """
+        raise NotImplementedError
+
+    def add_member(
+        self, name: str, is_dir: bool, size: int = 0, mtime_ns: int = None
+    ):
+        """
+        Add a member of the archive to the tree, along with its parent
+        directories (which archives do not necessarily list).
+        """
+        path = normalize_path(name)
+        if not path:
+            return
+        if is_dir:
+            self.add_directory(path)
+        else:
+            parent, _, filename = path.rpartition("/")
+            self.add_directory(parent)[1][filename] = EntryStat(size, mtime_ns)
+
+    def add_directory(self, path: str) -> Tuple[Set[str], dict]:
+        """
+        Add a directory (and its parents) to the tree.
+        """
+        directory = self._directories.get(path)
+        if directory is None:
+            directory = self._directories[path] = (set(), {})
+            parent, _, name = path.rpartition("/")
+            self.add_directory(parent)[0].add(name)
+        return directory
+
+    def scan_directory(self, path: Union[str, Path], stat: bool = False):
+        key = normalize_path(path)
+        directory = self._directories.get(key)
+        if directory is None and self.get_entry(key) is not None:
+            raise NotADirectoryError(
+                NOT_A_DIRECTORY.format(path=path, storage=self)
+            )
+        if directory is None:
+            raise FileNotFoundError(
+                PATH_MISSING.format(path=path, storage=self)
+            )
+        subdirectories, files = directory
+        return list(subdirectories), [
+            (name, entry if stat else None) for name, entry in files.items()
+        ]
+
+    def get_entry(self, path: Union[str, Path]) -> Optional[EntryStat]:
+        key = normalize_path(path)
+        if key in self._directories:
+            # Directories take the archive's own modification time, which
+            # changes whenever any of their content may have.
+            return EntryStat(0, self._stat.st_mtime_ns)
+        parent, _, name = key.rpartition("/")
+        directory = self._directories.get(parent)
+        return None if directory is None else directory[1].get(name)
+
+    def get_stamp(self, path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+        if self.get_entry(path) is None:
+            return None
+        return self._stat.st_mtime_ns, self._stat.st_size
+
+    def get_member_name(self, path: Union[str, Path]) -> str:
+        """
+        Get the name of a file's member of the archive.
+
+        Raises
+        ------
+        FileNotFoundError
+            If no file exists at *path*.
+        """
+        key = normalize_path(path)
+        if key in self._directories or self.get_entry(key) is None:
+            raise FileNotFoundError(
+                PATH_MISSING.format(path=path, storage=self)
+            )
+        return self._members[key]
+
+    def read_bytes(self, path: Union[str, Path], size: int = -1) -> bytes:
+        with self._lock, self.open(path) as f:
+            return f.read(size)
+
+
+class TarStorage(ArchiveStorage):
+    """
+    A TarStorage reads derivatives from a (possibly compressed) tar
+    archive. Uncompressed archives are read by seeking from header to
+    header; compressed ones have to be decompressed once to be indexed.
+    """
+
+    def read_index(self):
+        self._tar = tarfile.open(self.archive)
+        for member in self._tar:
+            if not (member.isdir() or member.isfile()):
+                continue
+            self.add_member(
+                member.name,
+                member.isdir(),
+                member.size,
+                int(member.mtime * 1e9),
+            )
+            self._members[normalize_path(member.name)] = member
+        # Do not keep every member in memory twice.
+        self._tar.members = []
+
+    def open(self, path: Union[str, Path]) -> BinaryIO:
+        """
+        Open a file for binary reading. The archive's file object is
+        shared, so the file is read under the archive's lock (see
+        *LockedReader*) and may be read concurrently with others.
+        """
+        name = self.get_member_name(path)
+        with self._lock:
+            raw = self._tar.extractfile(name)
+        return io.BufferedReader(LockedReader(raw, self._lock))
+
+    def close(self):
+        """
+        Close the archive.
+        """
+        self._tar.close()
+
+
+class ZipStorage(ArchiveStorage):
+    """
+    A ZipStorage reads derivatives from a zip archive, whose member index
+    (its central directory) is read with a single seek.
+    """
+
+    def read_index(self):
+        self._zip = zipfile.ZipFile(self.archive)
+        for member in self._zip.infolist():
+            mtime = datetime(*member.date_time).timestamp()
+            self.add_member(
+                member.filename,
+                member.is_dir(),
+                member.file_size,
+                int(mtime * 1e9),
+            )
+            self._members[normalize_path(member.filename)] = member
+
+    def open(self, path: Union[str, Path]) -> BinaryIO:
+        return self._zip.open(self.get_member_name(path))
+
+    def close(self):
+        """
+        Close the archive.
+        """
+        self._zip.close()
+
+
+def open_archive(archive: Union[str, Path]) -> ArchiveStorage:
+    """
+    Open a zip or tar archive of derivatives as a storage.
+
+    Raises
+    ------
+    ValueError
+        If the archive is neither a zip nor a tar file.
+    """
+    if zipfile.is_zipfile(archive):
+        return ZipStorage(archive)
+    if tarfile.is_tarfile(archive):
+        return TarStorage(archive)
+    raise ValueError(UNKNOWN_ARCHIVE.format(path=archive))
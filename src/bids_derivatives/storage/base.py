@@ -0,0 +1,91 @@
+import os
+from pathlib import Path
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple, Union
+
+from bids_derivatives.utils.serialization import loads_json
+
+
+class EntryStat(NamedTuple):
+    """
+    The size and modification time of an entry of a non-local storage,
+    standing in for *os.stat_result*.
+    """
+
+    st_size: int
+    st_mtime_ns: Optional[int]
+
+
+class Storage:
+    """
+    A Storage is where BIDS-App derivatives are read from. Paths are given
+    as POSIX paths, relative to the storage's root for non-local storages.
+    Subclasses implement :meth:`scan_directory`, :meth:`get_entry` and
+    :meth:`open`.
+    """
+
+    #: Whether paths are paths of the local filesystem.
+    local = False
+
+    def scan_directory(
+        self, path: Union[str, Path], stat: bool = False
+    ) -> Tuple[List[str], List[Tuple[str, Optional[EntryStat]]]]:
+        """
+        List a directory's entries (see
+        :func:`bids_derivatives.utils.scanner.scan_directory`).
+
+        Raises
+        ------
+        FileNotFoundError
+            If the directory does not exist.
+        """
+        raise NotImplementedError
+
+    def get_entry(self, path: Union[str, Path]) -> Optional[EntryStat]:
+        """
+        Get the size and modification time of a path, or None if it does
+        not exist (directories have a size of 0).
+        """
+        raise NotImplementedError
+
+    def open(self, path: Union[str, Path]) -> BinaryIO:
+        """
+        Open a file for binary reading.
+        """
+        raise NotImplementedError
+
+    def exists(self, path: Union[str, Path]) -> bool:
+        """
+        Whether a path exists.
+        """
+        return self.get_entry(path) is not None
+
+    def get_stamp(self, path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+        """
+        Get a stamp identifying the current state of a path (see
+        :func:`bids_derivatives.utils.cache.get_stamp`).
+        """
+        entry = self.get_entry(path)
+        return None if entry is None else (entry.st_mtime_ns, entry.st_size)
+
+    def read_bytes(self, path: Union[str, Path], size: int = -1) -> bytes:
+        """
+        Read a file's content, or its first *size* bytes.
+        """
+        with self.open(path) as f:
+            return f.read(size)
+
+    def read_json(self, path: Union[str, Path]) -> dict:
+        """
+        Read a JSON file.
+        """
+        return loads_json(self.read_bytes(path))
+
+
+def normalize_path(path: Union[str, Path]) -> str:
+    """
+    Normalize a path relative to a storage's root (e.g. *./sub-1/* to
+    *sub-1*), the root itself being an empty string.
+    """
+    path = os.fspath(path).replace("\\", "/")
+    parts = [part for part in path.split("/") if part not in ("", ".")]
+    return "/".join(parts)
@@ -0,0 +1,43 @@
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple, Union
+
+from bids_derivatives.storage.base import EntryStat, Storage
+from bids_derivatives.utils.cache import get_stamp
+from bids_derivatives.utils.scanner import scan_directory
+
+
+class LocalStorage(Storage):
+    """
+    A LocalStorage reads derivatives from the local filesystem.
+    """
+
+    local = True
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self)
+
+    def __hash__(self) -> int:
+        return hash(type(self))
+
+    def scan_directory(self, path: Union[str, Path], stat: bool = False):
+        return scan_directory(path, stat=stat)
+
+    def get_entry(self, path: Union[str, Path]):
+        stamp = get_stamp(path)
+        return None if stamp is None else EntryStat(stamp[1], stamp[0])
+
+    def get_stamp(self, path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+        return get_stamp(path)
+
+    def exists(self, path: Union[str, Path]) -> bool:
+        return Path(path).exists()
+
+    def open(self, path: Union[str, Path]) -> BinaryIO:
+        return open(path, "rb")
+
+
+#: The storage of derivatives on the local filesystem.
+LOCAL_STORAGE = LocalStorage()
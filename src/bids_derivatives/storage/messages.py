@@ -0,0 +1,7 @@
+#: Storage messages
+
+PATH_MISSING = "{path} does not exist in {storage}."
+
+NOT_A_DIRECTORY = "{path} is not a directory in {storage}."
+
+UNKNOWN_ARCHIVE = "Unsupported archive {path}; expected a .zip file or a tar file (optionally compressed)."
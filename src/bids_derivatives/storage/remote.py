@@ -0,0 +1,76 @@
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+from bids_derivatives.storage.base import EntryStat, Storage, normalize_path
+
+
+class FsspecStorage(Storage):
+    """
+    An FsspecStorage reads derivatives through an fsspec-style filesystem
+    (e.g. *fsspec.filesystem("s3")*), i.e. any object providing
+    *ls(path, detail=True)*, *info(path)* and *open(path, "rb")*.
+    Directories are listed with a single *ls* call, whose details also
+    provide files' sizes (and modification times, where available).
+    """
+
+    def __init__(self, filesystem, root: str = ""):
+        """
+        Initialize the FsspecStorage class.
+
+        Parameters
+        ----------
+        filesystem : fsspec.AbstractFileSystem
+            The filesystem.
+        root : str, optional
+            The path (e.g. a bucket) relative paths are resolved from, by
+            default "" (the filesystem's root).
+        """
+        self.filesystem = filesystem
+        self.root = root.rstrip("/")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.filesystem!r}, {self.root!r})"
+
+    def get_path(self, path: Union[str, Path]) -> str:
+        """
+        Get the filesystem's path of a path relative to the root.
+        """
+        path = normalize_path(path)
+        if not self.root:
+            return path
+        return f"{self.root}/{path}" if path else self.root
+
+    @staticmethod
+    def get_entry_stat(info: dict) -> EntryStat:
+        """
+        Convert an fsspec entry's details to an EntryStat.
+        """
+        mtime = info.get("mtime")
+        if hasattr(mtime, "timestamp"):
+            mtime = mtime.timestamp()
+        return EntryStat(
+            info.get("size") or 0,
+            None if mtime is None else int(mtime * 1e9),
+        )
+
+    def scan_directory(self, path: Union[str, Path], stat: bool = False):
+        directories, files = [], []
+        for info in self.filesystem.ls(self.get_path(path), detail=True):
+            name = info["name"].rstrip("/").rpartition("/")[2]
+            if info["type"] == "directory":
+                directories.append(name)
+            else:
+                files.append(
+                    (name, self.get_entry_stat(info) if stat else None)
+                )
+        return directories, files
+
+    def get_entry(self, path: Union[str, Path]) -> Optional[EntryStat]:
+        try:
+            info = self.filesystem.info(self.get_path(path))
+        except FileNotFoundError:
+            return None
+        return self.get_entry_stat(info)
+
+    def open(self, path: Union[str, Path]) -> BinaryIO:
+        return self.filesystem.open(self.get_path(path), "rb")
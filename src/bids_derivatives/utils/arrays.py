@@ -0,0 +1,22 @@
+from bids_derivatives.utils.messages import NUMPY_MISSING
+
+
+def require_numpy(feature: str):
+    """
+    Import numpy (only once an array is needed, as it is optional).
+
+    Parameters
+    ----------
+    feature : str
+        The feature requiring numpy, for the error message.
+
+    Raises
+    ------
+    ImportError
+        If numpy is not installed.
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(NUMPY_MISSING.format(feature=feature)) from e
+    return numpy
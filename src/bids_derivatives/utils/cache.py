@@ -0,0 +1,131 @@
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple, Union
+
+from bids_derivatives.utils.instrumentation import instrumented
+
+#: Paths modified this recently (in nanoseconds) are treated as stale, so
+#: that changes made within the filesystem's mtime granularity are not
+#: missed.
+RACY_WINDOW = 2_000_000_000
+
+
+@instrumented("stat")
+def get_stamp(path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    """
+    Get a stamp identifying the current state of a file or directory.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The file or directory.
+
+    Returns
+    -------
+    Optional[Tuple[int, int]]
+        The path's modification time and size, or None if it is missing.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class QueryCache:
+    """
+    A QueryCache memoizes the results of filesystem queries.
+    Cached results are dropped when explicitly invalidated, when they are
+    older than the cache's time-to-live, or when the modification time of
+    the file or directory they were read from changes.
+    """
+
+    __slots__ = ("ttl", "check_mtime", "get_stamp", "_entries")
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        check_mtime: bool = True,
+        get_stamp: Callable[[Any], Optional[Tuple[int, int]]] = get_stamp,
+    ):
+        """
+        Initialize the QueryCache class.
+
+        Parameters
+        ----------
+        ttl : Optional[float], optional
+            Number of seconds after which cached results expire, by default
+            None (never expire).
+        check_mtime : bool, optional
+            Whether to recompute results whose source path was modified
+            since they were cached (at the cost of a single stat per
+            access), by default True
+        get_stamp : Callable[[Any], Optional[Tuple[int, int]]], optional
+            The function stamping source paths, by default *get_stamp*
+            (i.e. their local modification time and size).
+        """
+        self.ttl = ttl
+        self.check_mtime = check_mtime
+        self.get_stamp = get_stamp
+        self._entries = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        path: Union[str, Path] = None,
+    ) -> Any:
+        """
+        Get a cached result, computing it if it is missing or stale.
+
+        Parameters
+        ----------
+        key : str
+            The result's key.
+        compute : Callable[[], Any]
+            A function computing the result.
+        path : Union[str, Path], optional
+            The file or directory the result is read from, by default None
+
+        Returns
+        -------
+        Any
+            The (possibly cached) result.
+        """
+        stamp = (
+            self.get_stamp(path)
+            if path is not None and self.check_mtime
+            else None
+        )
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, created, cached_stamp = entry
+            expired = (
+                self.ttl is not None and time.monotonic() - created > self.ttl
+            )
+            if not expired and stamp == cached_stamp:
+                return value
+        value = compute()
+        if stamp is not None and time.time_ns() - stamp[0] < RACY_WINDOW:
+            stamp = ()
+        self._entries[key] = (value, time.monotonic(), stamp)
+        return value
+
+    def invalidate(self, *keys: str):
+        """
+        Drop cached results.
+
+        Parameters
+        ----------
+        *keys : str
+            The keys of the results to drop; all results are dropped if
+            none are given.
+        """
+        if not keys:
+            self._entries.clear()
+        for key in keys:
+            self._entries.pop(key, None)
@@ -0,0 +1,72 @@
+import contextvars
+import os
+from functools import partial
+from typing import Callable, Iterable, List
+
+from bids_derivatives.utils.messages import UNKNOWN_BACKEND
+
+#: Executors available for concurrent scans, by their name in
+#: *concurrent.futures* (imported and resolved on use, as sequential calls
+#: need neither, and process pools import *multiprocessing*).
+BACKENDS = {"thread": "ThreadPoolExecutor", "process": "ProcessPoolExecutor"}
+
+
+def map_ordered(
+    function: Callable,
+    items: Iterable,
+    max_workers: int = 1,
+    backend: str = "thread",
+) -> List:
+    """
+    Apply a function to each item, optionally concurrently, returning the
+    results in the order of the items.
+
+    Parameters
+    ----------
+    function : Callable
+        The function to apply. Must be picklable for the *process*
+        backend (i.e. defined at a module's top level).
+    items : Iterable
+        The items to apply the function to.
+    max_workers : int, optional
+        The maximal number of concurrent workers, by default 1 (apply the
+        function sequentially in the calling thread). None lets the
+        executor decide.
+    backend : str, optional
+        Either *thread* or *process*, by default *thread*.
+
+    Returns
+    -------
+    List
+        The function's results.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(
+            UNKNOWN_BACKEND.format(backend=backend, backends=list(BACKENDS))
+        )
+    items = list(items)
+    if max_workers == 1 or len(items) < 2:
+        return [function(item) for item in items]
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(items) // (workers * 4))
+    if backend == "thread":
+        # Let instrumentation recorders of the caller's context record
+        # calls made in the workers.
+        function = partial(
+            run_in_context, contextvars.copy_context(), function
+        )
+    import concurrent.futures
+
+    executor_class = getattr(concurrent.futures, BACKENDS[backend])
+    with executor_class(max_workers=max_workers) as executor:
+        return list(executor.map(function, items, chunksize=chunksize))
+
+
+def run_in_context(
+    context: contextvars.Context, function: Callable, item: object
+):
+    """
+    Apply a function to an item in a copy of a context (a context may only
+    be entered by one thread at a time).
+    """
+    return context.copy().run(function, item)
@@ -0,0 +1,30 @@
+from bids_derivatives.utils.instrumentation import instrumented
+from bids_derivatives.utils.templates.bids import ENTITY_NAMES, ENTITY_PATTERN
+
+
+@instrumented("parse_entities")
+def parse_entities(filename: str) -> dict:
+    """
+    Parse the BIDS entities of a file name.
+
+    Parameters
+    ----------
+    filename : str
+        The file's name (e.g. *sub-1_desc-preproc_T1w.nii.gz*).
+
+    Returns
+    -------
+    dict
+        The file's key-value entities, along with its *suffix* and
+        *extension* (when available).
+    """
+    stem, dot, extension = filename.partition(".")
+    entities = {}
+    for key, value, suffix in ENTITY_PATTERN.findall(stem):
+        if suffix:
+            entities["suffix"] = suffix
+        else:
+            entities[ENTITY_NAMES.get(key, key)] = value
+    if dot:
+        entities["extension"] = dot + extension
+    return entities
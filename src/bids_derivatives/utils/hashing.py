@@ -0,0 +1,56 @@
+import hashlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Union
+
+if TYPE_CHECKING:
+    from bids_derivatives.storage.base import Storage
+
+#: The algorithm files' contents are hashed with.
+HASH_ALGORITHM = "sha256"
+
+#: The number of bytes read at a time when hashing files.
+CHUNK_SIZE = 1024 * 1024
+
+
+def read_chunks(
+    path: Union[str, Path], storage: "Storage" = None
+) -> Iterator[memoryview]:
+    """
+    Read a file in chunks of *CHUNK_SIZE* bytes. Local files are read into
+    a single reused buffer, whose views are only valid until the next
+    chunk is read. (Files are not memory-mapped: one truncated while it is
+    read would crash the interpreter with SIGBUS.)
+    """
+    if storage is not None and not storage.local:
+        with storage.open(path) as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                yield memoryview(chunk)
+        return
+    buffer = bytearray(CHUNK_SIZE)
+    with open(path, "rb", buffering=0) as f, memoryview(buffer) as view:
+        for size in iter(lambda: f.readinto(buffer), 0):
+            with view[:size] as chunk:
+                yield chunk
+
+
+def hash_file(path: Union[str, Path], storage: "Storage" = None) -> str:
+    """
+    Hash a file's content, read in chunks of *CHUNK_SIZE* bytes.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The file.
+    storage : Storage, optional
+        The storage to read the file from, by default None (the local
+        filesystem).
+
+    Returns
+    -------
+    str
+        The content's hexadecimal digest (see *HASH_ALGORITHM*).
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    for chunk in read_chunks(path, storage):
+        digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional
+
+from bids_derivatives.utils.messages import INSTRUMENTATION_SUMMARY
+
+#: The recorders of the current context, innermost last.
+_RECORDERS = ContextVar("recorders", default=())
+
+
+class Recorder:
+    """
+    A Recorder counts and times the filesystem calls and parsing steps
+    performed while it is active (see :func:`instrument`).
+    """
+
+    def __init__(self, label: Optional[str] = None):
+        """
+        Initialize the Recorder class.
+
+        Parameters
+        ----------
+        label : Optional[str], optional
+            A name for what is being recorded (e.g. a query or a
+            subject), by default None
+        """
+        self.label = label
+        self.counts: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        operations = ", ".join(
+            f"{operation}={count}" for operation, count in self.counts.items()
+        )
+        return f"{type(self).__name__}({self.label!r}: {operations})"
+
+    def add(self, operation: str, seconds: float = 0.0, count: int = 1):
+        """
+        Record operations.
+
+        Parameters
+        ----------
+        operation : str
+            The operation's name (e.g. *scandir* or *json*).
+        seconds : float, optional
+            The time the operations took, by default 0.0
+        count : int, optional
+            The number of operations, by default 1
+        """
+        with self._lock:
+            self.counts[operation] = self.counts.get(operation, 0) + count
+            self.seconds[operation] = (
+                self.seconds.get(operation, 0.0) + seconds
+            )
+
+    def as_dict(self) -> Dict[str, dict]:
+        """
+        Get the recorded operations' counts and total durations, e.g. to
+        export them to a monitoring system.
+        """
+        return {
+            operation: {"count": count, "seconds": self.seconds[operation]}
+            for operation, count in self.counts.items()
+        }
+
+    @property
+    def total_seconds(self) -> float:
+        """
+        Get the total time of the recorded operations.
+        """
+        return sum(self.seconds.values())
+
+
+@contextmanager
+def instrument(
+    label: Optional[str] = None, logger: Optional[logging.Logger] = None
+) -> Iterator[Recorder]:
+    """
+    Record the operations performed within a block. Recorders may be
+    nested (e.g. a recorder per subject within one for a whole query), in
+    which case operations are recorded by all of them.
+
+    Parameters
+    ----------
+    label : Optional[str], optional
+        A name for what is being recorded, by default None
+    logger : Optional[logging.Logger], optional
+        A logger (e.g. a BIDSDerivative's) to emit the recorded operations
+        to at DEBUG level on exit, by default None
+
+    Yields
+    ------
+    Recorder
+        The block's recorder.
+    """
+    recorder = Recorder(label)
+    token = _RECORDERS.set(_RECORDERS.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _RECORDERS.reset(token)
+        if logger is not None and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                INSTRUMENTATION_SUMMARY.format(
+                    label=label or "block",
+                    seconds=recorder.total_seconds,
+                    operations=recorder.as_dict(),
+                )
+            )
+
+
+def count(operation: str, number: int = 1):
+    """
+    Count operations whose duration is not measured (e.g. listings that
+    are consumed lazily).
+    """
+    for recorder in _RECORDERS.get():
+        recorder.add(operation, count=number)
+
+
+@contextmanager
+def timed(operation: str) -> Iterator[None]:
+    """
+    Count and time an operation, if any recorder is active.
+    """
+    recorders = _RECORDERS.get()
+    if not recorders:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        for recorder in recorders:
+            recorder.add(operation, seconds)
+
+
+def instrumented(operation: str) -> Callable[[Callable], Callable]:
+    """
+    Decorate a function so that its calls are counted and timed as
+    *operation*, at the cost of a single context lookup when no recorder
+    is active.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            recorders = _RECORDERS.get()
+            if not recorders:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                for recorder in recorders:
+                    recorder.add(operation, seconds)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,44 @@
+import importlib
+import sys
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+def lazy_exports(
+    package: str, exports: Dict[str, Sequence[str]]
+) -> Tuple[List[str], Callable, Callable]:
+    """
+    Build a package's public names and module-level ``__getattr__`` and
+    ``__dir__``, so that each name's module is only imported once the
+    name is first accessed (see PEP 562).
+
+    Parameters
+    ----------
+    package : str
+        The package's name (i.e. its ``__name__``).
+    exports : Dict[str, Sequence[str]]
+        The modules' full names mapped to the public names they define.
+
+    Returns
+    -------
+    Tuple[List[str], Callable, Callable]
+        The package's ``__all__``, ``__getattr__`` and ``__dir__``.
+    """
+    modules = {
+        name: module for module, names in exports.items() for name in names
+    }
+
+    def __getattr__(name: str):
+        module = modules.get(name)
+        if module is None:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}"
+            )
+        value = getattr(importlib.import_module(module), name)
+        # Later accesses find the name without calling __getattr__.
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted({*vars(sys.modules[package]), *modules})
+
+    return list(modules), __getattr__, __dir__
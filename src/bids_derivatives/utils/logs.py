@@ -1,4 +1,5 @@
 import logging
+from functools import lru_cache
 from typing import Union
 
 LOGGER_CONFIG = dict(
@@ -7,22 +8,34 @@ LOGGER_CONFIG = dict(
 )
 
 
-def set_logger(name: str, verbosity: Union[str, int] = 0):
+@lru_cache(maxsize=None)
+def configure_logging():
+    """
+    Configure the root logger (see *LOGGER_CONFIG*), once per process
+    rather than once per instance.
     """
+    logging.basicConfig(**LOGGER_CONFIG)
 
 
+def set_logger(name: str, verbosity: Union[str, int] = 0):
+    """
+    Get a named logger, set to the given verbosity.
+
     Parameters
     ----------
+    name : str
+        The logger's name.
     verbosity : Union[str, int], optional
-        _description_, by default 0
+        The logger's level, either a name (e.g. *error*) or a number, by
+        default 0 (inherit the root logger's level)
 
     Returns
     -------
-    _type_
-        _description_
+    logging.Logger
+        The logger.
     """
+    configure_logging()
     logger = logging.getLogger(name)
-    logging.basicConfig(**LOGGER_CONFIG)
     verbosity = (
         getattr(logging, verbosity.upper(), None)
         if isinstance(verbosity, str)
@@ -0,0 +1,11 @@
+#: Utilities messages
+
+UNKNOWN_BACKEND = (
+    "Unknown concurrency backend {backend}; expected one of {backends}."
+)
+
+INSTRUMENTATION_SUMMARY = (
+    "{label} took {seconds:.6f}s in recorded operations: {operations}"
+)
+
+NUMPY_MISSING = "{feature} requires numpy; install it with `pip install bids_derivatives[numpy]`."
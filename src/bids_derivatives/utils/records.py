@@ -0,0 +1,109 @@
+import sys
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+    """
+    Intern a string, so that equal strings share a single object.
+    """
+    return None if value is None else sys.intern(value)
+
+
+class FileRecord:
+    """
+    A FileRecord is a compact record of a single derivative file.
+    Its directory, subject, session and datatype are interned strings
+    shared with every other file of the same directory, and its Path is
+    only materialized on demand.
+
+    On a synthetic qsiprep tree (see *benchmarks/bench_memory.py*), these
+    records retain about 186 bytes per file (file name included), against
+    about 209 bytes for named tuples holding full relative paths, and 235
+    (Python 3.11) to 291 (Python 3.8) bytes for the same class without
+    __slots__.
+    """
+
+    __slots__ = (
+        "directory",
+        "name",
+        "subject",
+        "session",
+        "datatype",
+        "size",
+        "mtime_ns",
+    )
+
+    def __init__(
+        self,
+        directory: str,
+        name: str,
+        subject: Optional[str] = None,
+        session: Optional[str] = None,
+        datatype: Optional[str] = None,
+        size: Optional[int] = None,
+        mtime_ns: Optional[int] = None,
+    ):
+        """
+        Initialize the FileRecord class.
+
+        Parameters
+        ----------
+        directory : str
+            The file's directory, relative to the derivatives' base
+            directory (interned).
+        name : str
+            The file's name.
+        subject : Optional[str], optional
+            The label of the subject whose directory contains the file.
+        session : Optional[str], optional
+            The label of the session whose directory contains the file.
+        datatype : Optional[str], optional
+            The datatype of the file's directory.
+        size : Optional[int], optional
+            The file's size in bytes, if stat-ed.
+        mtime_ns : Optional[int], optional
+            The file's modification time in nanoseconds, if stat-ed.
+        """
+        self.directory = intern(directory)
+        self.name = name
+        self.subject = intern(subject)
+        self.session = intern(session)
+        self.datatype = intern(datatype)
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FileRecord):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __hash__(self) -> int:
+        return hash(self.astuple())
+
+    def __lt__(self, other: "FileRecord") -> bool:
+        return (self.directory, self.name) < (other.directory, other.name)
+
+    def astuple(self) -> Tuple:
+        """
+        Get the record's fields as a tuple.
+        """
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def get_path(self, base_directory: Union[str, Path]) -> Path:
+        """
+        Materialize the file's absolute path.
+        """
+        return Path(base_directory, self.directory, self.name)
+
+    @property
+    def path(self) -> str:
+        """
+        Get the file's path, relative to the derivatives' base directory.
+        """
+        if not self.directory:
+            return self.name
+        return f"{self.directory}/{self.name}"
@@ -0,0 +1,357 @@
+import os
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
+
+from bids_derivatives.utils.concurrency import map_ordered
+from bids_derivatives.utils.instrumentation import count, instrumented
+from bids_derivatives.utils.records import FileRecord
+from bids_derivatives.utils.templates.bids import (
+    DATATYPES,
+    SESSION_PATTERN,
+    SUBJECT_PATTERN,
+    SUBJECT_TEMPLATE,
+)
+
+if TYPE_CHECKING:
+    from bids_derivatives.storage.base import Storage
+
+
+class DerivativeScan(NamedTuple):
+    """
+    The result of a single pass over a BIDS-App's derivatives directory.
+    """
+
+    #: Subject labels mapped to their (sorted) session labels.
+    subjects: Dict[str, List[str]]
+    files: List[FileRecord]
+
+
+def match_label(pattern: Pattern, name: str) -> Optional[str]:
+    """
+    Extract the label of a BIDS directory name (e.g. *sub-1* or *ses-1*).
+
+    Parameters
+    ----------
+    pattern : Pattern
+        Either *SUBJECT_PATTERN* or *SESSION_PATTERN*.
+    name : str
+        The directory's name.
+
+    Returns
+    -------
+    Optional[str]
+        The label, or None if *name* does not match *pattern*.
+    """
+    match = pattern.fullmatch(name)
+    return match.group(1) if match else None
+
+
+def locate(path: str) -> Tuple[str, str]:
+    """
+    Get the subject and session (empty if none) of a file from its
+    relative path.
+    """
+    parts = path.split("/")
+    subject = match_label(SUBJECT_PATTERN, parts[0])
+    session = (
+        match_label(SESSION_PATTERN, parts[1]) if len(parts) > 2 else None
+    )
+    return subject, session or ""
+
+
+@instrumented("scandir")
+def scan_directory(
+    path: Union[str, Path], stat: bool = False
+) -> Tuple[List[str], List[Tuple[str, Optional[os.stat_result]]]]:
+    """
+    List a directory's entries with a single *os.scandir* call.
+    Entry types are taken from the directory listing itself, so no
+    additional stat calls are issued unless *stat* is requested.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The directory to list.
+    stat : bool, optional
+        Whether to stat files for their size and modification time,
+        by default False
+
+    Returns
+    -------
+    Tuple[List[str], List[Tuple[str, Optional[os.stat_result]]]]
+        The names of the sub-directories, and the names (and stat
+        results, if requested) of the files.
+    """
+    directories, files = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                directories.append(entry.name)
+            else:
+                files.append((entry.name, entry.stat() if stat else None))
+    return directories, files
+
+
+def get_scanner(storage: "Storage" = None) -> Callable:
+    """
+    Get the function listing directories of a storage (see
+    :func:`scan_directory`), defaulting to the local filesystem.
+    """
+    return scan_directory if storage is None else storage.scan_directory
+
+
+def scan_labels(
+    path: Union[str, Path], pattern: Pattern, storage: "Storage" = None
+) -> List[str]:
+    """
+    List the labels of a directory's BIDS sub-directories.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The directory to list.
+    pattern : Pattern
+        Either *SUBJECT_PATTERN* or *SESSION_PATTERN*.
+    storage : Storage, optional
+        The storage to list the directory from, by default None (the
+        local filesystem).
+
+    Returns
+    -------
+    List[str]
+        The sorted labels of the sub-directories that match *pattern*.
+    """
+    directories, _ = get_scanner(storage)(path)
+    labels = (match_label(pattern, name) for name in directories)
+    return sorted(label for label in labels if label is not None)
+
+
+def iter_labels(
+    path: Union[str, Path], pattern: Pattern, storage: "Storage" = None
+) -> Iterator[str]:
+    """
+    Yield the labels of a directory's BIDS sub-directories as they are
+    listed, without waiting for the whole listing (and in no particular
+    order).
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The directory to list.
+    pattern : Pattern
+        Either *SUBJECT_PATTERN* or *SESSION_PATTERN*.
+    storage : Storage, optional
+        The storage to list the directory from, by default None (the
+        local filesystem).
+
+    Yields
+    ------
+    str
+        The labels of the sub-directories that match *pattern*.
+    """
+    if storage is not None and not storage.local:
+        yield from scan_labels(path, pattern, storage)
+        return
+    count("scandir")
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                label = match_label(pattern, entry.name)
+                if label is not None:
+                    yield label
+
+
+def scan_subjects(
+    base_directory: Union[str, Path], storage: "Storage" = None
+) -> List[str]:
+    """
+    List the subjects of a BIDS-App's derivatives directory.
+    """
+    return scan_labels(base_directory, SUBJECT_PATTERN, storage)
+
+
+def scan_sessions(
+    subject_directory: Union[str, Path], storage: "Storage" = None
+) -> List[str]:
+    """
+    List the sessions of a single subject's derivatives directory.
+    """
+    return scan_labels(subject_directory, SESSION_PATTERN, storage)
+
+
+def to_records(
+    relative: str,
+    entries: Iterable[Tuple[str, Optional[os.stat_result]]],
+    subject: Optional[str],
+    session: Optional[str],
+) -> Iterator[FileRecord]:
+    """
+    Build the records of a directory's files (see :func:`scan_directory`),
+    the directory's name giving their datatype if it is one.
+    """
+    datatype = relative.rpartition("/")[2]
+    datatype = datatype if datatype in DATATYPES else None
+    for filename, result in entries:
+        yield FileRecord(
+            relative,
+            filename,
+            subject,
+            session,
+            datatype,
+            result.st_size if result else None,
+            result.st_mtime_ns if result else None,
+        )
+
+
+def walk_subject(
+    base_directory: Union[str, Path],
+    name: str,
+    stat: bool = False,
+    storage: "Storage" = None,
+) -> Tuple[List[str], List[FileRecord]]:
+    """
+    Walk a single subject's derivatives directory.
+
+    Parameters
+    ----------
+    base_directory : Union[str, Path]
+        The base directory of the BIDS-App's derivatives.
+    name : str
+        The name of the subject's directory (e.g. *sub-1*).
+    stat : bool, optional
+        Whether to stat files for their size and modification time,
+        by default False
+    storage : Storage, optional
+        The storage to walk the directory from, by default None (the
+        local filesystem).
+
+    Returns
+    -------
+    Tuple[List[str], List[FileRecord]]
+        The subject's sorted sessions, and the files found.
+    """
+    base_directory = Path(base_directory)
+    scan = get_scanner(storage)
+    subject = match_label(SUBJECT_PATTERN, name)
+    sessions, files = set(), []
+    stack = [(name, None)]
+    while stack:
+        relative, session = stack.pop()
+        directories, entries = scan(base_directory / relative, stat=stat)
+        files.extend(to_records(relative, entries, subject, session))
+        for directory in directories:
+            child_session = session
+            if relative == name:
+                label = match_label(SESSION_PATTERN, directory)
+                if label is not None:
+                    sessions.add(label)
+                    child_session = label
+            stack.append((f"{relative}/{directory}", child_session))
+    return sorted(sessions), files
+
+
+def walk_derivative(
+    base_directory: Union[str, Path],
+    stat: bool = False,
+    max_workers: int = 1,
+    backend: str = "thread",
+    storage: "Storage" = None,
+) -> DerivativeScan:
+    """
+    Walk a BIDS-App's derivatives directory once, collecting its subjects,
+    their sessions and the files within the subjects' directories.
+
+    Parameters
+    ----------
+    base_directory : Union[str, Path]
+        The base directory of the BIDS-App's derivatives.
+    stat : bool, optional
+        Whether to stat files for their size and modification time,
+        by default False
+    max_workers : int, optional
+        The number of subjects to walk concurrently, by default 1
+    backend : str, optional
+        Either *thread* or *process*, by default *thread*.
+    storage : Storage, optional
+        The storage to walk the directory from, by default None (the
+        local filesystem). Must be picklable for the *process* backend.
+
+    Returns
+    -------
+    DerivativeScan
+        The subjects, sessions and files found.
+    """
+    root_directories, _ = get_scanner(storage)(base_directory)
+    names = sorted(
+        name
+        for name in root_directories
+        if match_label(SUBJECT_PATTERN, name) is not None
+    )
+    results = map_ordered(
+        partial(walk_subject, base_directory, stat=stat, storage=storage),
+        names,
+        max_workers=max_workers,
+        backend=backend,
+    )
+    subjects, files = {}, []
+    for name, (sessions, subject_files) in zip(names, results):
+        subjects[match_label(SUBJECT_PATTERN, name)] = sessions
+        files.extend(subject_files)
+    files.sort()
+    return DerivativeScan(subjects, files)
+
+
+def scan_all_sessions(
+    base_directory: Union[str, Path],
+    subjects: List[str],
+    max_workers: int = 1,
+    backend: str = "thread",
+    storage: "Storage" = None,
+) -> Dict[str, List[str]]:
+    """
+    List the sessions of several subjects, optionally concurrently.
+
+    Parameters
+    ----------
+    base_directory : Union[str, Path]
+        The base directory of the BIDS-App's derivatives.
+    subjects : List[str]
+        The subjects' labels.
+    max_workers : int, optional
+        The number of subjects to scan concurrently, by default 1
+    backend : str, optional
+        Either *thread* or *process*, by default *thread*.
+    storage : Storage, optional
+        The storage to list the directories from, by default None (the
+        local filesystem).
+
+    Returns
+    -------
+    Dict[str, List[str]]
+        The subjects' labels (in the given order) mapped to their sorted
+        sessions.
+    """
+    base_directory = Path(base_directory)
+    results = map_ordered(
+        partial(scan_sessions, storage=storage),
+        [
+            base_directory / SUBJECT_TEMPLATE.format(subject=subject)
+            for subject in subjects
+        ],
+        max_workers=max_workers,
+        backend=backend,
+    )
+    return dict(zip(subjects, results))
@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+
+from bids_derivatives.utils.cache import RACY_WINDOW, get_stamp
+from bids_derivatives.utils.instrumentation import instrumented
+
+
+@lru_cache(maxsize=None)
+def get_orjson():
+    """
+    Import *orjson* on first use (it imports a dozen modules of its own),
+    or get None if it is not installed.
+    """
+    try:
+        import orjson
+    except ImportError:  # pragma: no cover
+        return None
+    return orjson
+
+
+def loads_json(data: bytes) -> dict:
+    """
+    Parse JSON content, with *orjson* if it is installed. Content *orjson*
+    rejects is parsed again by *json*, which also accepts the *NaN*,
+    *Infinity* and *-Infinity* constants some BIDS-Apps write.
+    """
+    orjson = get_orjson()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+@instrumented("json")
+def read_json(path: Union[str, Path]) -> dict:
+    """
+    Read a JSON file, with *orjson* if it is installed (see
+    :func:`loads_json`).
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The JSON file.
+
+    Returns
+    -------
+    dict
+        The file's content.
+    """
+    with open(path, "rb") as f:
+        return loads_json(f.read())
+
+
+class JSONLoader:
+    """
+    A JSONLoader reads JSON files (e.g. dataset descriptions or sidecars),
+    keeping their parsed content for as long as their
+    modification time and size are unchanged. Loaded contents are shared
+    between callers and should not be modified.
+    """
+
+    def __init__(self, maxsize: int = 1024, maxbytes: Optional[int] = None):
+        """
+        Initialize the JSONLoader class.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            The maximal number of files kept, by default 1024 (the least
+            recently loaded are dropped first).
+        maxbytes : Optional[int], optional
+            The maximal total size of the files kept (as a proxy for the
+            memory their content takes), by default None (unbounded).
+        """
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, path: Union[str, Path]) -> dict:
+        """
+        Load a JSON file, reading it only if it is not cached or was
+        modified since it was cached.
+
+        Parameters
+        ----------
+        path : Union[str, Path]
+            The JSON file.
+
+        Returns
+        -------
+        dict
+            The file's content.
+        """
+        key = str(path)
+        stamp = get_stamp(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and stamp is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                return entry[1]
+        description = self.read(key)
+        with self._lock:
+            self.discard(key)
+            # Files modified within the mtime granularity may change again
+            # without changing their stamp, so are read again next time.
+            if stamp is None or time.time_ns() - stamp[0] < RACY_WINDOW:
+                return description
+            self._entries[key] = (stamp, description)
+            self._bytes += stamp[1]
+            while len(self._entries) > self.maxsize or (
+                self.maxbytes is not None and self._bytes > self.maxbytes
+            ):
+                self.discard(next(iter(self._entries)))
+        return description
+
+    def read(self, path: str):
+        """
+        Read a file's content (overridden to cache other kinds of files).
+        """
+        return read_json(path)
+
+    def discard(self, key: str):
+        """
+        Drop a cached file (the caller holds the lock).
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[0][1]
+
+    def clear(self):
+        """
+        Drop all cached files.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Get the total size of the cached files.
+        """
+        return self._bytes
@@ -1,4 +1,10 @@
 from bids_derivatives.utils.templates.bids import (  # noqa: E401
+    DATASET_DESCRIPTION_FILENAME,
+    DATATYPES,
+    ENTITY_NAMES,
+    ENTITY_PATTERN,
+    SESSION_PATTERN,
     SESSION_TEMPLATE,
+    SUBJECT_PATTERN,
     SUBJECT_TEMPLATE,
 )
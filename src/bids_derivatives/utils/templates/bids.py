@@ -1,2 +1,35 @@
+import re
+
+#: The name of a derivatives directory's dataset description file.
+DATASET_DESCRIPTION_FILENAME = "dataset_description.json"
+
 SUBJECT_TEMPLATE = "sub-{subject}"
 SESSION_TEMPLATE = "ses-{session}"
+
+#: Compiled counterparts of the templates above, for matching many names.
+SUBJECT_PATTERN = re.compile(r"sub-(?P<subject>.+)")
+SESSION_PATTERN = re.compile(r"ses-(?P<session>.+)")
+
+#: Matches the underscore-separated parts of a BIDS file name's stem,
+#: either as a key-value entity or as a bare suffix.
+ENTITY_PATTERN = re.compile(r"([^_-]+)-([^_]+)|([^_]+)")
+
+#: BIDS entity keys that are exposed under their long names.
+ENTITY_NAMES = {"sub": "subject", "ses": "session"}
+
+#: Directory names recognized as BIDS datatypes.
+DATATYPES = (
+    "anat",
+    "beh",
+    "dwi",
+    "eeg",
+    "fmap",
+    "func",
+    "ieeg",
+    "meg",
+    "micr",
+    "motion",
+    "nirs",
+    "perf",
+    "pet",
+)
@@ -0,0 +1,6 @@
+#: Verification messages
+
+UNREADABLE_FILE = "Could not read the file ({error})."
+TRUNCATED_GZIP = "The gzip stream is truncated."
+CORRUPT_GZIP = "The gzip stream is corrupt ({error})."
+MISSING_SIGNATURE = "The file lacks the {format} signature."
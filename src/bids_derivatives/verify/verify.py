@@ -0,0 +1,326 @@
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+from collections import defaultdict
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from bids_derivatives.utils.cache import RACY_WINDOW
+from bids_derivatives.utils.concurrency import map_ordered
+from bids_derivatives.utils.hashing import (
+    CHUNK_SIZE,
+    HASH_ALGORITHM,
+    read_chunks,
+)
+from bids_derivatives.utils.instrumentation import timed
+from bids_derivatives.utils.scanner import DerivativeScan
+from bids_derivatives.verify.messages import (
+    CORRUPT_GZIP,
+    MISSING_SIGNATURE,
+    TRUNCATED_GZIP,
+    UNREADABLE_FILE,
+)
+
+if TYPE_CHECKING:
+    from bids_derivatives.storage.base import Storage
+
+HASHES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT,
+    error TEXT
+);
+"""
+
+#: zlib window bits accepting a gzip header and trailer only.
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+#: Signature of HDF5 files (e.g. ANTs transforms), found at offset 0 or,
+#: after a user block, at a power of two from 512 bytes on.
+HDF5_SIGNATURE = b"\x89HDF\r\n\x1a\n"
+HDF5_OFFSETS = (0, 512, 1024, 2048)
+
+
+class GzipCheck:
+    """
+    Decompress a gzip stream incrementally (discarding its output) to
+    detect truncated or corrupt files. Concatenated members are
+    supported, as by *gzip*.
+    """
+
+    def __init__(self):
+        self.decompressor = zlib.decompressobj(GZIP_WBITS)
+        self.error = None
+
+    def update(self, data: bytes):
+        while data and self.error is None:
+            try:
+                self.decompressor.decompress(data, CHUNK_SIZE)
+            except zlib.error as e:
+                self.error = CORRUPT_GZIP.format(error=e)
+                return
+            if not self.decompressor.eof:
+                data = self.decompressor.unconsumed_tail
+                continue
+            data = self.decompressor.unused_data
+            if data.strip(b"\0"):
+                self.decompressor = zlib.decompressobj(GZIP_WBITS)
+            else:
+                # Trailing zeros are ignored, as by *gzip*.
+                return
+
+    def finish(self) -> Optional[str]:
+        if self.error is None and not self.decompressor.eof:
+            return TRUNCATED_GZIP
+        return self.error
+
+
+class Hdf5Check:
+    """
+    Check that a file carries the HDF5 signature.
+    """
+
+    def __init__(self):
+        self.head = b""
+
+    def update(self, data: bytes):
+        missing = HDF5_OFFSETS[-1] + len(HDF5_SIGNATURE) - len(self.head)
+        if missing > 0:
+            self.head += bytes(data[:missing])
+
+    def finish(self) -> Optional[str]:
+        for offset in HDF5_OFFSETS:
+            if self.head.startswith(HDF5_SIGNATURE, offset):
+                return None
+        return MISSING_SIGNATURE.format(format="HDF5")
+
+
+#: Integrity checks run while hashing files, by file extension.
+INTEGRITY_CHECKS = {".gz": GzipCheck, ".h5": Hdf5Check}
+
+
+def verify_file(
+    path: Union[str, Path], storage: "Storage" = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Hash a file's content and check its integrity in a single read.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        The file's path.
+    storage : Storage, optional
+        The storage to read the file from, by default None (the local
+        filesystem).
+
+    Returns
+    -------
+    Tuple[Optional[str], Optional[str]]
+        The file's digest (see *HASH_ALGORITHM*; None if it could not be
+        read), and the reason it is corrupt (None if it is not).
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    check = INTEGRITY_CHECKS.get(os.path.splitext(str(path))[1])
+    check = check() if check else None
+    try:
+        for chunk in read_chunks(path, storage):
+            digest.update(chunk)
+            if check is not None:
+                check.update(chunk)
+    except OSError as e:
+        return None, UNREADABLE_FILE.format(error=e)
+    return digest.hexdigest(), check.finish() if check else None
+
+
+class HashCache:
+    """
+    A HashCache records the digests (and integrity errors) of files by
+    their path, size and modification time, so that files left unchanged
+    are never hashed twice. It is stored in the database given, or kept
+    in memory if no path is given.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        Initialize the HashCache class.
+
+        Parameters
+        ----------
+        path : Optional[Union[str, Path]], optional
+            The cache's database, by default None (in memory).
+        """
+        self.path = path
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(
+            ":memory:" if path is None else str(path)
+        )
+        with self._connection:
+            self._connection.executescript(HASHES_SCHEMA)
+
+    def __len__(self) -> int:
+        (count,) = self._connection.execute(
+            "SELECT COUNT(*) FROM hashes"
+        ).fetchone()
+        return count
+
+    def get_all(self) -> Dict[str, Tuple[int, int, str, Optional[str]]]:
+        """
+        Get every cached record, as relative paths mapped to their size,
+        modification time, digest and integrity error.
+        """
+        with timed("sqlite"):
+            return {
+                path: tuple(record)
+                for path, *record in self._connection.execute(
+                    "SELECT path, size, mtime_ns, digest, error FROM hashes"
+                )
+            }
+
+    def update(self, records: Iterable[Tuple]):
+        """
+        Record (path, size, mtime_ns, digest, error) tuples. Files
+        modified within the racy window are skipped, as they may still
+        change without their modification time changing.
+        """
+        threshold = time.time_ns() - RACY_WINDOW
+        with timed("sqlite"), self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)",
+                (record for record in records if record[2] < threshold),
+            )
+
+    def prune(self, paths: Iterable[str]):
+        """
+        Drop the records of files that no longer exist.
+        """
+        with timed("sqlite"), self._connection:
+            self._connection.executemany(
+                "DELETE FROM hashes WHERE path = ?",
+                ((path,) for path in paths),
+            )
+
+    def close(self):
+        self._connection.close()
+
+
+class VerificationReport(NamedTuple):
+    """
+    The digests of a BIDS-App's derivative files, along with the files
+    found corrupt or changed since they were last verified.
+    """
+
+    #: Digests by relative path (None for unreadable files).
+    hashes: Dict[str, Optional[str]]
+    #: Reasons files are corrupt, by relative path, by subject.
+    corrupt: Dict[str, Dict[str, str]]
+    #: Relative paths of files whose content changed, by subject.
+    changed: Dict[str, List[str]]
+    #: Number of files hashed (the others' digests were cached).
+    hashed: int
+
+    @property
+    def subjects(self) -> List[str]:
+        """
+        Get the subjects with corrupt or changed files.
+        """
+        return sorted(set(self.corrupt) | set(self.changed))
+
+    @property
+    def is_valid(self) -> bool:
+        """
+        Whether no file is corrupt.
+        """
+        return not self.corrupt
+
+
+def verify_scan(
+    scan: DerivativeScan,
+    base_directory: Union[str, Path],
+    cache: Optional[HashCache] = None,
+    max_workers: int = 1,
+    backend: str = "thread",
+    storage: "Storage" = None,
+) -> VerificationReport:
+    """
+    Verify the files of a walk of a BIDS-App's derivatives, hashing only
+    those that are new or whose size or modification time changed since
+    they were cached.
+
+    Parameters
+    ----------
+    scan : DerivativeScan
+        A walk of the derivatives, with stat-ed files.
+    base_directory : Union[str, Path]
+        The derivatives' base directory.
+    cache : Optional[HashCache], optional
+        The files' cached digests, updated in place, by default None (hash
+        every file).
+    max_workers : int, optional
+        The number of files to hash concurrently, by default 1
+    backend : str, optional
+        Either *thread* or *process*, by default *thread*.
+    storage : Storage, optional
+        The storage to read files from, by default None (the local
+        filesystem). Its files are opened from several threads with the
+        *thread* backend (archives' are read under their lock), and it
+        must be picklable for the *process* backend.
+
+    Returns
+    -------
+    VerificationReport
+        The files' digests, and the corrupt and changed files by subject.
+    """
+    cached = cache.get_all() if cache is not None else {}
+    results, pending = {}, []
+    for record in scan.files:
+        entry = cached.get(record.path)
+        if entry is not None and entry[:2] == (record.size, record.mtime_ns):
+            results[record.path] = entry[2:]
+        else:
+            pending.append(record)
+    if storage is not None and storage.local:
+        storage = None
+    hashed = map_ordered(
+        partial(verify_file, storage=storage),
+        [record.get_path(base_directory) for record in pending],
+        max_workers=max_workers,
+        backend=backend,
+    )
+    changed = defaultdict(list)
+    for record, result in zip(pending, hashed):
+        results[record.path] = result
+        entry = cached.get(record.path)
+        if entry is not None and entry[2] != result[0]:
+            changed[record.subject].append(record.path)
+    if cache is not None:
+        cache.update(
+            (record.path, record.size, record.mtime_ns, *result)
+            for record, result in zip(pending, hashed)
+        )
+        cache.prune(set(cached) - set(results))
+    corrupt = defaultdict(dict)
+    for record in scan.files:
+        error = results[record.path][1]
+        if error is not None:
+            corrupt[record.subject][record.path] = error
+    return VerificationReport(
+        {path: digest for path, (digest, _) in results.items()},
+        dict(corrupt),
+        {subject: sorted(paths) for subject, paths in changed.items()},
+        len(pending),
+    )
@@ -0,0 +1,11 @@
+from bids_derivatives.utils.lazy import lazy_exports
+
+__all__, __getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "bids_derivatives.watch.watcher": [
+            "DerivativeWatcher",
+            "WatchEvent",
+        ],
+    },
+)
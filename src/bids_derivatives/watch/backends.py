@@ -0,0 +1,392 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import re
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set, Union
+
+from bids_derivatives.utils.cache import RACY_WINDOW
+from bids_derivatives.watch.messages import (
+    INOTIFY_FAILED,
+    INOTIFY_UNAVAILABLE,
+    UNKNOWN_WATCH_BACKEND,
+)
+
+#: inotify event masks (see inotify(7)).
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+#: Changes to a directory's entries.
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+#: The fixed-size header of an inotify event (wd, mask, cookie, len).
+EVENT_HEADER = struct.Struct("iIII")
+#: Errors of inotify_add_watch running out of watches (or memory), for
+#: which directories are polled instead.
+WATCH_LIMIT_ERRORS = (errno.ENOSPC, errno.EMFILE, errno.ENOMEM)
+#: Filesystems whose changes made by other hosts inotify is not notified
+#: of, which *auto* polls instead.
+NETWORK_FILESYSTEMS = (
+    "9p",
+    "afs",
+    "ceph",
+    "cifs",
+    "fuse.sshfs",
+    "glusterfs",
+    "gpfs",
+    "lustre",
+    "ncpfs",
+    "nfs",
+    "nfs4",
+    "smb3",
+    "smbfs",
+)
+#: The mounted filesystems of the current process (see proc(5)).
+MOUNTS_PATH = "/proc/self/mounts"
+#: Octal escapes of mount points' spaces, tabs, newlines and backslashes.
+MOUNT_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+
+class PollingBackend:
+    """
+    A PollingBackend detects changed directories by comparing their
+    modification times between polls. Only directories' stats are
+    compared; their entries are left to be listed by the watcher.
+    """
+
+    def __init__(
+        self, base_directory: Union[str, Path], interval: float = 1.0
+    ):
+        """
+        Initialize the PollingBackend class.
+
+        Parameters
+        ----------
+        base_directory : Union[str, Path]
+            The watched tree's base directory.
+        interval : float, optional
+            The number of seconds between polls, by default 1.0
+        """
+        self.base_directory = Path(base_directory)
+        self.interval = interval
+        self._stamps: Dict[str, Optional[int]] = {}
+
+    def __len__(self) -> int:
+        """
+        Get the number of watched directories.
+        """
+        return len(self._stamps)
+
+    def add(self, directory: str):
+        """
+        Start watching a directory, relative to the base directory.
+        """
+        self._stamps[directory] = self.get_stamp(directory)
+
+    def remove(self, directory: str):
+        """
+        Stop watching a directory.
+        """
+        self._stamps.pop(directory, None)
+
+    def get_stamp(self, directory: str) -> Optional[int]:
+        """
+        Get a directory's modification time, or None if it is missing or
+        was modified too recently for further changes to be noticed.
+        """
+        try:
+            mtime_ns = os.stat(self.base_directory / directory).st_mtime_ns
+        except OSError:
+            return None
+        if time.time_ns() - mtime_ns < RACY_WINDOW:
+            return None
+        return mtime_ns
+
+    def poll(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait for directories to change.
+
+        Parameters
+        ----------
+        timeout : Optional[float], optional
+            The maximal number of seconds to wait, by default None (until
+            a change is detected).
+
+        Returns
+        -------
+        Set[str]
+            The changed directories (empty if *timeout* elapsed first).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for directory, stamp in list(self._stamps.items()):
+                current = self.get_stamp(directory)
+                if current is None or current != stamp:
+                    changed.add(directory)
+                    self._stamps[directory] = current
+            if changed:
+                return changed
+            remaining = (
+                self.interval
+                if deadline is None
+                else min(self.interval, deadline - time.monotonic())
+            )
+            if remaining <= 0:
+                return changed
+            time.sleep(remaining)
+
+    def close(self):
+        """
+        Stop watching all directories.
+        """
+        self._stamps.clear()
+
+
+class InotifyBackend:
+    """
+    An InotifyBackend is notified of changed directories by the Linux
+    kernel's inotify API (through ctypes), so that unchanged directories
+    cost nothing between polls. Directories left unwatched once the
+    user's inotify watches run out are polled instead.
+    """
+
+    def __init__(
+        self, base_directory: Union[str, Path], interval: float = 1.0
+    ):
+        """
+        Initialize the InotifyBackend class.
+
+        Parameters
+        ----------
+        base_directory : Union[str, Path]
+            The watched tree's base directory.
+        interval : float, optional
+            The interval in seconds at which directories that could not be
+            watched are polled, by default 1.0
+
+        Raises
+        ------
+        OSError
+            If inotify is not available.
+        """
+        self.base_directory = Path(base_directory)
+        self._libc = load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise self.get_error("initialize", self.base_directory)
+        self._directories: Dict[int, str] = {}
+        self._descriptors: Dict[str, int] = {}
+        self._fallback = PollingBackend(base_directory, interval=interval)
+
+    def get_error(self, action: str, path: Path) -> OSError:
+        """
+        Build an error from the last failed libc call.
+        """
+        error_number = ctypes.get_errno()
+        return OSError(
+            error_number,
+            INOTIFY_FAILED.format(
+                action=action, path=path, error=os.strerror(error_number)
+            ),
+        )
+
+    def add(self, directory: str):
+        """
+        Start watching a directory, relative to the base directory.
+        """
+        path = self.base_directory / directory
+        descriptor = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), WATCH_MASK
+        )
+        if descriptor < 0:
+            error = self.get_error("watch", path)
+            if error.errno not in WATCH_LIMIT_ERRORS:
+                raise error
+            self._fallback.add(directory)
+            return
+        self._directories[descriptor] = directory
+        self._descriptors[directory] = descriptor
+
+    def remove(self, directory: str):
+        """
+        Stop watching a directory (removed directories are dropped by the
+        kernel on its own).
+        """
+        descriptor = self._descriptors.pop(directory, None)
+        if descriptor is not None:
+            self._directories.pop(descriptor, None)
+            self._libc.inotify_rm_watch(self._fd, descriptor)
+        self._fallback.remove(directory)
+
+    def poll(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait for directories to change.
+
+        Parameters
+        ----------
+        timeout : Optional[float], optional
+            The maximal number of seconds to wait, by default None (until
+            a change is notified).
+
+        Returns
+        -------
+        Set[str]
+            The changed directories (empty if *timeout* elapsed first).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = None if deadline is None else deadline - time.monotonic()
+            if self._fallback:
+                # Wake up to poll the directories left unwatched.
+                interval = self._fallback.interval
+                wait = interval if wait is None else min(wait, interval)
+            changed = self.read_events(None if wait is None else max(wait, 0))
+            if self._fallback:
+                changed.update(self._fallback.poll(0))
+            if changed or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                return changed
+
+    def read_events(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait for inotify events, and get the directories they notify the
+        changes of.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed, offset = set(), 0
+        while offset < len(buffer):
+            descriptor, mask, _, length = EVENT_HEADER.unpack_from(
+                buffer, offset
+            )
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: every directory may have changed.
+                changed.update(self._descriptors)
+            elif mask & IN_IGNORED:
+                directory = self._directories.pop(descriptor, None)
+                if self._descriptors.get(directory) == descriptor:
+                    del self._descriptors[directory]
+            elif descriptor in self._directories:
+                changed.add(self._directories[descriptor])
+        return changed
+
+    def close(self):
+        """
+        Stop watching all directories.
+        """
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._directories.clear()
+        self._descriptors.clear()
+        self._fallback.close()
+
+
+def load_libc() -> ctypes.CDLL:
+    """
+    Load the C library, if it provides inotify.
+
+    Raises
+    ------
+    OSError
+        If inotify is not available.
+    """
+    if not sys.platform.startswith("linux"):
+        raise OSError(INOTIFY_UNAVAILABLE)
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError(INOTIFY_UNAVAILABLE)
+    return libc
+
+
+def get_filesystem_type(path: Union[str, Path]) -> Optional[str]:
+    """
+    Get the type of the filesystem a path is mounted on (e.g. *nfs*), or
+    None if the mounted filesystems are unknown.
+    """
+    try:
+        with open(MOUNTS_PATH) as mounts:
+            lines = mounts.read().splitlines()
+    except OSError:
+        return None
+    path = os.path.realpath(path)
+    mount_point, filesystem_type = "", None
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        candidate = MOUNT_ESCAPE.sub(
+            lambda match: chr(int(match.group(1), 8)), fields[1]
+        )
+        contains = path == candidate or path.startswith(
+            candidate.rstrip("/") + "/"
+        )
+        # The longest mount point wins, and the latest of equal ones (it
+        # is mounted over the others).
+        if contains and len(candidate) >= len(mount_point):
+            mount_point, filesystem_type = candidate, fields[2]
+    return filesystem_type
+
+
+#: Available watch backends.
+WATCH_BACKENDS = {"inotify": InotifyBackend, "polling": PollingBackend}
+
+
+def get_backend(
+    base_directory: Union[str, Path],
+    backend: str = "auto",
+    interval: float = 1.0,
+):
+    """
+    Instantiate a watch backend.
+
+    Parameters
+    ----------
+    base_directory : Union[str, Path]
+        The watched tree's base directory.
+    backend : str, optional
+        Either *inotify*, *polling* or *auto* (inotify where available,
+        polling on network filesystems and otherwise), by default *auto*.
+    interval : float, optional
+        The polling backend's interval in seconds, by default 1.0
+
+    Returns
+    -------
+    Union[InotifyBackend, PollingBackend]
+        The watch backend.
+    """
+    if backend not in ("auto", *WATCH_BACKENDS):
+        raise ValueError(
+            UNKNOWN_WATCH_BACKEND.format(
+                backend=backend, backends=["auto", *WATCH_BACKENDS]
+            )
+        )
+    if backend == "auto" and (
+        get_filesystem_type(base_directory) in NETWORK_FILESYSTEMS
+    ):
+        # Changes made by other hosts (e.g. cluster nodes) are not
+        # notified.
+        backend = "polling"
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyBackend(base_directory, interval=interval)
+        except OSError:
+            if backend == "inotify":
+                raise
+    return PollingBackend(base_directory, interval=interval)
@@ -0,0 +1,11 @@
+#: Watch messages
+
+INOTIFY_UNAVAILABLE = "inotify is not available on this platform; use the polling backend instead."
+
+INOTIFY_FAILED = "inotify failed to {action} {path}: {error}"
+
+UNKNOWN_WATCH_BACKEND = (
+    "Unknown watch backend {backend}; expected one of {backends}."
+)
+
+UNKNOWN_EVENT = "Unknown watch event {kind}; expected one of {kinds}."
@@ -0,0 +1,342 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, NamedTuple, Optional, Pattern, Set
+
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.utils.scanner import match_label, scan_directory
+from bids_derivatives.utils.templates.bids import (
+    SESSION_PATTERN,
+    SUBJECT_PATTERN,
+    SUBJECT_TEMPLATE,
+)
+from bids_derivatives.watch.backends import get_backend
+from bids_derivatives.watch.messages import UNKNOWN_EVENT
+
+#: Kinds of events watchers notify of.
+EVENT_KINDS = (
+    "subject_added",
+    "session_added",
+    "subject_completed",
+    "file_added",
+    "file_removed",
+)
+
+#: Files whose appearance at the base directory marks a subject as
+#: completed (BIDS-Apps such as qsiprep and fmriprep write the subject's
+#: report last).
+COMPLETION_PATTERN = re.compile(r"sub-(?P<subject>[^_/]+)\.html")
+
+
+class WatchEvent(NamedTuple):
+    """
+    A change of a watched derivatives tree.
+    """
+
+    kind: str
+    subject: Optional[str]
+    session: Optional[str] = None
+    #: The changed file's path, relative to the base directory.
+    path: Optional[str] = None
+
+
+class DerivativeWatcher:
+    """
+    A DerivativeWatcher keeps an in-memory view of a BIDS-App's subjects,
+    sessions and files up to date while the BIDS-App runs. Directories
+    are only listed again once they are reported to have changed (by
+    inotify where available, by their modification time otherwise), and
+    registered callbacks are notified of the resulting events. The view
+    is guarded by a lock, so that it may be read while a background
+    thread (see :meth:`start`) updates it.
+    """
+
+    def __init__(
+        self,
+        derivative: BIDSDerivative,
+        backend: str = "auto",
+        interval: float = 1.0,
+        completion_pattern: Pattern = COMPLETION_PATTERN,
+    ):
+        """
+        Initialize the DerivativeWatcher class, walking the derivatives
+        once.
+
+        Parameters
+        ----------
+        derivative : BIDSDerivative
+            The derivatives to watch. Its cached queries are invalidated
+            whenever changes are detected.
+        backend : str, optional
+            Either *inotify*, *polling* or *auto*, by default *auto*.
+        interval : float, optional
+            The polling backend's interval in seconds, by default 1.0
+        completion_pattern : Pattern, optional
+            The pattern of base directory files marking a subject as
+            completed, by default COMPLETION_PATTERN
+        """
+        self.derivative = derivative
+        self.base_directory = derivative.base_directory
+        self.completion_pattern = completion_pattern
+        self.backend = get_backend(
+            self.base_directory, backend=backend, interval=interval
+        )
+        #: Relative directories mapped to their sub-directories and files.
+        self.directories: Dict[str, tuple] = {}
+        self._lock = threading.RLock()
+        self._callbacks: Dict[str, List[Callable]] = defaultdict(list)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self.scan("", notify=False)
+
+    def __enter__(self) -> "DerivativeWatcher":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def on(self, kind: str, callback: Callable[[WatchEvent], None]):
+        """
+        Register a callback for a kind of events.
+
+        Parameters
+        ----------
+        kind : str
+            One of *EVENT_KINDS*.
+        callback : Callable[[WatchEvent], None]
+            The function to call with each event.
+        """
+        if kind not in EVENT_KINDS:
+            raise ValueError(
+                UNKNOWN_EVENT.format(kind=kind, kinds=EVENT_KINDS)
+            )
+        self._callbacks[kind].append(callback)
+
+    def locate(self, directory: str) -> tuple:
+        """
+        Get the subject and session a directory belongs to.
+        """
+        parts = directory.split("/") if directory else []
+        subject = match_label(SUBJECT_PATTERN, parts[0]) if parts else None
+        session = None
+        if subject is not None and len(parts) > 1:
+            session = match_label(SESSION_PATTERN, parts[1])
+        return subject, session
+
+    def join(self, directory: str, name: str) -> str:
+        """
+        Join a relative directory and an entry's name.
+        """
+        return f"{directory}/{name}" if directory else name
+
+    def scan(self, directory: str, notify: bool = True) -> List[WatchEvent]:
+        """
+        List a directory again, updating the view with the entries added
+        or removed since it was last listed (recursively for added
+        sub-directories).
+
+        Parameters
+        ----------
+        directory : str
+            The directory, relative to the base directory.
+        notify : bool, optional
+            Whether to notify callbacks of the resulting events, by
+            default True
+
+        Returns
+        -------
+        List[WatchEvent]
+            The resulting events.
+        """
+        with self._lock:
+            events = self.update(directory)
+        return self.notify(events) if notify else events
+
+    def update(self, directory: str) -> List[WatchEvent]:
+        """
+        Update the view of a directory (see :meth:`scan`), without
+        notifying callbacks. The caller must hold the view's lock.
+        """
+        events = []
+        try:
+            if directory not in self.directories:
+                # Watch before listing, so that no entry is missed.
+                self.backend.add(directory)
+            names, entries = scan_directory(self.base_directory / directory)
+        except FileNotFoundError:
+            self.forget(directory, events)
+            return events
+        subdirectories = {name for name in names if not name.startswith(".")}
+        known_subdirectories, known_files = self.directories.get(
+            directory, (set(), set())
+        )
+        files = {name for name, _ in entries}
+        self.directories[directory] = (subdirectories, files)
+        self.diff_files(directory, known_files, files, events)
+        subject, session = self.locate(directory)
+        for name in sorted(known_subdirectories - subdirectories):
+            self.forget(self.join(directory, name), events)
+        for name in sorted(subdirectories - known_subdirectories):
+            child = self.join(directory, name)
+            child_subject, child_session = self.locate(child)
+            if not directory and child_subject is not None:
+                events.append(WatchEvent("subject_added", child_subject))
+            elif subject is not None and session is None and child_session:
+                events.append(
+                    WatchEvent("session_added", subject, child_session)
+                )
+            events.extend(self.update(child))
+        return events
+
+    def diff_files(
+        self,
+        directory: str,
+        known: Set[str],
+        current: Set[str],
+        events: List[WatchEvent],
+    ):
+        """
+        Add the events of a directory's added and removed files.
+        """
+        subject, session = self.locate(directory)
+        for name in sorted(current - known):
+            path = self.join(directory, name)
+            events.append(WatchEvent("file_added", subject, session, path))
+            match = (
+                None if directory else self.completion_pattern.fullmatch(name)
+            )
+            if match:
+                events.append(
+                    WatchEvent("subject_completed", match.group("subject"))
+                )
+        for name in sorted(known - current):
+            path = self.join(directory, name)
+            events.append(WatchEvent("file_removed", subject, session, path))
+
+    def forget(self, directory: str, events: List[WatchEvent]):
+        """
+        Drop a removed directory (and its sub-directories) from the view.
+        """
+        subdirectories, files = self.directories.pop(directory, (set(), set()))
+        self.backend.remove(directory)
+        subject, session = self.locate(directory)
+        for name in sorted(files):
+            events.append(
+                WatchEvent(
+                    "file_removed",
+                    subject,
+                    session,
+                    self.join(directory, name),
+                )
+            )
+        for name in subdirectories:
+            self.forget(self.join(directory, name), events)
+
+    def notify(self, events: List[WatchEvent]) -> List[WatchEvent]:
+        """
+        Notify registered callbacks of events.
+        """
+        if events:
+            self.derivative.invalidate()
+        for event in events:
+            for callback in self._callbacks.get(event.kind, ()):
+                callback(event)
+        return events
+
+    def poll(self, timeout: Optional[float] = 0) -> List[WatchEvent]:
+        """
+        Wait for changes and update the view accordingly.
+
+        Parameters
+        ----------
+        timeout : Optional[float], optional
+            The maximal number of seconds to wait for changes, by default
+            0 (only process changes already detected); None waits until
+            changes are detected.
+
+        Returns
+        -------
+        List[WatchEvent]
+            The resulting events, in the order callbacks were notified.
+        """
+        events = []
+        changed = self.backend.poll(timeout)
+        with self._lock:
+            # Parents first, so that removed trees are forgotten as a whole.
+            for directory in sorted(changed, key=len):
+                if directory in self.directories:
+                    events.extend(self.update(directory))
+        return self.notify(events)
+
+    def start(self, timeout: float = 0.5):
+        """
+        Start watching in a background thread, in which callbacks are
+        called.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The number of seconds between checks for :meth:`stop`, by
+            default 0.5
+        """
+        self._stopped.clear()
+
+        def watch():
+            while not self._stopped.is_set():
+                self.poll(timeout)
+
+        self._thread = threading.Thread(target=watch, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread started with :meth:`start`.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """
+        Stop watching and release the backend's resources.
+        """
+        self.stop()
+        self.backend.close()
+
+    @property
+    def subjects(self) -> List[str]:
+        """
+        Get the current subjects.
+        """
+        with self._lock:
+            subdirectories, _ = self.directories.get("", (set(), set()))
+            labels = [
+                match_label(SUBJECT_PATTERN, name) for name in subdirectories
+            ]
+        return sorted(label for label in labels if label is not None)
+
+    def get_sessions(self, subject: str) -> List[str]:
+        """
+        Get a subject's current sessions.
+        """
+        with self._lock:
+            subdirectories, _ = self.directories.get(
+                SUBJECT_TEMPLATE.format(subject=subject), (set(), set())
+            )
+            labels = [
+                match_label(SESSION_PATTERN, name) for name in subdirectories
+            ]
+        return sorted(label for label in labels if label is not None)
+
+    @property
+    def files(self) -> Set[str]:
+        """
+        Get the current files' paths, relative to the base directory.
+        """
+        with self._lock:
+            return {
+                self.join(directory, name)
+                for directory, (_, files) in self.directories.items()
+                for name in files
+            }
@@ -0,0 +1,9 @@
+#: DerivativesWorkspace messages
+
+DERIVATIVES_DIRECTORY_MISSING = (
+    "Derivatives directory {derivatives_directory} does not exist."
+)
+
+UNKNOWN_APP = "No {app} derivatives under {derivatives_directory}; expected one of {apps}."
+
+WORKSPACE_SCANNED = "Scanned {num_apps} derivatives under {derivatives_directory}: {num_files} files."
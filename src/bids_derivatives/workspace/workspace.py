@@ -0,0 +1,338 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.dataset.utils import DATASET_DESCRIPTION_FILENAME
+from bids_derivatives.query.query import FileIndex, get_file_entities
+from bids_derivatives.utils.cache import QueryCache
+from bids_derivatives.utils.concurrency import map_ordered
+from bids_derivatives.utils.logs import set_logger
+from bids_derivatives.utils.scanner import (
+    DerivativeScan,
+    iter_labels,
+    walk_derivative,
+)
+from bids_derivatives.utils.templates.bids import SUBJECT_PATTERN
+from bids_derivatives.workspace.messages import (
+    DERIVATIVES_DIRECTORY_MISSING,
+    UNKNOWN_APP,
+    WORKSPACE_SCANNED,
+)
+
+
+def is_derivative(path: Union[str, Path]) -> bool:
+    """
+    Whether a directory holds a BIDS-App's derivatives, i.e. it has a
+    dataset description or at least one subject's directory.
+    """
+    if os.path.isfile(os.path.join(path, DATASET_DESCRIPTION_FILENAME)):
+        return True
+    return next(iter_labels(path, SUBJECT_PATTERN), None) is not None
+
+
+class DerivativesWorkspace:
+    """
+    A DerivativesWorkspace queries the outputs of several BIDS-Apps that
+    live side by side under a single *derivatives* directory (e.g.
+    qsiprep, fmriprep and freesurfer), walking all of them in one
+    concurrent pass and answering cross-app queries from a single
+    in-memory index.
+
+    Walks are cached for as long as the derivatives directory is not
+    modified. Changes within a BIDS-App's directory do not modify it, so
+    are only picked up once :meth:`invalidate` is called.
+    """
+
+    def __init__(
+        self,
+        derivatives_directory: Union[str, Path],
+        verbosity: Union[str, int] = 0,
+        cache_ttl: Optional[float] = None,
+        max_workers: Optional[int] = None,
+        backend: str = "thread",
+    ) -> None:
+        """
+        Initialize the DerivativesWorkspace class.
+
+        Parameters
+        ----------
+        derivatives_directory : Union[str, Path]
+            The directory holding the BIDS-Apps' derivatives directories.
+        verbosity : Union[str, int], optional
+            The verbosity level of the logger shared by the workspace's
+            derivatives. The default is 0.
+        cache_ttl : Optional[float], optional
+            Number of seconds after which cached query results expire.
+            The default is None (results are only recomputed when the
+            derivatives directory is modified or when invalidated).
+        max_workers : Optional[int], optional
+            The number of BIDS-Apps to walk concurrently. The default is
+            None (let the executor decide).
+        backend : str, optional
+            The concurrent walks' executor, either *thread* or *process*.
+            The default is *thread*.
+        """
+        self.derivatives_directory = Path(derivatives_directory)
+        if not self.derivatives_directory.is_dir():
+            raise ValueError(
+                DERIVATIVES_DIRECTORY_MISSING.format(
+                    derivatives_directory=self.derivatives_directory
+                )
+            )
+        self.logger = set_logger(name=str(self), verbosity=verbosity)
+        self.cache_ttl = cache_ttl
+        self.max_workers = max_workers
+        self.backend = backend
+        self._cache = QueryCache(ttl=cache_ttl)
+
+    def __repr__(self) -> str:
+        return f"{self.derivatives_directory.name.capitalize()} workspace"
+
+    def discover_apps(self) -> List[str]:
+        """
+        List the BIDS-Apps whose derivatives are under the derivatives
+        directory.
+
+        Returns
+        -------
+        List[str]
+            The sorted names of the BIDS-Apps' directories.
+        """
+        with os.scandir(self.derivatives_directory) as entries:
+            directories = [
+                entry.name
+                for entry in entries
+                if entry.is_dir() and not entry.name.startswith(".")
+            ]
+        return sorted(
+            name
+            for name in directories
+            if is_derivative(self.derivatives_directory / name)
+        )
+
+    def get_app_directory(self, app: str) -> Path:
+        """
+        Get the derivatives directory of a single BIDS-App.
+
+        Raises
+        ------
+        ValueError
+            If the workspace holds no derivatives of *app*.
+        """
+        if app not in self.apps:
+            raise ValueError(
+                UNKNOWN_APP.format(
+                    app=app,
+                    derivatives_directory=self.derivatives_directory,
+                    apps=self.apps,
+                )
+            )
+        return self.derivatives_directory / app
+
+    def get_derivative(self, app: str) -> BIDSDerivative:
+        """
+        Instantiate a BIDSDerivative for a single BIDS-App, sharing the
+        workspace's logger.
+        """
+        return BIDSDerivative(
+            self.get_app_directory(app),
+            cache_ttl=self.cache_ttl,
+            logger=self.logger,
+        )
+
+    def scan(self) -> Dict[str, DerivativeScan]:
+        """
+        Walk every BIDS-App's derivatives concurrently.
+
+        Returns
+        -------
+        Dict[str, DerivativeScan]
+            The BIDS-Apps' names mapped to their subjects, sessions and
+            files.
+        """
+        apps = self.apps
+        scans = map_ordered(
+            walk_derivative,
+            [self.derivatives_directory / app for app in apps],
+            max_workers=self.max_workers,
+            backend=self.backend,
+        )
+        self.logger.info(
+            WORKSPACE_SCANNED.format(
+                num_apps=len(apps),
+                derivatives_directory=self.derivatives_directory,
+                num_files=sum(len(scan.files) for scan in scans),
+            )
+        )
+        return dict(zip(apps, scans))
+
+    def build_file_index(self) -> FileIndex:
+        """
+        Index the files of every BIDS-App by their entities, with the
+        BIDS-App's name as an additional *app* entity.
+
+        Returns
+        -------
+        FileIndex
+            The files, by paths relative to the derivatives directory.
+        """
+        index = FileIndex()
+        for app, scan in self.scans.items():
+            for file in scan.files:
+                entities = get_file_entities(
+                    file.name, file.subject, file.session, file.datatype
+                )
+                entities["app"] = app
+                index.add(f"{app}/{file.path}", entities)
+        return index
+
+    def get_files(self, app: Union[str, Iterable[str]] = None, **entities):
+        """
+        Query the files of one, several or all BIDS-Apps by their BIDS
+        entities (see :meth:`BIDSDerivative.get_files`).
+
+        Parameters
+        ----------
+        app : Union[str, Iterable[str]], optional
+            The BIDS-Apps to query, by default None (all).
+        **entities : str
+            The entities to filter by.
+
+        Returns
+        -------
+        List[Path]
+            The sorted paths of the matching files.
+        """
+        paths = self.file_index.query(app=app, **entities)
+        return [self.derivatives_directory / path for path in paths]
+
+    def get_subjects(
+        self, include: Iterable[str] = None, exclude: Iterable[str] = ()
+    ) -> List[str]:
+        """
+        List the subjects processed by some BIDS-Apps and not by others
+        (e.g. those with qsiprep but without fmriprep derivatives).
+
+        Parameters
+        ----------
+        include : Iterable[str], optional
+            The BIDS-Apps subjects must have derivatives of, by default
+            None (any of the workspace's BIDS-Apps).
+        exclude : Iterable[str], optional
+            The BIDS-Apps subjects must have no derivatives of, by default
+            none.
+
+        Returns
+        -------
+        List[str]
+            The sorted subjects' labels (none if *include* is empty).
+
+        Raises
+        ------
+        ValueError
+            If a BIDS-App is not one of the workspace's.
+        """
+        include = None if include is None else list(include)
+        exclude = list(exclude)
+        for app in (include or []) + exclude:
+            self.get_app_directory(app)
+        subjects = self.subjects
+        if include is None:
+            selected = set().union(*subjects.values())
+        elif include:
+            selected = set.intersection(
+                *(set(subjects[app]) for app in include)
+            )
+        else:
+            return []
+        for app in exclude:
+            selected.difference_update(subjects[app])
+        return sorted(selected)
+
+    def get_completeness(self) -> Dict[Tuple[str, Optional[str]], dict]:
+        """
+        Build a completeness matrix of every subject's sessions across the
+        BIDS-Apps. A BIDS-App covers a session if it has the session's
+        directory, or if it has the subject with no sessions at all (i.e.
+        it processes subjects as a whole, like freesurfer).
+
+        Returns
+        -------
+        Dict[Tuple[str, Optional[str]], dict]
+            The sorted (subject, session) pairs mapped to the BIDS-Apps'
+            names and whether they cover the session. Subjects without a
+            session in any BIDS-App are keyed by a None session.
+        """
+        sessions = {app: scan.subjects for app, scan in self.scans.items()}
+        labels_by_subject = {}
+        for subjects in sessions.values():
+            for subject, labels in subjects.items():
+                labels_by_subject.setdefault(subject, set()).update(labels)
+        rows = [
+            (subject, label)
+            for subject, labels in labels_by_subject.items()
+            for label in labels or [None]
+        ]
+        matrix = {}
+        for subject, session in sorted(
+            rows, key=lambda row: (row[0], row[1] or "")
+        ):
+            matrix[subject, session] = {}
+            for app, subjects in sessions.items():
+                labels = subjects.get(subject)
+                matrix[subject, session][app] = labels is not None and (
+                    not labels or session in labels
+                )
+        return matrix
+
+    def invalidate(self, *names: str):
+        """
+        Drop cached query results (*apps*, *derivatives*, *scans* or
+        *file_index*), e.g. once a BIDS-App's outputs were updated; all
+        results are dropped if none are given.
+        """
+        self._cache.invalidate(*names)
+
+    @property
+    def apps(self) -> List[str]:
+        """
+        Get the BIDS-Apps under the derivatives directory.
+        """
+        return self._cache.get(
+            "apps", self.discover_apps, self.derivatives_directory
+        )
+
+    @property
+    def derivatives(self) -> Dict[str, BIDSDerivative]:
+        """
+        Get the BIDS-Apps' BIDSDerivatives.
+        """
+        return self._cache.get(
+            "derivatives",
+            lambda: {app: self.get_derivative(app) for app in self.apps},
+            self.derivatives_directory,
+        )
+
+    @property
+    def scans(self) -> Dict[str, DerivativeScan]:
+        """
+        Get the result of a single walk of every BIDS-App.
+        """
+        return self._cache.get("scans", self.scan, self.derivatives_directory)
+
+    @property
+    def subjects(self) -> Dict[str, List[str]]:
+        """
+        Get every BIDS-App's subjects.
+        """
+        return {app: sorted(scan.subjects) for app, scan in self.scans.items()}
+
+    @property
+    def file_index(self) -> FileIndex:
+        """
+        Get the files of every BIDS-App indexed by their entities.
+        """
+        return self._cache.get(
+            "file_index", self.build_file_index, self.derivatives_directory
+        )
@@ -0,0 +1,109 @@
+import asyncio
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+
+from bids_derivatives.aio import AsyncBIDSDerivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.storage import open_archive
+from tests.fixtures import TEST_DERIVATIVES_PATH
+
+
+class AsyncBIDSDerivativeTestCase(IsolatedAsyncioTestCase):
+    TEST_DATA_PATH = Path(TEST_DERIVATIVES_PATH) / "qsiprep"
+
+    async def asyncSetUp(self) -> None:
+        self.derivative = await AsyncBIDSDerivative.create(
+            self.TEST_DATA_PATH, max_concurrency=2
+        )
+        self.synchronous = BIDSDerivative(self.TEST_DATA_PATH)
+
+    async def test_queries(self):
+        """
+        Test that asynchronous queries match the synchronous ones.
+        """
+        self.assertEqual(
+            await self.derivative.get_dataset_description(),
+            self.synchronous.dataset_description,
+        )
+        self.assertEqual(
+            await self.derivative.get_subjects(), self.synchronous.subjects
+        )
+        self.assertEqual(
+            await self.derivative.get_sessions("1"),
+            self.synchronous.derivatives["1"].sessions,
+        )
+        self.assertEqual(
+            await self.derivative.get_files(datatype="anat"),
+            self.synchronous.get_files(datatype="anat"),
+        )
+
+    async def test_iterators(self):
+        """
+        Test the asynchronous iterators over subjects, sessions and files.
+        """
+        subjects = [s async for s in self.derivative.iter_subjects()]
+        self.assertEqual(subjects, self.synchronous.subjects)
+        sessions = [s async for s in self.derivative.iter_sessions()]
+        self.assertEqual(
+            sessions, list(self.synchronous.get_sessions().items())
+        )
+        files = [
+            f
+            async for f in self.derivative.iter_files(
+                subject="sub-1", suffix="T1w"
+            )
+        ]
+        self.assertEqual(files, self.synchronous.get_files(suffix="T1w"))
+
+    async def test_archived_files(self):
+        """
+        Test that subjects' files are walked through the storage.
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            archive = Path(temporary_directory) / "derivatives.zip"
+            with zipfile.ZipFile(archive, "w") as f:
+                for path in self.TEST_DATA_PATH.rglob("*"):
+                    if path.is_file():
+                        f.write(
+                            path,
+                            path.relative_to(self.TEST_DATA_PATH.parent),
+                        )
+            storage = open_archive(archive)
+            derivative = await AsyncBIDSDerivative.create(
+                "qsiprep", storage=storage
+            )
+            files = [
+                f.relative_to("qsiprep")
+                async for f in derivative.iter_files(suffix="T1w")
+            ]
+            storage.close()
+        self.assertEqual(
+            files,
+            [
+                f.relative_to(self.TEST_DATA_PATH)
+                for f in self.synchronous.get_files(suffix="T1w")
+            ],
+        )
+
+    async def test_early_termination(self):
+        """
+        Test that pending queries are cancelled when iteration stops.
+        """
+        with tempfile.TemporaryDirectory() as base_directory:
+            for subject in range(10):
+                (Path(base_directory) / f"sub-{subject}" / "ses-1").mkdir(
+                    parents=True
+                )
+            derivative = await AsyncBIDSDerivative.create(
+                base_directory, max_concurrency=3
+            )
+            iterator = derivative.iter_sessions()
+            subject, sessions = await iterator.__anext__()
+            self.assertEqual(sessions, ["1"])
+            await iterator.aclose()
+            task = asyncio.ensure_future(derivative.get_subjects())
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
@@ -0,0 +1,110 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks import bench_import, bench_startup
+from benchmarks.run import INDEXED_QUERIES, QUERIES, run
+from benchmarks.synthetic import generate_derivative
+from benchmarks.syscalls import count_filesystem_calls
+from bids_derivatives.dataset import BIDSDerivative
+
+
+class BenchmarksTestCase(TestCase):
+    def test_synthetic_derivative(self):
+        """
+        Test that synthetic trees follow the requested shape.
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            base_directory = generate_derivative(
+                Path(temporary_directory) / "fmriprep",
+                app="fmriprep",
+                num_subjects=3,
+                num_sessions=2,
+                files_per_session=7,
+                file_size=1024,
+            )
+            derivative = BIDSDerivative(base_directory)
+            self.assertEqual(derivative.subjects, ["1", "2", "3"])
+            self.assertEqual(derivative.get_sessions()["2"], ["1", "2"])
+            files = derivative.get_files(subject="3", session="2")
+            self.assertEqual(len(files), 7)
+            self.assertEqual(len(derivative.get_files(run="2")), 3 * 2 * 2)
+            for file in files:
+                self.assertEqual(file.stat().st_size, 1024)
+
+    def test_filesystem_calls(self):
+        """
+        Test that pathlib's listings and stats are counted (pathlib calls
+        the os module through its own accessor before Python 3.11).
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            base_directory = Path(temporary_directory)
+            for subject in range(1, 4):
+                (base_directory / f"sub-{subject}" / "ses-1").mkdir(
+                    parents=True
+                )
+            with count_filesystem_calls() as counts:
+                for path in base_directory.glob("sub-*"):
+                    path.exists()
+                    list(path.iterdir())
+        self.assertGreaterEqual(counts["scandir"], 1)
+        self.assertEqual(counts["listdir"], 3)
+        self.assertGreaterEqual(counts["stat"], 3)
+
+    def test_run(self):
+        """
+        Test that every query is benchmarked.
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            base_directory = generate_derivative(
+                Path(temporary_directory) / "qsiprep", num_subjects=2
+            )
+            results = run(base_directory, repeat=1)
+        self.assertEqual(
+            set(results), {*QUERIES, *INDEXED_QUERIES, "build_index"}
+        )
+        for result in results.values():
+            self.assertGreaterEqual(result["wall_time"], 0)
+            self.assertGreater(result["total_filesystem_calls"], 0)
+
+    def test_startup(self):
+        """
+        Test that the command-line interface's startup is measured.
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            base_directory = generate_derivative(
+                Path(temporary_directory) / "qsiprep", num_subjects=2
+            )
+            results = bench_startup.run(base_directory, repeat=1)
+        self.assertIn("cli files (indexed)", results)
+        self.assertGreater(results["cli subjects"], results["python"])
+        # Timings vary between machines, so only the checks are tested.
+        self.assertEqual(bench_startup.check(results, budget=float("inf")), [])
+        self.assertEqual(
+            len(bench_startup.check(results, budget=0)),
+            len(bench_startup.BUDGETED_COMMANDS),
+        )
+
+    def test_import_fast_paths(self):
+        """
+        Test that importing the package and checking a subject's existence
+        defer the optional modules, and import no more modules than the
+        baseline.
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            base_directory = generate_derivative(
+                Path(temporary_directory) / "qsiprep", num_subjects=2
+            )
+            results = bench_import.run(base_directory, repeat=1)
+        self.assertEqual(len(results), len(bench_import.STATEMENTS))
+        for result in results.values():
+            self.assertEqual(result["deferred_imports"], [])
+            self.assertLessEqual(
+                result["num_modules"], bench_import.MAX_MODULES
+            )
+            self.assertGreater(result["import_time"], 0)
+        # Timings vary between machines, so only the checks are tested.
+        self.assertEqual(bench_import.check(results, budget=float("inf")), [])
+        self.assertEqual(
+            len(bench_import.check(results, budget=0)), len(results)
+        )
@@ -1,6 +1,9 @@
 import os
+import tempfile
+from collections.abc import Mapping
 from pathlib import Path
 from unittest import TestCase
+from unittest.mock import patch
 
 from bids_derivatives.dataset import BIDSDerivative
 from bids_derivatives.dataset.messages import DATASET_DESCRIPTION_MESSAGES
@@ -91,7 +94,8 @@ class BIDSDerivativeTestCase(TestCase):
         for key in self.TEST_SUBJECTS:
             valid_subjects = self.TEST_SUBJECTS[key]["valid"]
             derivative = BIDSDerivative(os.path.join(self.TEST_DATA_PATH, key))
-            self.assertTrue(isinstance(derivative.derivatives, dict))
+            self.assertTrue(isinstance(derivative.derivatives, Mapping))
+            self.assertTrue(isinstance(derivative.get_derivatives(), dict))
             for subject in valid_subjects:
                 self.assertTrue(
                     isinstance(
@@ -100,6 +104,51 @@ class BIDSDerivativeTestCase(TestCase):
                     )
                 )
 
+    def test_lazy_derivatives(self):
+        """
+        Test that derivatives are instantiated on first access.
+        """
+        for key in self.TEST_SUBJECTS:
+            valid_subjects = self.TEST_SUBJECTS[key]["valid"]
+            derivative = BIDSDerivative(os.path.join(self.TEST_DATA_PATH, key))
+            with patch.object(
+                BIDSDerivative,
+                "get_derivative",
+                wraps=derivative.get_derivative,
+            ) as get_derivative:
+                derivatives = derivative.derivatives
+                self.assertEqual(len(derivatives), len(valid_subjects))
+                self.assertEqual(sorted(derivatives), sorted(valid_subjects))
+                get_derivative.assert_not_called()
+                for subject in valid_subjects:
+                    self.assertIs(derivatives[subject], derivatives[subject])
+                self.assertEqual(
+                    get_derivative.call_count, len(valid_subjects)
+                )
+            with self.assertRaises(KeyError):
+                derivatives["missing"]
+
+    def test_iter_subjects(self):
+        """
+        Test that subjects are streamed, filtered and may be stopped early.
+        """
+        with tempfile.TemporaryDirectory() as base_directory:
+            for subject in range(10):
+                os.mkdir(os.path.join(base_directory, f"sub-{subject}"))
+            derivative = BIDSDerivative(base_directory)
+            self.assertEqual(
+                sorted(derivative.iter_subjects()), sorted(derivative.subjects)
+            )
+            self.assertEqual(
+                sorted(derivative.iter_subjects(lambda s: int(s) % 2 == 0)),
+                ["0", "2", "4", "6", "8"],
+            )
+            iterator = derivative.iter_derivatives()
+            first = next(iterator)
+            iterator.close()
+            self.assertTrue(isinstance(first, SingleSubjectDerivative))
+            self.assertIn(first.participant_label, derivative.subjects)
+
     def test_invalid_description(self):
         derivative = BIDSDerivative(
             os.path.join(self.TEST_DATA_PATH, "qsiprep_invalid")
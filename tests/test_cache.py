@@ -0,0 +1,133 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from benchmarks.synthetic import backdate, generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.utils.cache import QueryCache
+from tests.fixtures import TEST_DERIVATIVES_PATH
+
+
+class QueryCacheTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.temporary_directory.name) / "source.json"
+        self.path.write_text("{}")
+        self.set_mtime(60)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def set_mtime(self, seconds_ago: int):
+        timestamp = time.time() - seconds_ago
+        os.utime(self.path, (timestamp, timestamp))
+
+    def test_memoization(self):
+        """
+        Test that results are computed once and invalidated explicitly.
+        """
+        cache = QueryCache()
+        compute = MagicMock(return_value=1)
+        self.assertEqual(cache.get("key", compute, self.path), 1)
+        self.assertEqual(cache.get("key", compute, self.path), 1)
+        self.assertEqual(compute.call_count, 1)
+        self.assertIn("key", cache)
+        cache.invalidate("key")
+        self.assertNotIn("key", cache)
+        cache.get("key", compute, self.path)
+        cache.invalidate()
+        cache.get("key", compute, self.path)
+        self.assertEqual(compute.call_count, 3)
+
+    def test_modification(self):
+        """
+        Test that results are recomputed once their source is modified.
+        """
+        cache = QueryCache()
+        compute = MagicMock(return_value=1)
+        cache.get("key", compute, self.path)
+        self.set_mtime(30)
+        cache.get("key", compute, self.path)
+        cache.get("key", compute, self.path)
+        self.assertEqual(compute.call_count, 2)
+        cache = QueryCache(check_mtime=False)
+        cache.get("key", compute, self.path)
+        self.set_mtime(10)
+        cache.get("key", compute, self.path)
+        self.assertEqual(compute.call_count, 3)
+
+    def test_recent_modification(self):
+        """
+        Test that results read from recently modified paths are not
+        trusted.
+        """
+        cache = QueryCache()
+        compute = MagicMock(return_value=1)
+        self.path.touch()
+        cache.get("key", compute, self.path)
+        cache.get("key", compute, self.path)
+        self.assertEqual(compute.call_count, 2)
+
+    def test_time_to_live(self):
+        """
+        Test that results expire after the cache's time-to-live.
+        """
+        cache = QueryCache(ttl=0.01)
+        compute = MagicMock(return_value=1)
+        cache.get("key", compute)
+        time.sleep(0.02)
+        cache.get("key", compute)
+        self.assertEqual(compute.call_count, 2)
+
+
+class CachedDerivativeTestCase(TestCase):
+    TEST_DATA_PATH = Path(TEST_DERIVATIVES_PATH) / "qsiprep"
+
+    def test_cached_properties(self):
+        """
+        Test that repeated property access does not query the filesystem.
+        """
+        derivative = BIDSDerivative(self.TEST_DATA_PATH, use_index=False)
+        for name in ("dataset_description", "subjects", "derivatives"):
+            self.assertIs(getattr(derivative, name), getattr(derivative, name))
+        single = derivative.derivatives["1"]
+        self.assertIs(single.sessions, single.sessions)
+        self.assertIs(single.path, single.path)
+        with patch.object(
+            BIDSDerivative, "get_dataset_description"
+        ) as get_dataset_description:
+            derivative.dataset_description
+            get_dataset_description.assert_not_called()
+            derivative.invalidate("dataset_description")
+            derivative.dataset_description
+            get_dataset_description.assert_called_once()
+            derivative.refresh()
+            derivative.dataset_description
+            self.assertEqual(get_dataset_description.call_count, 2)
+
+    def test_refresh_required(self):
+        """
+        Test that files added within subjects' directories are only found
+        by cached results once refreshed.
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            base_directory = generate_derivative(
+                Path(temporary_directory) / "qsiprep", num_subjects=2
+            )
+            backdate(base_directory)
+            derivative = BIDSDerivative(
+                base_directory, verbosity="error", use_index=False
+            )
+            masks = derivative.get_files(suffix="mask")
+            path = base_directory / "sub-1" / "ses-1" / "dwi"
+            (path / "sub-1_ses-1_desc-new_mask.nii.gz").touch()
+            self.assertEqual(derivative.get_files(suffix="mask"), masks)
+            derivative.refresh()
+            self.assertEqual(
+                len(derivative.get_files(suffix="mask")), len(masks) + 1
+            )
@@ -0,0 +1,132 @@
+import io
+import json
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.cli import main
+from tests.fixtures import TEST_DERIVATIVES_PATH
+
+QSIPREP = str(Path(TEST_DERIVATIVES_PATH) / "qsiprep")
+
+
+def run_cli(*argv: str):
+    """
+    Run the command-line interface, returning its exit status and output.
+    """
+    stdout = io.StringIO()
+    with redirect_stdout(stdout):
+        status = main(list(argv))
+    return status, stdout.getvalue().splitlines()
+
+
+class CLITestCase(TestCase):
+    def test_subjects(self):
+        """
+        Test that subjects are listed as TSV under a header row.
+        """
+        status, lines = run_cli("subjects", QSIPREP)
+        self.assertEqual(status, 0)
+        self.assertEqual(lines, ["subject", "1"])
+
+    def test_sessions_json(self):
+        """
+        Test that sessions are streamed as JSON lines.
+        """
+        _, lines = run_cli("sessions", QSIPREP, "--format", "json")
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{"subject": "1", "session": "202101030855"}],
+        )
+
+    def test_files(self):
+        """
+        Test that files are queried by their entities.
+        """
+        _, lines = run_cli(
+            "files",
+            QSIPREP,
+            "--suffix",
+            "T1w",
+            "--entity",
+            "space=MNI152NLin2009cAsym",
+            "--no-index",
+        )
+        self.assertEqual(
+            lines,
+            [
+                "path",
+                f"{QSIPREP}/sub-1/anat/"
+                "sub-1_space-MNI152NLin2009cAsym_desc-preproc_T1w.nii.gz",
+            ],
+        )
+
+    def test_validate(self):
+        """
+        Test that the exit status reflects missing required keys.
+        """
+        status, lines = run_cli("validate", QSIPREP)
+        self.assertEqual(status, 0)
+        self.assertIn("required\tName\tTrue", lines)
+        invalid = str(Path(TEST_DERIVATIVES_PATH) / "qsiprep_invalid")
+        with redirect_stderr(io.StringIO()):
+            status, lines = run_cli("validate", invalid)
+        self.assertEqual(status, 1)
+        self.assertIn("required\tName\tFalse", lines)
+
+    def test_completeness(self):
+        """
+        Test that missing outputs are reported, with n/a for subject-level
+        outputs' sessions, and reflected by the exit status.
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            base_directory = generate_derivative(
+                Path(temporary_directory) / "qsiprep", num_subjects=2
+            )
+            status, lines = run_cli("completeness", str(base_directory))
+            self.assertEqual((status, lines[1:]), (0, []))
+            anat = base_directory / "sub-2" / "anat"
+            (anat / "sub-2_dseg.nii.gz").unlink()
+            status, lines = run_cli("completeness", str(base_directory))
+        self.assertEqual(status, 1)
+        self.assertEqual(
+            lines, ["subject\tsession\tstatus\tname", "2\tn/a\tmissing\tdseg"]
+        )
+
+    def test_errors(self):
+        """
+        Test that invalid arguments exit with a usage error, before any
+        output.
+        """
+        for argv in (
+            ["files", QSIPREP, "--entity", "space"],
+            ["subjects", "/missing/qsiprep"],
+        ):
+            stdout = io.StringIO()
+            with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit) as context:
+                    main(argv)
+            self.assertEqual(context.exception.code, 2)
+            self.assertEqual(stdout.getvalue(), "")
+
+    def test_lazy_imports(self):
+        """
+        Test that importing the command-line interface does not import
+        the query modules.
+        """
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, bids_derivatives.cli; "
+                "print('bids_derivatives.dataset' in sys.modules)",
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        self.assertEqual(output.strip(), "False")
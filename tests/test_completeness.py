@@ -0,0 +1,70 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.completeness import SPECS, CompletenessChecker
+from bids_derivatives.dataset import BIDSDerivative
+from tests.fixtures import TEST_DERIVATIVES_PATH
+
+
+class CompletenessTestCase(TestCase):
+    def test_test_data_complete(self):
+        """
+        Test that the test derivatives have all of qsiprep's outputs.
+        """
+        derivative = BIDSDerivative(Path(TEST_DERIVATIVES_PATH) / "qsiprep")
+        report = derivative.check_completeness()
+        self.assertEqual(report.missing, {})
+        self.assertTrue(report.is_complete("1"))
+        extra = report.extra["1", "202101030855"]
+        self.assertIn(
+            "sub-1/ses-202101030855/dwi/"
+            "sub-1_ses-202101030855_dir-FWD_desc-ImageQC_dwi.csv",
+            extra,
+        )
+
+    def test_missing_outputs(self):
+        """
+        Test that missing outputs are reported by subject and session.
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            base_directory = generate_derivative(
+                Path(temporary_directory) / "qsiprep",
+                num_subjects=3,
+                num_sessions=2,
+            )
+            (
+                base_directory
+                / "sub-2"
+                / "ses-2"
+                / "dwi"
+                / "sub-2_ses-2_dir-FWD_dwiqc.json"
+            ).unlink()
+            (
+                base_directory
+                / "sub-3"
+                / "anat"
+                / "sub-3_desc-preproc_T1w.nii.gz"
+            ).unlink()
+            report = BIDSDerivative(
+                base_directory, verbosity="error"
+            ).check_completeness()
+        self.assertEqual(
+            report.missing, {("2", "2"): ["dwiqc"], ("3", None): ["T1w"]}
+        )
+        self.assertEqual(report.incomplete_subjects, ["2", "3"])
+        self.assertTrue(report.is_complete("2", "1"))
+        self.assertFalse(report.is_complete("2", "2"))
+        self.assertEqual(report.extra, {})
+
+    def test_invalid_spec(self):
+        """
+        Test that outputs must specify their directory, suffix and
+        extension.
+        """
+        with self.assertRaises(ValueError):
+            CompletenessChecker({"subject": {"T1w": {"suffix": "T1w"}}})
+        with self.assertRaises(ValueError):
+            CompletenessChecker({"run": {}})
+        self.assertIn("qsiprep", SPECS)
@@ -0,0 +1,60 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.utils.concurrency import map_ordered
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+class ConcurrentScanTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.base_directory = Path(self.temporary_directory.name)
+        for subject in range(12):
+            for session in range(subject % 3):
+                directory = (
+                    self.base_directory
+                    / f"sub-{subject}"
+                    / f"ses-{session}"
+                    / "anat"
+                )
+                directory.mkdir(parents=True)
+                (directory / f"sub-{subject}_T1w.nii.gz").touch()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_map_ordered(self):
+        """
+        Test that results keep the order of the items for every backend.
+        """
+        expected = [square(value) for value in range(50)]
+        for backend in ("thread", "process"):
+            self.assertEqual(
+                map_ordered(square, range(50), max_workers=4, backend=backend),
+                expected,
+            )
+        with self.assertRaises(ValueError):
+            map_ordered(square, range(50), backend="cluster")
+
+    def test_concurrent_scans(self):
+        """
+        Test that concurrent scans match the sequential ones.
+        """
+        sequential = BIDSDerivative(self.base_directory)
+        for backend in ("thread", "process"):
+            concurrent = BIDSDerivative(
+                self.base_directory, max_workers=4, backend=backend
+            )
+            self.assertEqual(concurrent.walk(), sequential.walk())
+            self.assertEqual(
+                list(concurrent.get_sessions().items()),
+                list(sequential.get_sessions().items()),
+            )
+        self.assertEqual(sequential.get_sessions()["5"], ["0", "1"])
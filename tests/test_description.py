@@ -0,0 +1,127 @@
+import json
+import os
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.dataset.utils import (
+    DATASET_DESCRIPTION_KEYS,
+    DescriptionValidator,
+    query_dataset_description,
+    validate_descriptions,
+)
+from bids_derivatives.utils import serialization
+from bids_derivatives.utils.serialization import JSONLoader, loads_json
+from tests.fixtures import TEST_DERIVATIVES_PATH
+
+
+class DescriptionTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.temporary_directory.name) / "description.json"
+        self.write({"Name": "qsiprep", "BIDSVersion": "1.1.1"})
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def write(self, content: dict, seconds_ago: int = 60):
+        self.path.write_text(json.dumps(content))
+        timestamp = time.time() - seconds_ago
+        os.utime(self.path, (timestamp, timestamp))
+
+    def test_loader_caches_by_stamp(self):
+        """
+        Test that descriptions are only parsed again once modified.
+        """
+        loader = JSONLoader()
+        with patch.object(
+            serialization, "read_json", wraps=serialization.read_json
+        ) as read:
+            first = loader.load(self.path)
+            self.assertIs(loader.load(self.path), first)
+            self.assertEqual(read.call_count, 1)
+            self.write({"Name": "fmriprep", "BIDSVersion": "1.1.1"}, 30)
+            self.assertEqual(loader.load(self.path)["Name"], "fmriprep")
+            self.assertEqual(read.call_count, 2)
+
+    def test_loader_skips_recently_modified(self):
+        """
+        Test that files modified within the racy window are not cached.
+        """
+        loader = JSONLoader()
+        self.write({"Name": "qsiprep"}, seconds_ago=0)
+        loader.load(self.path)
+        self.assertEqual(len(loader), 0)
+
+    def test_loader_bounded(self):
+        """
+        Test that the least recently loaded descriptions are dropped.
+        """
+        loader = JSONLoader(maxsize=1)
+        other = self.path.with_name("other.json")
+        other.write_text("{}")
+        os.utime(other, (time.time() - 60, time.time() - 60))
+        loader.load(self.path)
+        loader.load(other)
+        self.assertEqual(len(loader), 1)
+
+    def test_non_finite_numbers(self):
+        """
+        Test that NaN and infinite constants are parsed, with or without
+        orjson.
+        """
+        content = loads_json(b'{"a": NaN, "b": Infinity, "c": -Infinity}')
+        self.assertNotEqual(content["a"], content["a"])
+        self.assertEqual(content["b"], float("inf"))
+        self.assertEqual(content["c"], float("-inf"))
+        with self.assertRaises(ValueError):
+            loads_json(b"{")
+
+    def test_description_copies(self):
+        """
+        Test that derivatives do not share their descriptions' content.
+        """
+        base_directory = Path(TEST_DERIVATIVES_PATH) / "qsiprep"
+        first = BIDSDerivative(base_directory, verbosity="error")
+        second = BIDSDerivative(base_directory, verbosity="error")
+        first.dataset_description["Name"] = "modified"
+        self.assertNotEqual(second.dataset_description["Name"], "modified")
+
+    def test_validator(self):
+        """
+        Test that the validator matches query_dataset_description.
+        """
+        validator = DescriptionValidator()
+        description = {"Name": "qsiprep", "License": ""}
+        expected = query_dataset_description(
+            description, dict(DATASET_DESCRIPTION_KEYS)
+        )
+        self.assertEqual(validator.query(description), dict(expected))
+        query = query_dataset_description(description)
+        self.assertIsInstance(query, defaultdict)
+        self.assertEqual(query["unknown"], {})
+        missing = validator.get_missing(description)
+        self.assertEqual(missing["required"], ["BIDSVersion"])
+        self.assertNotIn("License", missing["recommended"])
+
+    def test_validate_descriptions(self):
+        """
+        Test that several roots are validated into a single report.
+        """
+        roots = [
+            Path(TEST_DERIVATIVES_PATH) / "qsiprep",
+            Path(TEST_DERIVATIVES_PATH) / "qsiprep_invalid",
+            Path(self.temporary_directory.name),
+        ]
+        report = validate_descriptions(roots, max_workers=2)
+        self.assertEqual(len(report["reports"]), 3)
+        self.assertTrue(report["reports"][0].valid)
+        self.assertIsNotNone(report["reports"][2].error)
+        self.assertEqual(report["invalid"], roots[1:])
+        self.assertEqual(report["missing"]["required"]["Name"], [roots[1]])
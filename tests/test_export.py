@@ -0,0 +1,89 @@
+import importlib.util
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipIf
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.export.table import read_table, require_pyarrow
+
+
+@skipIf(importlib.util.find_spec("pyarrow") is None, "requires pyarrow")
+class ExportTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        base_directory = generate_derivative(
+            Path(self.temporary_directory.name) / "qsiprep",
+            num_subjects=3,
+            num_sessions=2,
+            file_size=1024,
+        )
+        self.derivative = BIDSDerivative(
+            base_directory, verbosity="error", use_index=False
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_to_table(self):
+        """
+        Test that the table holds a row per file and a column per entity.
+        """
+        pyarrow = require_pyarrow()
+        inventory = self.derivative.to_table()
+        scan = self.derivative.walk()
+        self.assertEqual(inventory.num_rows, len(scan.files))
+        self.assertEqual(
+            inventory.column_names[:3], ["directory", "name", "subject"]
+        )
+        self.assertIn("desc", inventory.column_names)
+        self.assertTrue(
+            pyarrow.types.is_dictionary(inventory.schema.field("subject").type)
+        )
+        self.assertEqual(set(inventory.column("size").to_pylist()), {1024})
+        masks = [
+            name
+            for name, suffix in zip(
+                inventory.column("name").to_pylist(),
+                inventory.column("suffix").to_pylist(),
+            )
+            if suffix == "mask"
+        ]
+        self.assertEqual(
+            sorted(masks),
+            sorted(
+                path.name for path in self.derivative.get_files(suffix="mask")
+            ),
+        )
+
+    def test_parquet_round_trip(self):
+        """
+        Test that an inventory written to Parquet is read back unchanged.
+        """
+        path = Path(self.temporary_directory.name) / "inventory.parquet"
+        inventory = self.derivative.to_table()
+        self.assertEqual(self.derivative.to_parquet(path), path)
+        reloaded = read_table(path)
+        self.assertTrue(reloaded.equals(inventory))
+        subjects = read_table(path, columns=["subject"])
+        self.assertEqual(subjects.column_names, ["subject"])
+
+    def test_clashing_entities(self):
+        """
+        Test that entities named like record columns get their own columns.
+        """
+        anatomical = self.derivative.base_directory / "sub-1" / "anat"
+        (anatomical / "sub-1_size-large_name-x_T1w.json").write_text("{}")
+        inventory = self.derivative.to_table().to_pylist()
+        (row,) = [
+            row
+            for row in inventory
+            if row["name"] == "sub-1_size-large_name-x_T1w.json"
+        ]
+        self.assertEqual(row["directory"], "sub-1/anat")
+        self.assertEqual(row["size"], 2)
+        self.assertEqual(row["entity_size"], "large")
+        self.assertEqual(row["entity_name"], "x")
+        self.assertEqual(row["subject"], "1")
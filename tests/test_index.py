@@ -0,0 +1,173 @@
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.index import DerivativeIndex
+from bids_derivatives.storage import FsspecStorage
+from tests.fixtures import TEST_DERIVATIVES_PATH
+from tests.test_storage import LocalFileSystem
+
+
+def backdate(root: Path, seconds: int = 60):
+    """
+    Move the modification time of every directory under *root* back by
+    *seconds*, so that it is out of the index's racy window.
+    """
+    timestamp = time.time() - seconds
+    for directory, _, _ in os.walk(root):
+        os.utime(directory, (timestamp, timestamp))
+
+
+class DerivativeIndexTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.base_directory = Path(self.temporary_directory.name) / "qsiprep"
+        shutil.copytree(
+            Path(TEST_DERIVATIVES_PATH) / "qsiprep", self.base_directory
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def build_index(self) -> DerivativeIndex:
+        index = DerivativeIndex(self.base_directory)
+        index.refresh()
+        backdate(self.base_directory)
+        index.refresh()
+        return index
+
+    def test_missing_index(self):
+        """
+        Test that no index is loaded before one is built.
+        """
+        self.assertIsNone(DerivativeIndex.load(self.base_directory))
+        self.assertFalse(DerivativeIndex(self.base_directory).is_fresh())
+        with self.assertRaises(ValueError):
+            DerivativeIndex(self.base_directory).get_subjects()
+
+    def test_index_content(self):
+        """
+        Test that the index records subjects, sessions and files.
+        """
+        index = self.build_index()
+        self.assertTrue(index.is_fresh())
+        self.assertEqual(index.get_subjects(), ["1"])
+        self.assertEqual(index.get_sessions("1"), ["202101030855"])
+        self.assertEqual(index.get_all_sessions(), {"1": ["202101030855"]})
+        self.assertTrue(index.is_fresh("", "sub-1"))
+        self.assertFalse(index.is_fresh("", "sub-2"))
+        files = index.get_files(subject="1", session="202101030855")
+        self.assertTrue(files)
+        for file in files:
+            self.assertEqual(file["subject"], "1")
+            self.assertEqual(file["session"], "202101030855")
+        anatomical = index.get_files(subject="1")
+        preproc = [
+            file
+            for file in anatomical
+            if file["path"] == "sub-1/anat/sub-1_desc-preproc_T1w.nii.gz"
+        ]
+        self.assertEqual(len(preproc), 1)
+        self.assertEqual(preproc[0]["datatype"], "anat")
+        self.assertEqual(
+            preproc[0]["entities"],
+            {
+                "subject": "1",
+                "desc": "preproc",
+                "suffix": "T1w",
+                "extension": ".nii.gz",
+            },
+        )
+
+    def test_incremental_refresh(self):
+        """
+        Test that only modified directories are rescanned.
+        """
+        index = self.build_index()
+        self.assertEqual(index.refresh(), 0)
+        (self.base_directory / "sub-2" / "ses-1").mkdir(parents=True)
+        self.assertFalse(index.is_fresh(""))
+        self.assertEqual(index.refresh(), 3)
+        self.assertEqual(index.get_subjects(), ["1", "2"])
+        self.assertEqual(index.get_sessions("2"), ["1"])
+        shutil.rmtree(self.base_directory / "sub-2")
+        index.refresh()
+        self.assertEqual(index.get_subjects(), ["1"])
+        self.assertEqual(index.get_files(subject="2"), [])
+
+    def test_derivative_uses_index(self):
+        """
+        Test that BIDSDerivative answers queries from a fresh index.
+        """
+        derivative = BIDSDerivative(self.base_directory)
+        self.assertIsNone(derivative.index)
+        derivative.build_index()
+        backdate(self.base_directory)
+        derivative.build_index()
+        self.assertIsInstance(
+            BIDSDerivative(self.base_directory).index, DerivativeIndex
+        )
+        self.assertIsNone(
+            BIDSDerivative(self.base_directory, use_index=False).index
+        )
+        files = BIDSDerivative(
+            self.base_directory, use_index=False
+        ).get_files()
+        with patch.object(os, "scandir", side_effect=AssertionError):
+            self.assertEqual(derivative.subjects, ["1"])
+            self.assertEqual(derivative.get_files(), files)
+            self.assertEqual(
+                derivative.derivatives["1"].sessions, ["202101030855"]
+            )
+        (self.base_directory / "sub-2").mkdir()
+        self.assertEqual(sorted(derivative.subjects), ["1", "2"])
+
+    def test_partial_freshness(self):
+        """
+        Test that only the given directories are checked for freshness.
+        """
+        index = self.build_index()
+        self.assertTrue(index.is_fresh("", "sub-1", "sub-1"))
+        self.assertFalse(index.is_fresh("sub-1", "sub-2"))
+        (self.base_directory / "sub-1" / "figures" / "new.svg").touch()
+        self.assertTrue(index.is_fresh("", "sub-1"))
+        self.assertFalse(index.is_fresh("sub-1/figures"))
+        self.assertFalse(index.is_fresh())
+
+    def test_depth_limited_freshness(self):
+        """
+        Test that freshness checks limited by depth only stat the
+        directories above that depth.
+        """
+        index = self.build_index()
+        self.assertTrue(index.is_fresh(max_depth=1))
+        (self.base_directory / "sub-1" / "figures" / "new.svg").touch()
+        with patch.object(os, "stat", wraps=os.stat) as stat:
+            self.assertTrue(index.is_fresh(max_depth=1))
+        self.assertEqual(
+            {Path(call.args[0]) for call in stat.call_args_list},
+            {index.path, self.base_directory, self.base_directory / "sub-1"},
+        )
+        self.assertFalse(index.is_fresh())
+        (self.base_directory / "sub-2").mkdir()
+        self.assertFalse(index.is_fresh(max_depth=1))
+
+    def test_non_local_storage_ignores_index(self):
+        """
+        Test that derivatives of other storages never load an index.
+        """
+        self.build_index()
+        storage = FsspecStorage(
+            LocalFileSystem(), root=str(self.base_directory.parent)
+        )
+        with patch.object(DerivativeIndex, "load") as load:
+            derivative = BIDSDerivative("qsiprep", storage=storage)
+        load.assert_not_called()
+        self.assertIsNone(derivative.index)
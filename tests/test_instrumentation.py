@@ -0,0 +1,72 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.utils.entities import parse_entities
+from bids_derivatives.utils.instrumentation import instrument
+from bids_derivatives.utils.scanner import walk_derivative
+from tests.fixtures import TEST_DERIVATIVES_PATH
+
+
+class InstrumentationTestCase(TestCase):
+    def setUp(self) -> None:
+        self.derivative = BIDSDerivative(
+            Path(TEST_DERIVATIVES_PATH) / "qsiprep", use_index=False
+        )
+        return super().setUp()
+
+    def test_query_recorded(self):
+        """
+        Test that a query's filesystem calls and parsing are recorded.
+        """
+        with instrument("get_files") as recorder:
+            self.derivative.get_files(suffix="T1w")
+        operations = recorder.as_dict()
+        self.assertGreater(operations["scandir"]["count"], 1)
+        self.assertIn("stat", operations)
+        self.assertEqual(
+            operations["parse_entities"]["count"],
+            len(self.derivative.walk().files),
+        )
+        self.assertGreaterEqual(recorder.total_seconds, 0)
+
+    def test_nested_recorders(self):
+        """
+        Test that nested recorders both record, and inactive ones do not.
+        """
+        with instrument() as outer:
+            parse_entities("sub-1_T1w.nii.gz")
+            with instrument() as inner:
+                parse_entities("sub-1_T1w.nii.gz")
+        parse_entities("sub-1_T1w.nii.gz")
+        self.assertEqual(outer.counts["parse_entities"], 2)
+        self.assertEqual(inner.counts["parse_entities"], 1)
+
+    def test_concurrent_scans_recorded(self):
+        """
+        Test that calls made in worker threads are recorded.
+        """
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            base_directory = generate_derivative(
+                Path(temporary_directory) / "qsiprep", num_subjects=4
+            )
+            with instrument() as sequential:
+                walk_derivative(base_directory)
+            with instrument() as concurrent:
+                walk_derivative(base_directory, max_workers=4)
+        self.assertEqual(sequential.counts, concurrent.counts)
+        self.assertGreater(sequential.counts["scandir"], 4)
+
+    def test_logged(self):
+        """
+        Test that recorded operations are logged at DEBUG level.
+        """
+        level = self.derivative.logger.level
+        with self.assertLogs(self.derivative.logger, "DEBUG") as logs:
+            with self.derivative.instrument("subjects"):
+                self.derivative.subjects
+        self.assertIn("subjects took", logs.output[0])
+        self.assertIn("scandir", logs.output[0])
+        self.assertEqual(self.derivative.logger.level, level)
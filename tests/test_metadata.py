@@ -0,0 +1,147 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.metadata import SidecarResolver, metadata
+from bids_derivatives.utils.serialization import JSONLoader
+
+DWI = "sub-{subject}_ses-1_dir-FWD_space-T1w_desc-preproc_dwi"
+
+
+class MetadataTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.base_directory = generate_derivative(
+            Path(self.temporary_directory.name) / "qsiprep", num_subjects=2
+        )
+        dwi = self.base_directory / "sub-1" / "ses-1" / "dwi"
+        self.sidecars = {
+            self.base_directory / "dwi.json": {"Level": "root", "Root": 1},
+            self.base_directory
+            / "sub-1"
+            / "sub-1_dwi.json": {"Level": "subject", "Subject": 1},
+            dwi / f"{DWI.format(subject=1)}.json": {"Level": "file"},
+            dwi / "sub-1_ses-1_dir-FWD_dwiqc.json": {"fd_mean": 0.1},
+        }
+        timestamp = time.time() - 60
+        for path, content in self.sidecars.items():
+            path.write_text(json.dumps(content))
+            os.utime(path, (timestamp, timestamp))
+        self.derivative = BIDSDerivative(
+            self.base_directory, verbosity="error", use_index=False
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_inheritance(self):
+        """
+        Test that the nearest and most specific sidecars take precedence.
+        """
+        view = self.derivative.get_metadata(
+            desc="preproc", suffix="dwi", extension=".nii.gz"
+        )
+        self.assertEqual(len(view), 2)
+        first, second = (
+            self.base_directory
+            / f"sub-{subject}"
+            / "ses-1"
+            / "dwi"
+            / f"{DWI.format(subject=subject)}.nii.gz"
+            for subject in (1, 2)
+        )
+        self.assertEqual(
+            view[first], {"Level": "file", "Root": 1, "Subject": 1}
+        )
+        self.assertEqual(view[second], {"Level": "root", "Root": 1})
+        self.assertEqual(len(view.get_sidecars(first)), 3)
+        self.assertEqual(view.errors, {})
+
+    def test_lazy_and_prefetched_reads(self):
+        """
+        Test that sidecars are only read once accessed (or prefetched),
+        and at most once per view.
+        """
+        with patch.object(
+            metadata, "read_sidecar", wraps=metadata.read_sidecar
+        ) as read:
+            view = self.derivative.get_metadata(subject="1", suffix="dwiqc")
+            self.assertEqual(read.call_count, 0)
+            (path,) = view
+            self.assertEqual(view[path], {"fd_mean": 0.1})
+            self.assertEqual(view[path], {"fd_mean": 0.1})
+            self.assertEqual(read.call_count, 1)
+            view = self.derivative.get_metadata(extension=".nii.gz")
+            view.prefetch(max_workers=4)
+            num_reads = read.call_count
+            self.assertEqual(num_reads, 1 + 3)
+            for path in view:
+                view[path]
+            self.assertEqual(read.call_count, num_reads)
+
+    def test_unreadable_sidecars(self):
+        """
+        Test that unreadable sidecars are reported and contribute nothing.
+        """
+        view = self.derivative.get_metadata(
+            subject="2", suffix="dwiqc", prefetch=True
+        )
+        (path,) = view
+        self.assertEqual(view[path], {})
+        self.assertEqual(
+            list(view.errors),
+            ["sub-2/ses-1/dwi/sub-2_ses-1_dir-FWD_dwiqc.json"],
+        )
+
+    def test_single_subject(self):
+        """
+        Test that single subjects' metadata match the dataset's.
+        """
+        view = self.derivative.derivatives["1"].get_metadata(
+            desc="preproc", suffix="dwi", extension=".nii.gz"
+        )
+        (path,) = view
+        self.assertEqual(
+            view[path], {"Level": "file", "Root": 1, "Subject": 1}
+        )
+
+    def test_resolver_chains(self):
+        """
+        Test that each directory's applicable sidecars are collected once.
+        """
+        resolver = SidecarResolver(
+            ["dwi.json", "sub-1/sub-1_dwi.json", "sub-1/ses-1/dwi/a.nii.gz"]
+        )
+        chain = resolver.get_chain("sub-1/ses-1/dwi")
+        self.assertIs(resolver.get_chain("sub-1/ses-1/dwi"), chain)
+        self.assertEqual(
+            [path for *_, path in chain],
+            ["dwi.json", "sub-1/sub-1_dwi.json"],
+        )
+        self.assertEqual(
+            resolver.resolve("sub-2/ses-1/dwi/sub-2_ses-1_dwi.nii.gz"),
+            ["dwi.json"],
+        )
+
+    def test_loader_bounded_by_size(self):
+        """
+        Test that the loader drops the least recently loaded files beyond
+        its size bound.
+        """
+        paths = list(self.sidecars)
+        size = max(path.stat().st_size for path in paths)
+        loader = JSONLoader(maxbytes=2 * size)
+        for path in paths:
+            loader.load(path)
+        self.assertLessEqual(loader.nbytes, 2 * size)
+        self.assertLess(len(loader), len(paths))
+        loader.clear()
+        self.assertEqual((len(loader), loader.nbytes), (0, 0))
@@ -0,0 +1,135 @@
+import json
+import math
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.storage import open_archive
+
+FD_MEAN = "subjects.0.fd_mean"
+
+
+class MetricsTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.base_directory = generate_derivative(
+            Path(self.temporary_directory.name) / "qsiprep",
+            num_subjects=3,
+            num_sessions=2,
+        )
+        for path in self.base_directory.glob("sub-*/ses-*/dwi/*_dwiqc.json"):
+            subject, session = path.name.split("_")[:2]
+            fd_mean = int(subject[4:]) + int(session[4:]) / 10
+            path.write_text(
+                json.dumps(
+                    {"subjects": [{"fd_mean": fd_mean, "file_name": "x"}]}
+                )
+            )
+        for path in self.base_directory.glob("sub-*/ses-*/dwi/*.tsv"):
+            path.write_text("framewise_displacement\tdvars\nn/a\t1\n0.5\t3\n")
+        self.derivative = BIDSDerivative(
+            self.base_directory, verbosity="error", use_index=False
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_json_metrics(self):
+        """
+        Test that nested JSON fields are collected by subject and session.
+        """
+        table = self.derivative.collect_metrics(
+            "*_dwiqc.json", fields=[FD_MEAN, "missing"]
+        )
+        self.assertEqual(table.values.shape, (6, 2))
+        self.assertEqual(list(table.subjects[:2]), ["1", "1"])
+        self.assertEqual(list(table.sessions[:2]), ["1", "2"])
+        self.assertEqual(list(table.get(FD_MEAN)[:2]), [1.1, 1.2])
+        self.assertTrue(all(math.isnan(value) for value in table.values[:, 1]))
+        subjects, sessions, cube = table.to_cube()
+        self.assertEqual(list(subjects), ["1", "2", "3"])
+        self.assertEqual(list(sessions), ["1", "2"])
+        self.assertEqual(cube.shape, (3, 2, 2))
+        self.assertEqual(cube[2, 0, 0], 3.1)
+
+    def test_discovered_fields(self):
+        """
+        Test that the first file's numeric fields are collected by default.
+        """
+        table = self.derivative.collect_metrics("*_dwiqc.json", subject="2")
+        self.assertEqual(table.fields, [FD_MEAN])
+        self.assertEqual(list(table.get(FD_MEAN)), [2.1, 2.2])
+
+    def test_tsv_metrics(self):
+        """
+        Test that TSV columns are averaged over rows, ignoring n/a.
+        """
+        table = self.derivative.collect_metrics(
+            "*_confounds.tsv", max_workers=2, backend="process"
+        )
+        self.assertEqual(table.fields, ["framewise_displacement", "dvars"])
+        self.assertEqual(table.values.tolist(), [[0.5, 2.0]] * 6)
+
+    def test_unreadable_files(self):
+        """
+        Test that unreadable files are reported, with missing values.
+        """
+        path = "sub-3/ses-2/dwi/sub-3_ses-2_dir-FWD_dwiqc.json"
+        (self.base_directory / path).write_text("{")
+        table = self.derivative.collect_metrics(
+            "*_dwiqc.json", fields=[FD_MEAN]
+        )
+        self.assertEqual(list(table.errors), [path])
+        self.assertTrue(math.isnan(table.values[-1, 0]))
+
+    def test_duplicate_rows(self):
+        """
+        Test that sessions with several matching files cannot be arranged
+        as a cube.
+        """
+        dwi = self.base_directory / "sub-1" / "ses-1" / "dwi"
+        (dwi / "sub-1_ses-1_run-2_dwiqc.json").write_text("{}")
+        table = self.derivative.collect_metrics("*dwiqc.json", fields=[])
+        self.assertEqual(len(table.paths), 7)
+        with self.assertRaises(ValueError):
+            table.to_cube()
+
+    def test_archived_metrics(self):
+        """
+        Test that metrics are read through the derivative's storage, from
+        several threads at once.
+        """
+        # Large enough tables for concurrent reads to overlap.
+        paths = sorted(self.base_directory.glob("sub-*/ses-*/dwi/*.tsv"))
+        for index, path in enumerate(paths):
+            rows = "".join(f"{index}\t{row}\n" for row in range(5_000))
+            path.write_text(f"framewise_displacement\tdvars\n{rows}")
+        archive = Path(self.temporary_directory.name) / "derivatives.zip"
+        with zipfile.ZipFile(archive, "w") as f:
+            for path in self.base_directory.rglob("*"):
+                if path.is_file():
+                    f.write(path, path.relative_to(self.base_directory.parent))
+        tar = Path(self.temporary_directory.name) / "derivatives.tar"
+        with tarfile.open(tar, "w") as f:
+            f.add(self.base_directory, arcname="qsiprep")
+        for path in (archive, tar):
+            storage = open_archive(path)
+            derivative = BIDSDerivative(
+                "qsiprep", verbosity="error", storage=storage, max_workers=8
+            )
+            for pattern in ("*_dwiqc.json", "*_confounds.tsv"):
+                with self.subTest(archive=path.name, pattern=pattern):
+                    table = derivative.collect_metrics(pattern)
+                    expected = self.derivative.collect_metrics(pattern)
+                    self.assertEqual(table.errors, {})
+                    self.assertEqual(table.fields, expected.fields)
+                    self.assertEqual(
+                        table.values.tolist(), expected.values.tolist()
+                    )
+            storage.close()
@@ -0,0 +1,208 @@
+import gzip
+import os
+import struct
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.nifti import HEADER_LOADER, header, parse_header
+from bids_derivatives.storage import TarStorage
+
+SPACE = "MNI152NLin2009cAsym"
+T1W = (
+    "sub-{subject}/anat/sub-{subject}_space-MNI152NLin2009cAsym"
+    "_desc-preproc_T1w.nii.gz"
+)
+MASK = "sub-{subject}/anat/sub-{subject}_desc-brain_mask.nii"
+
+
+def make_nifti1(shape, zooms, offset=(0.0, 0.0, 0.0), endian="<") -> bytes:
+    """
+    Build a NIfTI-1 image of zeros with an sform scaling by *zooms*.
+    """
+    data = bytearray(352)
+    struct.pack_into(f"{endian}i", data, 0, 348)
+    dim = (len(shape), *shape) + (1,) * (7 - len(shape))
+    struct.pack_into(f"{endian}8h", data, 40, *dim)
+    struct.pack_into(f"{endian}2h", data, 70, 16, 32)
+    pixdim = (1.0, *zooms) + (0.0,) * (7 - len(zooms))
+    struct.pack_into(f"{endian}8f", data, 76, *pixdim)
+    struct.pack_into(f"{endian}2h", data, 252, 0, 2)
+    srows = [0.0] * 12
+    for axis in range(3):
+        srows[axis * 4 + axis] = zooms[axis]
+        srows[axis * 4 + 3] = offset[axis]
+    struct.pack_into(f"{endian}12f", data, 280, *srows)
+    data[344:348] = b"n+1\0"
+    return bytes(data) + bytes(1024)
+
+
+def make_nifti2(shape, zooms, quatern=(0.0, 0.0, 1.0)) -> bytes:
+    """
+    Build a NIfTI-2 header with a qform (rotated by *quatern*).
+    """
+    data = bytearray(544)
+    struct.pack_into("<i", data, 0, 540)
+    struct.pack_into("<2h", data, 12, 4, 8)
+    dim = (len(shape), *shape) + (1,) * (7 - len(shape))
+    struct.pack_into("<8q", data, 16, *dim)
+    pixdim = (1.0, *zooms) + (0.0,) * (7 - len(zooms))
+    struct.pack_into("<8d", data, 104, *pixdim)
+    struct.pack_into("<2i", data, 344, 1, 0)
+    struct.pack_into("<6d", data, 352, *quatern, 1.0, 2.0, 3.0)
+    return bytes(data)
+
+
+class HeaderTestCase(TestCase):
+    def test_parse_nifti1(self):
+        """
+        Test that NIfTI-1 headers are parsed in either byte order.
+        """
+        for endian in "<>":
+            parsed = parse_header(
+                make_nifti1((4, 5, 6, 2), (1.0, 2.0, 3.0, 0.5), endian=endian)
+            )
+            self.assertEqual(parsed.version, 1)
+            self.assertEqual(parsed.shape, (4, 5, 6, 2))
+            self.assertEqual(parsed.zooms, (1.0, 2.0, 3.0, 0.5))
+            self.assertEqual(parsed.affine[1], (0.0, 2.0, 0.0, 0.0))
+
+    def test_parse_nifti2(self):
+        """
+        Test that NIfTI-2 affines are built from their quaternion.
+        """
+        parsed = parse_header(make_nifti2((2, 3, 4), (1.0, 1.0, 2.0)))
+        self.assertEqual((parsed.version, parsed.datatype), (2, 4))
+        # A rotation by pi around z flips x and y.
+        self.assertEqual(
+            [row[:3] for row in parsed.affine[:3]],
+            [(-1.0, 0.0, 0.0), (0.0, -1.0, 0.0), (0.0, 0.0, 2.0)],
+        )
+        self.assertEqual([row[3] for row in parsed.affine], [1, 2, 3, 1])
+
+    def test_invalid_headers(self):
+        """
+        Test that truncated or foreign headers are rejected.
+        """
+        for data in (b"", make_nifti1((2, 2, 2), (1.0,) * 3)[:100]):
+            with self.assertRaisesRegex(ValueError, "truncated"):
+                parse_header(data)
+        with self.assertRaisesRegex(ValueError, "sizeof_hdr is 1"):
+            parse_header(struct.pack("<i", 1) * 100)
+
+
+class InspectionTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.base_directory = generate_derivative(
+            Path(self.temporary_directory.name) / "qsiprep", num_subjects=3
+        )
+        timestamp = time.time() - 60
+        for subject in range(1, 4):
+            zooms = (1.0, 1.0, 1.0) if subject < 3 else (2.0, 2.0, 2.0)
+            path = self.base_directory / T1W.format(subject=subject)
+            with gzip.open(path, "wb") as f:
+                f.write(make_nifti1((10, 12, 14), zooms) + bytes(2**20))
+            mask = self.base_directory / MASK.format(subject=subject)
+            mask.write_bytes(make_nifti1((10, 12, 14), zooms))
+            for written in (path, mask):
+                os.utime(written, (timestamp, timestamp))
+        self.derivative = BIDSDerivative(
+            self.base_directory, verbosity="error", use_index=False
+        )
+        HEADER_LOADER.clear()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_summary(self):
+        """
+        Test that gzipped and uncompressed images are summarized as
+        arrays, by subject.
+        """
+        summary = self.derivative.inspect_headers(
+            suffix="T1w", space=SPACE, max_workers=3
+        )
+        self.assertEqual(list(summary.subjects), ["1", "2", "3"])
+        self.assertEqual(summary.shapes[0].tolist(), [10, 12, 14, 1, 1, 1, 1])
+        self.assertEqual(summary.zooms[2, :3].tolist(), [2.0, 2.0, 2.0])
+        self.assertEqual(summary.affines.shape, (3, 4, 4))
+        self.assertEqual(summary.errors, {})
+        self.assertEqual(summary.find_mismatches(), [T1W.format(subject=3)])
+        summary = self.derivative.inspect_headers(
+            suffix="mask", extension=".nii"
+        )
+        self.assertEqual(
+            summary.paths,
+            [MASK.format(subject=subject) for subject in range(1, 4)],
+        )
+        self.assertEqual(list(summary.ndims), [3, 3, 3])
+
+    def test_cached_headers(self):
+        """
+        Test that headers are read once until their image changes.
+        """
+        with patch.object(
+            header, "read_header_bytes", wraps=header.read_header_bytes
+        ) as read:
+            self.derivative.inspect_headers(extension=".nii")
+            self.derivative.inspect_headers(extension=".nii")
+            self.assertEqual(read.call_count, 3)
+            mask = self.base_directory / MASK.format(subject=1)
+            mask.write_bytes(make_nifti1((10, 12, 15), (1.0, 1.0, 1.0)))
+            os.utime(mask, (time.time() - 30, time.time() - 30))
+            summary = self.derivative.inspect_headers(extension=".nii")
+            self.assertEqual(read.call_count, 4)
+        self.assertEqual(summary.shapes[0, 2], 15)
+
+    def test_archived_headers(self):
+        """
+        Test that headers read concurrently from a tar archive match those
+        read sequentially.
+        """
+        for subject in range(1, 4):
+            for run in range(1, 17):
+                path = self.base_directory / MASK.format(subject=subject)
+                path.with_name(
+                    f"sub-{subject}_run-{run}_mask.nii"
+                ).write_bytes(
+                    make_nifti1((subject, run, 14), (1.0, 1.0, float(run)))
+                    + os.urandom(2**16)
+                )
+        archive = Path(self.temporary_directory.name) / "qsiprep.tar"
+        with tarfile.open(archive, "w") as tar:
+            tar.add(self.base_directory, arcname="qsiprep")
+        storage = TarStorage(archive)
+        self.addCleanup(storage.close)
+        derivative = BIDSDerivative(
+            "qsiprep", verbosity="error", storage=storage
+        )
+        expected = self.derivative.inspect_headers(extension=".nii")
+        # Races are only likely, so concurrent reads are repeated.
+        for _ in range(10):
+            summary = derivative.inspect_headers(
+                extension=".nii", max_workers=8
+            )
+            self.assertEqual(summary.errors, {})
+            self.assertEqual(summary.paths, expected.paths)
+            self.assertEqual(summary.shapes.tolist(), expected.shapes.tolist())
+            self.assertEqual(
+                summary.zooms[:, :3].tolist(), expected.zooms[:, :3].tolist()
+            )
+
+    def test_unreadable_images(self):
+        """
+        Test that unreadable images are reported, with empty rows.
+        """
+        summary = self.derivative.inspect_headers(suffix="dseg")
+        self.assertEqual(len(summary.paths), 3)
+        self.assertEqual(list(summary.errors), summary.paths)
+        self.assertEqual(summary.shapes.sum(), 0)
+        self.assertEqual(summary.find_mismatches(), [])
@@ -0,0 +1,130 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.query.planner import plan_traversal
+from bids_derivatives.utils.instrumentation import instrument
+from tests.fixtures import TEST_DERIVATIVES_PATH
+
+#: Queries answered by planned walks, as keyword arguments.
+QUERIES = (
+    {"subject": "2"},
+    {"subject": ["sub-1", "3"], "suffix": "T1w"},
+    {"session": "2"},
+    {"datatype": "dwi", "extension": "nii.gz"},
+    {"subject": "1", "session": "ses-1", "datatype": "dwi"},
+    {"subject": "1", "datatype": "anat", "desc": "preproc"},
+    {"subject": "4", "session": "3"},
+    {"datatype": "figures"},
+)
+
+#: Entities traversals are planned by.
+PLANNED_ENTITIES = ("subject", "session", "datatype", "extension")
+
+
+class PlannerTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.base_directory = generate_derivative(
+            Path(self.temporary_directory.name) / "qsiprep",
+            num_subjects=3,
+            num_sessions=2,
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def get_derivative(self) -> BIDSDerivative:
+        """
+        Instantiate a derivative without any index.
+        """
+        return BIDSDerivative(
+            self.base_directory, verbosity="error", use_index=False
+        )
+
+    def test_planned_queries(self):
+        """
+        Test that planned walks find the same files as the whole index.
+        """
+        indexed = self.get_derivative()
+        indexed.file_index
+        for query in QUERIES:
+            with self.subTest(**query):
+                derivative = self.get_derivative()
+                filters = {
+                    key: value
+                    for key, value in query.items()
+                    if key in PLANNED_ENTITIES
+                }
+                self.assertIsNotNone(derivative.plan_query(**filters))
+                self.assertEqual(
+                    derivative.get_files(**query), indexed.get_files(**query)
+                )
+                self.assertNotIn("file_index", derivative._cache)
+
+    def test_sessions_outside_directories(self):
+        """
+        Test that session filters find the files carrying the session
+        outside its directory (e.g. figures), as the whole index does.
+        """
+        base_directory = Path(TEST_DERIVATIVES_PATH) / "qsiprep"
+        indexed = BIDSDerivative(
+            base_directory, verbosity="error", use_index=False
+        )
+        indexed.file_index
+        for query in (
+            {"session": "202101030855"},
+            {"session": "202101030855", "extension": ".svg"},
+            {"subject": "1", "session": "202101030855", "suffix": "b0"},
+            {"session": "202101030855", "datatype": "dwi"},
+        ):
+            with self.subTest(**query):
+                derivative = BIDSDerivative(
+                    base_directory, verbosity="error", use_index=False
+                )
+                self.assertEqual(
+                    derivative.get_files(**query), indexed.get_files(**query)
+                )
+                self.assertNotIn("file_index", derivative._cache)
+        figures = indexed.get_files(session="202101030855", extension=".svg")
+        self.assertEqual(len(figures), 6)
+
+    def test_pruned_traversal(self):
+        """
+        Test that a narrow query lists only its directories.
+        """
+        derivative = self.get_derivative()
+        with instrument() as recorder:
+            files = derivative.get_files(
+                subject="1", session="1", datatype="dwi"
+            )
+        # The session's dwi directory, and the subject's (whose files may
+        # carry the session in their names).
+        self.assertEqual(recorder.counts["scandir"], 2)
+        self.assertEqual(len(files), 7)
+        with instrument() as recorder:
+            derivative.get_files(datatype="anat")
+        # The base directory, each subject's, and their anat directories
+        # (sessions have none).
+        self.assertEqual(recorder.counts["scandir"], 1 + 3 + 3 + 3 * 2)
+
+    def test_explain(self):
+        """
+        Test that plans describe the directories they descend into.
+        """
+        plan = plan_traversal(subject="sub-1", datatype=["dwi", "anat"])
+        self.assertEqual(
+            plan.get_patterns(),
+            ["sub-1/anat", "sub-1/dwi", "sub-1/ses-*/anat", "sub-1/ses-*/dwi"],
+        )
+        self.assertFalse(plan_traversal(extension=".nii.gz").is_narrow)
+        derivative = self.get_derivative()
+        explanation = derivative.explain(subject="1", session="2")
+        self.assertIn("    sub-1/ses-2/**", explanation.splitlines())
+        self.assertIn("walk of every subject", derivative.explain())
+        derivative.file_index
+        self.assertIn("built earlier", derivative.explain(subject="1"))
@@ -0,0 +1,120 @@
+import os
+from pathlib import Path
+from unittest import TestCase
+
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.query import FileIndex
+from bids_derivatives.utils.entities import parse_entities
+from tests.fixtures import TEST_DERIVATIVES_PATH
+
+SESSION = "202101030855"
+
+
+class FileQueryTestCase(TestCase):
+    TEST_DATA_PATH = Path(TEST_DERIVATIVES_PATH) / "qsiprep"
+
+    def setUp(self) -> None:
+        self.derivative = BIDSDerivative(self.TEST_DATA_PATH, use_index=False)
+        return super().setUp()
+
+    def test_parse_entities(self):
+        """
+        Test that key-value entities, suffix and extension are parsed.
+        """
+        self.assertEqual(
+            parse_entities(
+                "sub-1_ses-1_dir-FWD_space-T1w_desc-preproc_dwi.nii.gz"
+            ),
+            {
+                "subject": "1",
+                "session": "1",
+                "dir": "FWD",
+                "space": "T1w",
+                "desc": "preproc",
+                "suffix": "dwi",
+                "extension": ".nii.gz",
+            },
+        )
+        self.assertEqual(
+            parse_entities("dataset_description.json"),
+            {"suffix": "description", "extension": ".json"},
+        )
+
+    def test_multiple_entities(self):
+        """
+        Test that queries on several entities intersect their matches.
+        """
+        files = self.derivative.get_files(
+            space="MNI152NLin2009cAsym",
+            desc="preproc",
+            suffix="T1w",
+            extension="nii.gz",
+        )
+        self.assertEqual(
+            files,
+            [
+                self.TEST_DATA_PATH
+                / "sub-1"
+                / "anat"
+                / "sub-1_space-MNI152NLin2009cAsym_desc-preproc_T1w.nii.gz"
+            ],
+        )
+
+    def test_alternative_values(self):
+        """
+        Test that entities given several values match any of them.
+        """
+        files = self.derivative.get_files(
+            subject="sub-1",
+            session=SESSION,
+            datatype="dwi",
+            extension=[".bval", ".bvec"],
+        )
+        self.assertEqual([file.suffix for file in files], [".bval", ".bvec"])
+        for file in files:
+            self.assertTrue(file.exists())
+
+    def test_location_entities(self):
+        """
+        Test that entities missing from file names are inferred from their
+        directories.
+        """
+        for file in self.derivative.get_files(datatype="dwi"):
+            self.assertEqual(file.parent.name, "dwi")
+        figures = self.derivative.get_files(suffix="mni", extension=".svg")
+        self.assertEqual(len(figures), 1)
+        self.assertEqual(figures[0].parent.name, "figures")
+
+    def test_no_matches(self):
+        """
+        Test that unmatched values and unknown entities match no files.
+        """
+        self.assertEqual(self.derivative.get_files(subject="2"), [])
+        self.assertEqual(self.derivative.get_files(echo="1"), [])
+        self.assertEqual(
+            len(self.derivative.get_files()),
+            sum(len(files) for *_, files in os.walk(self.TEST_DATA_PATH))
+            - 1,  # dataset_description.json
+        )
+
+    def test_file_index(self):
+        """
+        Test the inverted index directly.
+        """
+        index = FileIndex()
+        index.add("sub-1/anat/a.nii.gz", {"subject": "1", "suffix": "T1w"})
+        index.add("sub-2/anat/b.nii.gz", {"subject": "2", "suffix": "T1w"})
+        index.add("sub-2/dwi/c.nii.gz", {"subject": "2", "suffix": "dwi"})
+        self.assertEqual(len(index), 3)
+        self.assertEqual(
+            index.query(subject="2", suffix="T1w"), ["sub-2/anat/b.nii.gz"]
+        )
+        self.assertEqual(
+            index.query(suffix=["dwi", "T1w"], subject=None),
+            [
+                "sub-1/anat/a.nii.gz",
+                "sub-2/anat/b.nii.gz",
+                "sub-2/dwi/c.nii.gz",
+            ],
+        )
+        self.assertEqual(index.entities["subject"], ["1", "2"])
@@ -0,0 +1,86 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from bids_derivatives.utils.records import FileRecord
+from bids_derivatives.utils.scanner import (
+    scan_sessions,
+    scan_subjects,
+    walk_derivative,
+)
+from tests.fixtures import TEST_DERIVATIVES_PATH, TEST_SUBJECTS
+
+
+class ScannerTestCase(TestCase):
+    TEST_DATA_PATH = TEST_DERIVATIVES_PATH
+    TEST_SUBJECTS = TEST_SUBJECTS
+
+    def test_scan_subjects(self):
+        """
+        Test that subjects are listed from the base directory.
+        """
+        for key, available_subjects in self.TEST_SUBJECTS.items():
+            subjects = scan_subjects(Path(self.TEST_DATA_PATH) / key)
+            self.assertEqual(subjects, sorted(available_subjects["valid"]))
+
+    def test_subject_files_ignored(self):
+        """
+        Test that files following the subject template are not subjects.
+        """
+        with tempfile.TemporaryDirectory() as base_directory:
+            base_directory = Path(base_directory)
+            (base_directory / "sub-1").mkdir()
+            (base_directory / "sub-1.html").touch()
+            (base_directory / "sub-1" / "ses-1").mkdir()
+            (base_directory / "sub-1" / "ses-2.html").touch()
+            self.assertEqual(scan_subjects(base_directory), ["1"])
+            self.assertEqual(scan_sessions(base_directory / "sub-1"), ["1"])
+
+    def test_walk_derivative(self):
+        """
+        Test that a single walk collects subjects, sessions and files.
+        """
+        for key, available_subjects in self.TEST_SUBJECTS.items():
+            scan = walk_derivative(Path(self.TEST_DATA_PATH) / key, stat=True)
+            self.assertEqual(
+                sorted(scan.subjects), sorted(available_subjects["valid"])
+            )
+            for subject, info in available_subjects["valid"].items():
+                self.assertEqual(
+                    len(scan.subjects[subject]), info["num_sessions"]
+                )
+            files = {file.path: file for file in scan.files}
+            anatomical = files["sub-1/anat/sub-1_desc-preproc_T1w.nii.gz"]
+            self.assertEqual(anatomical.subject, "1")
+            self.assertIsNone(anatomical.session)
+            self.assertEqual(anatomical.datatype, "anat")
+            self.assertEqual(anatomical.size, 0)
+            figure = files["sub-1/figures/sub-1_t1_2_mni.svg"]
+            self.assertIsNone(figure.datatype)
+            session_files = [
+                file
+                for file in scan.files
+                if file.session == "202101030855" and file.datatype == "dwi"
+            ]
+            self.assertTrue(session_files)
+
+    def test_file_records_share_strings(self):
+        """
+        Test that records of a directory's files share interned strings.
+        """
+        scan = walk_derivative(Path(self.TEST_DATA_PATH) / "qsiprep")
+        anatomical = [
+            file for file in scan.files if file.directory == "sub-1/anat"
+        ]
+        self.assertGreater(len(anatomical), 1)
+        first, second = anatomical[:2]
+        self.assertIs(first.directory, second.directory)
+        self.assertIs(first.subject, second.subject)
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertEqual(
+            first.get_path("/base"), Path("/base", first.directory, first.name)
+        )
+        self.assertEqual(
+            FileRecord("", "dataset_description.json").path,
+            "dataset_description.json",
+        )
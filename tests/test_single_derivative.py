@@ -2,6 +2,7 @@ from pathlib import Path
 from unittest import TestCase
 
 from bids_derivatives.derivative import SingleSubjectDerivative
+from bids_derivatives.derivative.derivative import parse_subject_label
 from bids_derivatives.utils.templates.bids import SUBJECT_TEMPLATE
 from tests.fixtures import TEST_DERIVATIVES_PATH, TEST_SUBJECTS
 
@@ -128,3 +129,65 @@ class SingleDerivativeTestCase(TestCase):
             base_dir = Path(self.TEST_DATA_PATH) / key
             with self.assertRaises(ValueError):
                 SingleSubjectDerivative(base_directory=base_dir)
+
+    def test_from_labels(self):
+        """
+        Test that bulk instantiation matches one-by-one instantiation.
+        """
+        base_directory = Path(self.TEST_DATA_PATH) / "qsiprep"
+        derivatives = SingleSubjectDerivative.from_labels(
+            base_directory, ["1", SUBJECT_TEMPLATE.format(subject="1")]
+        )
+        for derivative in derivatives:
+            expected = SingleSubjectDerivative(base_directory, "1")
+            self.assertEqual(derivative.participant_label, "1")
+            self.assertEqual(derivative.path, expected.path)
+            self.assertEqual(derivative.sessions, expected.sessions)
+        self.assertIs(
+            derivatives[0].base_directory, derivatives[1].base_directory
+        )
+        (derivative,) = SingleSubjectDerivative.from_labels(
+            base_directory / "sub-1", ["1"]
+        )
+        self.assertEqual(derivative.base_directory, base_directory)
+        with self.assertRaises(ValueError):
+            SingleSubjectDerivative.from_labels(
+                base_directory / "sub-1", ["1", "2"]
+            )
+        (derivative,) = SingleSubjectDerivative.from_labels(
+            base_directory / "SUB-1", ["SUB-1"]
+        )
+        expected = SingleSubjectDerivative(base_directory / "SUB-1", "SUB-1")
+        self.assertEqual(derivative.participant_label, "1")
+        self.assertEqual(derivative.base_directory, expected.base_directory)
+        self.assertEqual(
+            derivative.participant_label, expected.participant_label
+        )
+        with self.assertRaises(ValueError):
+            SingleSubjectDerivative.from_labels(
+                base_directory / "SUB-1", ["2"]
+            )
+        (missing,) = SingleSubjectDerivative.from_labels(
+            base_directory, ["2"], trusted=True
+        )
+        with self.assertRaises(ValueError):
+            missing.path
+
+    def test_parse_subject_label(self):
+        """
+        Test that subject labels are matched as by the subject template.
+        """
+        self.assertEqual(parse_subject_label("sub-1"), "1")
+        self.assertEqual(parse_subject_label("SUB-a1"), "a1")
+        for name in ("1", "qsiprep", "sub-"):
+            self.assertIsNone(parse_subject_label(name))
+
+    def test_custom_attributes(self):
+        """
+        Test that users can set their own attributes on a derivative.
+        """
+        derivative = SingleSubjectDerivative(
+            Path(self.TEST_DATA_PATH) / "qsiprep", "1"
+        )
+        derivative.note = "excluded"
+        self.assertEqual(derivative.note, "excluded")
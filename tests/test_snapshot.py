@@ -0,0 +1,131 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.snapshot import Snapshot, diff_snapshots
+from bids_derivatives.utils.hashing import hash_file
+
+
+class SnapshotTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.base_directory = generate_derivative(
+            Path(self.temporary_directory.name) / "qsiprep",
+            num_subjects=3,
+            num_sessions=2,
+        )
+        self.derivative = BIDSDerivative(
+            self.base_directory, verbosity="error", use_index=False
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_save_and_load(self):
+        """
+        Test that a saved snapshot is loaded back unchanged.
+        """
+        snapshot = self.derivative.snapshot(hashes=True)
+        path = Path(self.temporary_directory.name) / "snapshot.json.gz"
+        loaded = Snapshot.load(snapshot.save(path))
+        for field in Snapshot.__slots__:
+            self.assertEqual(getattr(loaded, field), getattr(snapshot, field))
+        self.assertEqual(snapshot.paths, sorted(snapshot.paths))
+        self.assertEqual(len(snapshot), len(self.derivative.walk().files))
+        position = snapshot.paths.index(
+            "sub-1/ses-2/dwi/sub-1_ses-2_dir-FWD_confounds.tsv"
+        )
+        self.assertEqual(
+            snapshot.get_entities(position),
+            {
+                "subject": "1",
+                "session": "2",
+                "dir": "FWD",
+                "suffix": "confounds",
+                "extension": ".tsv",
+            },
+        )
+        self.assertFalse(diff_snapshots(snapshot, loaded))
+
+    def test_diff(self):
+        """
+        Test that added, removed and modified files are reported.
+        """
+        snapshot = self.derivative.snapshot()
+        shutil.rmtree(self.base_directory / "sub-2" / "ses-2")
+        shutil.rmtree(self.base_directory / "sub-3")
+        (self.base_directory / "sub-4" / "anat").mkdir(parents=True)
+        (self.base_directory / "sub-4" / "anat" / "sub-4_T1w.nii.gz").touch()
+        modified = self.base_directory / "sub-1" / "anat" / "sub-1_dseg.nii.gz"
+        modified.write_bytes(b"0")
+        diff = self.derivative.diff(snapshot)
+        self.assertEqual(diff.added, ["sub-4/anat/sub-4_T1w.nii.gz"])
+        self.assertEqual(diff.modified, ["sub-1/anat/sub-1_dseg.nii.gz"])
+        self.assertTrue(
+            all(
+                path.startswith(("sub-2/ses-2/", "sub-3/"))
+                for path in diff.removed
+            )
+        )
+        self.assertEqual(diff.subjects_added, ["4"])
+        self.assertEqual(diff.subjects_removed, ["3"])
+        self.assertEqual(diff.sessions_removed, {"2": ["2"], "3": ["1", "2"]})
+        self.assertEqual(diff.changed_subjects, ["1", "2", "3", "4"])
+
+    def test_hashes(self):
+        """
+        Test that hashed snapshots detect modifications by content.
+        """
+        snapshot = self.derivative.snapshot(hashes=True)
+        touched = self.base_directory / "sub-1" / "anat" / "sub-1_dseg.nii.gz"
+        os.utime(touched, (0, 0))
+        self.assertFalse(self.derivative.diff(snapshot))
+        self.assertEqual(
+            diff_snapshots(snapshot, self.derivative.snapshot()).modified,
+            ["sub-1/anat/sub-1_dseg.nii.gz"],
+        )
+
+    def test_hashes_are_cached(self):
+        """
+        Test that hashed snapshots share the digests cached by verify().
+        """
+        timestamp = time.time() - 60
+        for file in self.derivative.walk().files:
+            path = file.get_path(self.base_directory)
+            os.utime(path, (timestamp, timestamp))
+        derivative = BIDSDerivative(
+            self.base_directory,
+            verbosity="error",
+            use_index=False,
+            max_workers=2,
+        )
+        snapshot = derivative.snapshot(hashes=True)
+        self.assertEqual(
+            snapshot.hashes[0],
+            hash_file(self.base_directory / snapshot.paths[0]),
+        )
+        self.assertEqual(derivative.verify().hashed, 0)
+
+    def test_load_unsorted(self):
+        """
+        Test that snapshots whose paths are not sorted are rejected.
+        """
+        path = self.derivative.snapshot().save(
+            Path(self.temporary_directory.name) / "snapshot.json.gz"
+        )
+        with gzip.open(path, "rt") as f:
+            content = json.load(f)
+        content["paths"].reverse()
+        with gzip.open(path, "wt") as f:
+            json.dump(content, f)
+        with self.assertRaises(ValueError):
+            Snapshot.load(path)
@@ -0,0 +1,167 @@
+import os
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.storage import (
+    FsspecStorage,
+    TarStorage,
+    ZipStorage,
+    open_archive,
+)
+from bids_derivatives.utils.concurrency import map_ordered
+from tests.fixtures import TEST_DERIVATIVES_PATH
+
+
+class LocalFileSystem:
+    """
+    A local stand-in for an fsspec filesystem.
+    """
+
+    def ls(self, path, detail=True):
+        return [
+            self.info(os.path.join(path, name)) for name in os.listdir(path)
+        ]
+
+    def info(self, path):
+        stat = os.stat(path)
+        return {
+            "name": path,
+            "type": "directory" if os.path.isdir(path) else "file",
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+
+    def open(self, path, mode="rb"):
+        return open(path, mode)
+
+
+class StorageTestCase(TestCase):
+    BASE_DIRECTORY = Path(TEST_DERIVATIVES_PATH) / "qsiprep"
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temporary_directory = tempfile.TemporaryDirectory()
+        temporary_directory = Path(cls.temporary_directory.name)
+        cls.tar = temporary_directory / "derivatives.tar.gz"
+        with tarfile.open(cls.tar, "w:gz") as archive:
+            archive.add(cls.BASE_DIRECTORY, arcname="derivatives/qsiprep")
+        # Zip archives do not necessarily list directories.
+        cls.zip = temporary_directory / "derivatives.zip"
+        with zipfile.ZipFile(cls.zip, "w") as archive:
+            for path in cls.BASE_DIRECTORY.rglob("*"):
+                if path.is_file():
+                    archive.write(
+                        path,
+                        "derivatives/qsiprep/"
+                        + path.relative_to(cls.BASE_DIRECTORY).as_posix(),
+                    )
+        cls.expected = cls.get_queries(
+            BIDSDerivative(cls.BASE_DIRECTORY, use_index=False)
+        )
+        return super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.temporary_directory.cleanup()
+        return super().tearDownClass()
+
+    @staticmethod
+    def get_queries(derivative: BIDSDerivative) -> dict:
+        return {
+            "subjects": derivative.subjects,
+            "sessions": derivative.get_sessions(),
+            "dataset_description": derivative.dataset_description,
+            "files": [
+                path.relative_to(derivative.base_directory)
+                for path in derivative.get_files(suffix="mask")
+            ],
+            "subject_sessions": derivative.derivatives["1"].sessions,
+            "walk": [
+                (file.path, file.size)
+                for file in derivative.walk(stat=True).files
+            ],
+        }
+
+    def assert_same_queries(self, derivative: BIDSDerivative):
+        self.assertEqual(self.get_queries(derivative), self.expected)
+        with self.assertRaises(ValueError):
+            derivative.build_index()
+
+    def test_archives(self):
+        """
+        Test that archived derivatives are queried without extraction.
+        """
+        for archive, storage_class in (
+            (self.tar, TarStorage),
+            (self.zip, ZipStorage),
+        ):
+            storage = open_archive(archive)
+            self.assertIsInstance(storage, storage_class)
+            with patch("os.scandir") as scandir:
+                derivative = BIDSDerivative(
+                    "derivatives/qsiprep", storage=storage
+                )
+                self.assert_same_queries(derivative)
+                scandir.assert_not_called()
+            storage.close()
+
+    def test_concurrent_reads(self):
+        """
+        Test that files of a tar archive (which share its file object) are
+        read intact from several threads at once.
+        """
+        archive = Path(self.temporary_directory.name) / "concurrent.tar"
+        contents = {
+            f"file-{index}": os.urandom(100_000 + index) for index in range(16)
+        }
+        with tarfile.open(archive, "w") as tar:
+            for name, content in contents.items():
+                path = Path(self.temporary_directory.name) / name
+                path.write_bytes(content)
+                tar.add(path, arcname=name)
+        storage = TarStorage(archive)
+
+        def read(name: str) -> bytes:
+            with storage.open(name) as f:
+                return b"".join(iter(lambda: f.read(4096), b""))
+
+        names = list(contents)
+        self.assertEqual(
+            map_ordered(read, names, max_workers=8),
+            list(contents.values()),
+        )
+        storage.close()
+
+    def test_missing_paths(self):
+        """
+        Test that archives raise the errors of the local filesystem.
+        """
+        storage = open_archive(self.zip)
+        with self.assertRaises(ValueError):
+            BIDSDerivative("derivatives/fmriprep", storage=storage)
+        with self.assertRaises(FileNotFoundError):
+            storage.scan_directory("derivatives/fmriprep")
+        with self.assertRaises(NotADirectoryError):
+            storage.scan_directory(
+                "derivatives/qsiprep/dataset_description.json"
+            )
+        with self.assertRaises(FileNotFoundError):
+            storage.open("derivatives/qsiprep")
+        storage.close()
+
+    def test_fsspec(self):
+        """
+        Test that derivatives are queried through an fsspec filesystem.
+        """
+        storage = FsspecStorage(
+            LocalFileSystem(), root=str(self.BASE_DIRECTORY.parent)
+        )
+        self.assert_same_queries(
+            BIDSDerivative("qsiprep", storage=storage, use_index=False)
+        )
+        self.assertIsNone(storage.get_entry("fmriprep"))
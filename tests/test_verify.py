@@ -0,0 +1,209 @@
+import gzip
+import os
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks.synthetic import generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.storage import TarStorage
+from bids_derivatives.utils.hashing import CHUNK_SIZE, hash_file, read_chunks
+from bids_derivatives.verify import HashCache, verify_file
+from bids_derivatives.verify.messages import (
+    MISSING_SIGNATURE,
+    TRUNCATED_GZIP,
+)
+from bids_derivatives.verify.verify import HDF5_SIGNATURE
+
+CONTENT = gzip.compress(b"NIfTI" * 1000)
+
+
+def backdate_files(base_directory: Path, seconds: float = 60):
+    """
+    Move the modification time of every file of a tree into the past.
+    """
+    timestamp = time.time() - seconds
+    for directory, _, names in os.walk(base_directory):
+        for name in names:
+            os.utime(Path(directory, name), (timestamp, timestamp))
+
+
+class VerifyTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.base_directory = generate_derivative(
+            Path(self.temporary_directory.name) / "qsiprep",
+            num_subjects=2,
+            num_sessions=1,
+        )
+        for path in self.base_directory.glob("sub-*/**/*.nii.gz"):
+            path.write_bytes(CONTENT)
+        for path in self.base_directory.glob("sub-*/**/*.h5"):
+            path.write_bytes(HDF5_SIGNATURE + bytes(64))
+        backdate_files(self.base_directory)
+        self.derivative = BIDSDerivative(
+            self.base_directory, verbosity="error", use_index=False
+        )
+        self.anat = self.base_directory / "sub-1" / "anat"
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_valid_files_are_hashed_once(self):
+        """
+        Test that intact files are reported valid, and that unchanged
+        files are not hashed again.
+        """
+        report = self.derivative.verify()
+        num_files = len(self.derivative.walk().files)
+        self.assertTrue(report.is_valid)
+        self.assertEqual(report.subjects, [])
+        self.assertEqual(report.hashed, num_files)
+        path = "sub-1/anat/sub-1_desc-preproc_T1w.nii.gz"
+        self.assertEqual(
+            report.hashes[path], hash_file(self.base_directory / path)
+        )
+        again = self.derivative.verify(max_workers=4)
+        self.assertEqual(again.hashed, 0)
+        self.assertEqual(again.hashes, report.hashes)
+        self.assertEqual(self.derivative.verify(cache=False).hashed, num_files)
+
+    def test_corrupt_files(self):
+        """
+        Test that truncated gzip streams and HDF5 files lacking their
+        signature are reported by subject.
+        """
+        truncated = self.anat / "sub-1_dseg.nii.gz"
+        truncated.write_bytes(CONTENT[:-10])
+        corrupt = self.anat / "sub-1_desc-brain_mask.nii.gz"
+        corrupt.write_bytes(CONTENT[:20] + bytes(20) + CONTENT[40:])
+        transform = next(self.anat.glob("*.h5"))
+        transform.write_bytes(bytes(64))
+        report = self.derivative.verify(max_workers=2)
+        self.assertFalse(report.is_valid)
+        self.assertEqual(list(report.corrupt), ["1"])
+        errors = report.corrupt["1"]
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(
+            errors["sub-1/anat/sub-1_dseg.nii.gz"], TRUNCATED_GZIP
+        )
+        self.assertIn("sub-1/anat/sub-1_desc-brain_mask.nii.gz", errors)
+        self.assertEqual(
+            errors[f"sub-1/anat/{transform.name}"],
+            MISSING_SIGNATURE.format(format="HDF5"),
+        )
+
+    def test_changed_files(self):
+        """
+        Test that files whose content changed since they were last
+        verified are reported, and that only they are hashed again.
+        """
+        self.derivative.verify()
+        path = self.anat / "sub-1_dseg.nii.gz"
+        path.write_bytes(gzip.compress(b"changed"))
+        timestamp = time.time() - 30
+        os.utime(path, (timestamp, timestamp))
+        report = self.derivative.verify()
+        self.assertTrue(report.is_valid)
+        self.assertEqual(report.hashed, 1)
+        self.assertEqual(
+            report.changed, {"1": ["sub-1/anat/sub-1_dseg.nii.gz"]}
+        )
+        self.assertEqual(report.subjects, ["1"])
+
+    def test_recently_modified_files_are_not_cached(self):
+        """
+        Test that files modified within the racy window are hashed again.
+        """
+        path = self.anat / "sub-1_dseg.nii.gz"
+        path.write_bytes(CONTENT)
+        self.derivative.verify()
+        self.assertEqual(self.derivative.verify().hashed, 1)
+
+    def test_verify_file(self):
+        """
+        Test that concatenated gzip members and trailing zeros are valid,
+        and that unreadable files are reported.
+        """
+        path = Path(self.temporary_directory.name) / "multi.nii.gz"
+        path.write_bytes(CONTENT + gzip.compress(b"member") + bytes(8))
+        digest, error = verify_file(path)
+        self.assertIsNone(error)
+        self.assertEqual(digest, hash_file(path))
+        path.write_bytes(CONTENT + CONTENT[:12])
+        self.assertEqual(verify_file(path)[1], TRUNCATED_GZIP)
+        digest, error = verify_file(path.with_name("missing.nii.gz"))
+        self.assertIsNone(digest)
+        self.assertIsNotNone(error)
+
+    def test_hash_cache_prunes_removed_files(self):
+        """
+        Test that the records of removed files are dropped.
+        """
+        path = Path(self.temporary_directory.name) / "hashes.sqlite3"
+        self.derivative.verify(cache=path)
+        cache = HashCache(path)
+        num_records = len(cache)
+        (self.anat / "sub-1_dseg.nii.gz").unlink()
+        self.assertEqual(self.derivative.verify(cache=path).hashed, 0)
+        self.assertEqual(len(cache), num_records - 1)
+        cache.close()
+
+    def test_archived_files(self):
+        """
+        Test that files of a tar archive hashed concurrently get the same
+        digests as hashed sequentially.
+        """
+        paths = sorted(self.base_directory.glob("sub-*/**/*.*"))
+        for index, path in enumerate(paths):
+            path.write_bytes(os.urandom(100_000 + index))
+        archive = Path(self.temporary_directory.name) / "qsiprep.tar"
+        with tarfile.open(archive, "w") as tar:
+            tar.add(self.base_directory, arcname="qsiprep")
+        storage = TarStorage(archive)
+        reports = [
+            BIDSDerivative(
+                "qsiprep",
+                verbosity="error",
+                storage=storage,
+                max_workers=max_workers,
+            ).verify(cache=False)
+            # Races are only likely, so concurrent runs are repeated.
+            for max_workers in (1, 8, 8, 8)
+        ]
+        storage.close()
+        sequential, *concurrent = reports
+        for report in concurrent:
+            self.assertEqual(report.hashes, sequential.hashes)
+        path = "sub-1/anat/sub-1_dseg.nii.gz"
+        self.assertEqual(
+            sequential.hashes[path], hash_file(self.base_directory / path)
+        )
+
+    def test_tree_is_not_modified(self):
+        """
+        Test that verifying never writes to the derivatives, unless asked
+        to cache digests there.
+        """
+        before = sorted(self.base_directory.rglob("*"))
+        self.derivative.verify()
+        self.assertEqual(self.derivative.verify().hashed, 0)
+        self.assertEqual(sorted(self.base_directory.rglob("*")), before)
+
+    def test_truncated_while_read(self):
+        """
+        Test that files truncated while they are read yield their
+        remaining content rather than crashing the interpreter.
+        """
+        path = Path(self.temporary_directory.name) / "growing.nii.gz"
+        path.write_bytes(bytes(3 * CHUNK_SIZE))
+        sizes = []
+        for chunk in read_chunks(path):
+            sizes.append(len(chunk))
+            if len(sizes) == 1:
+                os.truncate(path, CHUNK_SIZE + 10)
+        self.assertEqual(sizes, [CHUNK_SIZE, 10])
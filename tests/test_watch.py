@@ -0,0 +1,214 @@
+import ctypes
+import errno
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from benchmarks.synthetic import backdate, generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.watch import DerivativeWatcher
+from bids_derivatives.watch.backends import (
+    InotifyBackend,
+    PollingBackend,
+    get_backend,
+    get_filesystem_type,
+    load_libc,
+)
+
+
+def inotify_available() -> bool:
+    try:
+        load_libc()
+    except OSError:
+        return False
+    return True
+
+
+class ExhaustedLibc:
+    """
+    The C library, as if the user's inotify watches had run out.
+    """
+
+    def __init__(self, libc: ctypes.CDLL):
+        self.libc = libc
+
+    def __getattr__(self, name: str):
+        return getattr(self.libc, name)
+
+    def inotify_add_watch(self, *args) -> int:
+        ctypes.set_errno(errno.ENOSPC)
+        return -1
+
+
+class DerivativeWatcherTestCase(TestCase):
+    BACKEND = "polling"
+
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.base_directory = generate_derivative(
+            Path(self.temporary_directory.name) / "qsiprep",
+            num_subjects=2,
+            reports=False,
+        )
+        backdate(self.base_directory)
+        self.derivative = BIDSDerivative(
+            self.base_directory, verbosity="error", use_index=False
+        )
+        self.watcher = DerivativeWatcher(
+            self.derivative, backend=self.BACKEND, interval=0.01
+        )
+        self.events = []
+        for kind in ("subject_added", "session_added", "subject_completed"):
+            self.watcher.on(kind, self.events.append)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.watcher.close()
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_initial_view(self):
+        """
+        Test that the view matches a walk of the derivatives.
+        """
+        self.assertEqual(self.watcher.subjects, ["1", "2"])
+        self.assertEqual(self.watcher.get_sessions("1"), ["1"])
+        scan = self.derivative.walk()
+        self.assertTrue(
+            {file.path for file in scan.files} <= self.watcher.files
+        )
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_events(self):
+        """
+        Test that new subjects, sessions and reports are notified.
+        """
+        self.assertEqual(self.derivative.subjects, ["1", "2"])
+        (self.base_directory / "sub-3" / "ses-1" / "dwi").mkdir(parents=True)
+        (self.base_directory / "sub-1" / "ses-2" / "anat").mkdir(parents=True)
+        self.watcher.poll(timeout=1)
+        self.assertIn(("subject_added", "3"), [e[:2] for e in self.events])
+        self.assertIn(
+            ("session_added", "1", "2"), [e[:3] for e in self.events]
+        )
+        self.assertEqual(self.derivative.subjects, ["1", "2", "3"])
+        self.assertEqual(self.watcher.get_sessions("1"), ["1", "2"])
+        (self.base_directory / "sub-3.html").touch()
+        self.watcher.poll(timeout=1)
+        self.assertEqual(self.events[-1][:2], ("subject_completed", "3"))
+
+    def test_removed_directories(self):
+        """
+        Test that removed trees are dropped from the view.
+        """
+        files = [
+            path for path in self.watcher.files if path.startswith("sub-2/")
+        ]
+        removed = []
+        self.watcher.on("file_removed", removed.append)
+        shutil.rmtree(self.base_directory / "sub-2")
+        self.watcher.poll(timeout=1)
+        self.assertEqual(self.watcher.subjects, ["1"])
+        self.assertEqual(
+            sorted(event.path for event in removed), sorted(files)
+        )
+
+    def test_background_thread(self):
+        """
+        Test that callbacks are called while watching in the background.
+        """
+        self.watcher.start(timeout=0.01)
+        (self.base_directory / "sub-4").mkdir()
+        self.watcher.stop()
+        self.watcher.poll(timeout=1)
+        self.assertIn(("subject_added", "4"), [e[:2] for e in self.events])
+
+    def test_concurrent_reads(self):
+        """
+        Test that the view may be read while the background thread updates
+        it.
+        """
+        self.watcher.start(timeout=0.01)
+        try:
+            for index in range(5, 25):
+                (self.base_directory / f"sub-{index}" / "anat").mkdir(
+                    parents=True
+                )
+                self.watcher.files
+                self.watcher.subjects
+                self.watcher.get_sessions(str(index))
+        finally:
+            self.watcher.stop()
+        self.watcher.poll(timeout=1)
+        self.assertEqual(len(self.watcher.subjects), 22)
+
+
+class InotifyWatcherTestCase(DerivativeWatcherTestCase):
+    BACKEND = "inotify"
+
+    def setUp(self) -> None:
+        if not inotify_available():
+            self.skipTest("inotify is not available")
+        return super().setUp()
+
+
+class WatchBackendTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        # Mount points are matched against resolved paths.
+        self.base_directory = Path(self.temporary_directory.name).resolve()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_watch_limit(self):
+        """
+        Test that directories left unwatched once inotify watches run out
+        are polled instead.
+        """
+        if not inotify_available():
+            self.skipTest("inotify is not available")
+        libc = ExhaustedLibc(load_libc())
+        with mock.patch(
+            "bids_derivatives.watch.backends.load_libc", return_value=libc
+        ):
+            backend = InotifyBackend(self.base_directory, interval=0.01)
+        try:
+            (self.base_directory / "sub-1").mkdir()
+            backdate(self.base_directory)
+            backend.add("")
+            self.assertEqual(backend.poll(0), set())
+            (self.base_directory / "sub-2").mkdir()
+            self.assertEqual(backend.poll(timeout=1), {""})
+        finally:
+            backend.close()
+
+    def test_network_filesystems(self):
+        """
+        Test that *auto* polls network filesystems, which inotify is not
+        notified of other hosts' changes of.
+        """
+        mounts = self.base_directory / "mounts"
+        mounts.write_text(
+            "/dev/sda1 / ext4 rw 0 0\n"
+            f"server:/data {self.base_directory}/nfs\\040data nfs4 rw 0 0\n"
+        )
+        (self.base_directory / "nfs data" / "qsiprep").mkdir(parents=True)
+        with mock.patch(
+            "bids_derivatives.watch.backends.MOUNTS_PATH", str(mounts)
+        ):
+            self.assertEqual(get_filesystem_type("/"), "ext4")
+            self.assertEqual(
+                get_filesystem_type(self.base_directory / "nfs data/qsiprep"),
+                "nfs4",
+            )
+        with mock.patch(
+            "bids_derivatives.watch.backends.get_filesystem_type",
+            return_value="nfs4",
+        ):
+            backend = get_backend(self.base_directory)
+        self.assertIsInstance(backend, PollingBackend)
+        backend.close()
@@ -0,0 +1,127 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from benchmarks.synthetic import backdate, generate_derivative
+from bids_derivatives.dataset import BIDSDerivative
+from bids_derivatives.workspace import DerivativesWorkspace
+
+
+class DerivativesWorkspaceTestCase(TestCase):
+    def setUp(self) -> None:
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.derivatives_directory = Path(self.temporary_directory.name)
+        generate_derivative(
+            self.derivatives_directory / "qsiprep",
+            num_subjects=3,
+            num_sessions=2,
+        )
+        generate_derivative(
+            self.derivatives_directory / "fmriprep",
+            app="fmriprep",
+            num_subjects=2,
+        )
+        # Subject-level outputs with no dataset description.
+        (self.derivatives_directory / "freesurfer" / "sub-1" / "mri").mkdir(
+            parents=True
+        )
+        (self.derivatives_directory / "logs").mkdir()
+        self.workspace = DerivativesWorkspace(
+            self.derivatives_directory, verbosity="error", max_workers=2
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.temporary_directory.cleanup()
+        return super().tearDown()
+
+    def test_discover_apps(self):
+        """
+        Test that only directories holding derivatives are discovered.
+        """
+        self.assertEqual(
+            self.workspace.apps, ["fmriprep", "freesurfer", "qsiprep"]
+        )
+        with self.assertRaises(ValueError):
+            self.workspace.get_app_directory("logs")
+
+    def test_shared_logger(self):
+        """
+        Test that the apps' derivatives share the workspace's logger.
+        """
+        derivatives = self.workspace.derivatives
+        self.assertIsInstance(derivatives["qsiprep"], BIDSDerivative)
+        self.assertIs(derivatives["qsiprep"].logger, self.workspace.logger)
+
+    def test_cross_app_subjects(self):
+        """
+        Test that subjects are compared across apps.
+        """
+        self.assertEqual(
+            self.workspace.get_subjects(
+                include=["qsiprep"], exclude=["fmriprep"]
+            ),
+            ["3"],
+        )
+        self.assertEqual(self.workspace.get_subjects(), ["1", "2", "3"])
+        self.assertEqual(
+            self.workspace.get_subjects(include=["qsiprep", "freesurfer"]),
+            ["1"],
+        )
+        self.assertEqual(self.workspace.get_subjects(include=[]), [])
+        for apps in ({"include": ["missing"]}, {"exclude": ["missing"]}):
+            with self.subTest(**apps), self.assertRaises(ValueError):
+                self.workspace.get_subjects(**apps)
+
+    def test_completeness(self):
+        """
+        Test the per-session completeness matrix.
+        """
+        matrix = self.workspace.get_completeness()
+        self.assertEqual(list(matrix)[:2], [("1", "1"), ("1", "2")])
+        self.assertEqual(
+            matrix["1", "2"],
+            {"fmriprep": False, "freesurfer": True, "qsiprep": True},
+        )
+        self.assertEqual(
+            matrix["3", "1"],
+            {"fmriprep": False, "freesurfer": False, "qsiprep": True},
+        )
+
+    def test_get_files(self):
+        """
+        Test that files are queried across apps from a single index.
+        """
+        masks = self.workspace.get_files(subject="1", suffix="mask")
+        self.assertEqual(
+            {
+                path.relative_to(self.derivatives_directory).parts[0]
+                for path in masks
+            },
+            {"fmriprep", "qsiprep"},
+        )
+        self.assertTrue(all(path.exists() for path in masks))
+        self.assertEqual(
+            self.workspace.get_files(app="fmriprep", subject="1"),
+            BIDSDerivative(
+                self.derivatives_directory / "fmriprep", verbosity="error"
+            ).get_files(subject="1"),
+        )
+
+    def test_invalidation_required(self):
+        """
+        Test that files added within an app's directory are only found
+        once the workspace's results are invalidated.
+        """
+        backdate(self.derivatives_directory)
+        masks = self.workspace.get_files(app="qsiprep", suffix="mask")
+        path = self.derivatives_directory / "qsiprep" / "sub-1" / "anat"
+        (path / "sub-1_desc-new_mask.nii.gz").touch()
+        self.assertEqual(
+            self.workspace.get_files(app="qsiprep", suffix="mask"), masks
+        )
+        self.workspace.invalidate()
+        self.assertEqual(
+            len(self.workspace.get_files(app="qsiprep", suffix="mask")),
+            len(masks) + 1,
+        )